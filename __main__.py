@@ -1,11 +1,123 @@
+import argparse
+import asyncio
+import os
+import sys
 from src import *
+from src.asynchronous import call_async
+from src.memo import memo_statistics
+from src.profiler import Profiler, Sampler
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog="PyBison")
+    parser.add_argument("-k", "--keepfiles", action="store_true",
+                        help="Keep temporary files used in building parse engine lib")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Enable verbose messages while parser is running")
+    parser.add_argument("-d", "--debug", action="store_true",
+                        help="Enable garrulous debug messages from parser engine")
+    parser.add_argument("-c", "--compiled", action="store_true",
+                        help="Compile function bodies into closures before execution")
+    parser.add_argument("--stackless", action="store_true",
+                        help="Run compiled function bodies on an explicit call stack, for deep recursion")
+    parser.add_argument("-a", "--asynchronous", action="store_true",
+                        help="Run the script as an asyncio coroutine that pauses after every robot action and loop "
+                             "iteration, stackless")
+    parser.add_argument("-O", "--optimize", action="store_true",
+                        help="Fold constant expressions and checkzero conditions before execution")
+    parser.add_argument("-m", "--memoize", action="store_true",
+                        help="Remember the results of functions that only compute with their integer and string "
+                             "arguments")
+    parser.add_argument("--memo", metavar="NAME", action="append", default=[],
+                        help="Remember the results of the function NAME even if it is not found pure, its parameters "
+                             "and result must be integers and strings")
+    parser.add_argument("--no-memo", metavar="NAME", action="append", default=[],
+                        help="Never remember the results of the function NAME")
+    parser.add_argument("--memo-size", type=int, default=128,
+                        help="Number of results remembered per function")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse the parse engine and parse trees cached by previous runs in TALAB3_CACHE_DIR, "
+                             "~/.cache/talab3 by default")
+    parser.add_argument("--frontend", choices=sorted(FRONTENDS), default="bison",
+                        help="Parse with the bison engine or the pure python parser, which needs no C toolchain")
+    parser.add_argument("-s", "--stream", action="store_true",
+                        help="Parse the script line by line, declaring every function as soon as it is parsed "
+                             "(python frontend only)")
+    parser.add_argument("-l", "--log-level", choices=sorted(LEVELS), default="off",
+                        help="Verbosity of the interpreter trace written to bison.log")
+    parser.add_argument("-r", "--renderer", choices=sorted(RENDERERS), default="terminal",
+                        help="How the robot's moves are shown: redrawn after every move, by a background "
+                             "viewer that drops frames, or not at all")
+    parser.add_argument("--trace-actions", action="store_true",
+                        help="Write every grammar action to the interpreter trace, at the info level")
+    parser.add_argument("--lexer-trace", metavar="FILE", default=None,
+                        help="Append every token recognized by the lexer to FILE")
+    parser.add_argument("--profile", metavar="FILE", default=None,
+                        help="Count the executions and time of every statement and function, and write the flat "
+                             "profile to FILE (tree walking mode, lines with the python frontend only)")
+    parser.add_argument("--collapsed", metavar="FILE", default=None,
+                        help="Write the stacks measured by --profile to FILE in the collapsed format of flame graphs")
+    parser.add_argument("--sample", metavar="FILE", default=None,
+                        help="Sample the running script every millisecond and write the sampled stacks to FILE in "
+                             "the collapsed format")
+    parser.add_argument("--max-steps", type=int, default=None,
+                        help="Stop the script after this many loop iterations and calls")
+    parser.add_argument("--timeout", type=float, default=None, help="Stop the script after this many seconds")
+    args = parser.parse_args()
+    bison_logger.set_level(args.log_level)
+    if args.trace_actions and not bison_logger.info_enabled:
+        bison_logger.set_level("info")
+    if args.lexer_trace is not None:
+        os.environ["TALAB3_FLEX_LOG"] = args.lexer_trace
+    robot = default_robot()
+    robot.renderer = RENDERERS[args.renderer]()
+
     print("TYPE IN THE NAME OF THE SCRIPT: ")
     script_name = input()
-    result = methods._function_call(compile_script(script_name), parameters=[])
+    profiler = Profiler() if args.profile is not None or args.collapsed is not None else None
+    main_func = compile_script(script_name, keepfiles=args.keepfiles, verbose=args.verbose, compiled=args.compiled,
+                               cache=args.cache, frontend=args.frontend,
+                               stream=args.stream, optimize=args.optimize,
+                               stackless=args.stackless, memoize=args.memoize,
+                               memo_overrides={**{name: True for name in args.memo},
+                                               **{name: False for name in args.no_memo}},
+                               memo_size=args.memo_size, trace=args.trace_actions, profiler=profiler,
+                               asynchronous=args.asynchronous)
+    limits = Limits(args.max_steps, args.timeout) if args.max_steps is not None or args.timeout is not None else None
+    runtime = Runtime(robot=robot, storage=global_storage, limits=limits)
+
+    def call_main():
+        if limits is not None:
+            limits.start()
+        if args.asynchronous:
+            return asyncio.run(call_async(main_func, []))
+        return methods._function_call(main_func, parameters=[])
+
+    result, stopped = None, None
+    sampler = Sampler() if args.sample is not None else None
+    if sampler is not None:
+        sampler.start()
+    try:
+        result = runtime.run(call_main)
+    except Terminated as stop:
+        stopped = stop
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            sampler.write_collapsed(args.sample)
+    if stopped is not None and not isinstance(stopped, ExitReached):
+        print(stopped)
     if isinstance(result, Array):
         for el in result.value:
             print(int(el))
-    print(global_robot.position)
\ No newline at end of file
+    robot.renderer.close()
+    print(robot.position)
+    for name, info in memo_statistics().items():
+        print(f"{name}: {info['hits']} hits, {info['misses']} misses, {info['currsize']}/{info['maxsize']} cached")
+    if args.profile is not None:
+        with open(args.profile, "w") as f:
+            f.write(profiler.format_profile() + "\n")
+    if args.collapsed is not None:
+        profiler.write_collapsed(args.collapsed)
+    if stopped is not None and not isinstance(stopped, ExitReached):
+        sys.exit(1)
@@ -1,5 +1,8 @@
 from .classes import *
 from .bison import *
+from .compiler import *
 from .general import *
+from .limits import *
 from .methods import *
-from .robot import *
\ No newline at end of file
+from .robot import *
+from .runtime import *
\ No newline at end of file
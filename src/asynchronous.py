@@ -0,0 +1,44 @@
+import asyncio
+from contextvars import Context, copy_context
+from typing import List, Type
+from .classes import *
+from .limits import current_limits
+from .robot import current_robot
+from .stackless import Interpreter
+
+
+def _count_call():
+    # the first call of a run counts against its limits like in methods._function_call
+    limits = current_limits()
+    if limits is not None:
+        limits.check()
+
+
+async def call_async(func_var: Function, parameters: List[Type[Variable]], context: Context = None):
+    """
+    Calls a function of a script compiled with asynchronous as a coroutine. The interpreter runs
+    until the next robot action or loop iteration, then awaits the animation delays of the robot,
+    at least asyncio.sleep(0), so the runs of an event loop take turns. Functions that were not
+    compiled for the async mode run to completion without pausing.
+
+    :param context: context every step of the run is made in, a copy of the current one by
+        default; runs in the context of a Runtime see its storage, robot and limits
+    :return: the value returned by the function
+    """
+    context = context if context is not None else copy_context()
+    robot = context.run(current_robot)
+    previous, robot.asynchronous = robot.asynchronous, True
+    steps = Interpreter().steps(func_var, parameters)
+    try:
+        context.run(_count_call)
+        while True:
+            try:
+                context.run(next, steps)
+            except StopIteration as stop:
+                return stop.value
+            await asyncio.sleep(robot.take_delay())
+    finally:
+        # a run stopped by the exit or its limits leaves the delay of its last move behind
+        steps.close()
+        robot.take_delay()
+        robot.asynchronous = previous
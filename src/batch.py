@@ -0,0 +1,119 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import List, Dict, Tuple
+
+from .bison import FRONTENDS
+from .classes import Integer
+from .general import bison_logger
+from .limits import Limits
+from .robot import UNREACHABLE
+from .runtime import Runtime
+
+REPORT_FIELDS = ["script", "config", "status", "exit_reached", "steps", "path_length", "shortest_path", "optimal",
+                 "result", "error", "wall_time"]
+
+
+def path_length(start: Tuple[int, int], path_log: List[Tuple[int, int]]) -> int:
+    """
+    :return: number of moves on the robot's path once the loops it walked are erased
+    """
+    path = [tuple(start)]
+    index = {path[0]: 0}
+    for position in path_log:
+        position = tuple(position)
+        if position in index:
+            for erased in path[index[position] + 1:]:
+                del index[erased]
+            del path[index[position] + 1:]
+        else:
+            index[position] = len(path)
+            path.append(position)
+    return len(path) - 1
+
+
+def _setup_worker():
+    bison_logger.set_level("off")
+
+
+def run_task(script: str, config: str, compiled: bool = False, cache: bool = False, frontend: str = "bison",
+             max_steps: int = None, timeout: float = None) -> Dict:
+    """
+    Runs the main function of the script in a fresh runtime with a headless robot placed on the map.
+
+    :param max_steps: loop iterations and calls the script may make, unlimited if None
+    :param timeout: seconds the script may run, unlimited if None
+    """
+    limits = Limits(max_steps, timeout) if max_steps is not None or timeout is not None else None
+    runtime = Runtime(config=config, limits=limits)
+    start = tuple(runtime.robot.position)
+    run = runtime.run_script(os.path.relpath(script), compiled=compiled, cache=cache, frontend=frontend)
+    report = {"script": script, "config": config, "status": run.status, "exit_reached": run.exit_reached,
+              "result": run.value.value if isinstance(run.value, Integer) else None, "error": run.error,
+              "wall_time": run.wall_time}
+    report["steps"] = len(runtime.robot.path_log)
+    report["path_length"] = path_length(start, runtime.robot.path_log)
+    distance = runtime.robot.maze.distance(*start)
+    report["shortest_path"] = distance if distance != UNREACHABLE else None
+    report["optimal"] = report["exit_reached"] and report["path_length"] == report["shortest_path"]
+    return report
+
+
+def run_batch(scripts: List[str], configs: List[str], jobs: int = None, compiled: bool = False,
+              cache: bool = False, frontend: str = "bison", max_steps: int = None, timeout: float = None) -> List[Dict]:
+    """
+    Runs every script on every map config, in a pool of worker processes unless jobs is 1.
+
+    :return: one report per script and config, in the order of their product
+    """
+    tasks = list(product(scripts, configs))
+    options = (compiled, cache, frontend, max_steps, timeout)
+    if jobs == 1:
+        _setup_worker()
+        return [run_task(script, config, *options) for script, config in tasks]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_setup_worker) as executor:
+        futures = [executor.submit(run_task, script, config, *options) for script, config in tasks]
+        return [future.result() for future in futures]
+
+
+def write_report(reports: List[Dict], filename: str):
+    with open(filename, "w", newline="") as f:
+        if filename.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(reports)
+        else:
+            json.dump(reports, f, indent=2)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog="batch", description="Run solver scripts against maze configs")
+    parser.add_argument("-s", "--scripts", nargs="+", required=True, help="Scripts to run")
+    parser.add_argument("-m", "--maps", nargs="+", required=True, help="Robot map configs to run every script on")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes, defaults to the number of CPUs")
+    parser.add_argument("-c", "--compiled", action="store_true",
+                        help="Compile function bodies into closures before execution")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse the parse engine and parse trees cached by previous runs in TALAB3_CACHE_DIR, "
+                             "~/.cache/talab3 by default")
+    parser.add_argument("--frontend", choices=sorted(FRONTENDS), default="bison",
+                        help="Parse with the bison engine or the pure python parser")
+    parser.add_argument("--max-steps", type=int, default=None,
+                        help="Stop a script after this many loop iterations and calls")
+    parser.add_argument("--timeout", type=float, default=None, help="Stop a script after this many seconds")
+    parser.add_argument("-o", "--output", default="report.json", help="Report file, .json or .csv")
+    args = parser.parse_args(argv)
+
+    reports = run_batch(args.scripts, args.maps, jobs=args.jobs, compiled=args.compiled, cache=args.cache,
+                        frontend=args.frontend, max_steps=args.max_steps, timeout=args.timeout)
+    write_report(reports, args.output)
+    solved = sum(report["exit_reached"] for report in reports)
+    print(f"{solved}/{len(reports)} runs reached the exit, report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
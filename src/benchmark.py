@@ -0,0 +1,316 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from typing import Callable, Dict, List
+
+from .bison import FRONTENDS, Parser, compile_script, get_parser
+from .general import bison_logger
+from .methods import methods
+from .runtime import Runtime
+
+# name -> setup; a setup prepares everything that is not measured and returns the measured call,
+# it gets the mode the benchmark is registered for: tree, compiled or stackless execution, or a parser frontend
+BENCHMARKS: Dict[str, Callable[[str], Callable]] = {}
+# benchmarks whose time must grow linearly with their size
+LINEAR: set = set()
+
+SORT_PROGRAM = """
+integer sort(array of massiv)
+start
+    integer n := ?massiv;
+    integer gap := n / 2;
+    mutable integer temp;
+    mutable integer i;
+    mutable integer j;
+    while (gap > 0)
+    start
+        i := gap;
+        while (i < n)
+        start
+            temp := massiv[i];
+            j := i;
+            while (((j > gap) + (j = gap)))
+            start
+                checkzero((massiv[j - gap] > temp) - 1)
+                start
+                    massiv[j] := massiv[j - gap];
+                    j := j - gap;
+                finish;
+                instead break;
+            finish;
+            massiv[j] := temp;
+            i := i + 1;
+        finish;
+        gap := gap / 2;
+    finish;
+    return 0;
+finish;
+
+array of main()
+start
+    array of integer massiv[{size}];
+    integer i := 0;
+    integer seed := 12345;
+    while (i < {size}) start
+        seed := (seed * 1103 + 12345) % 65536;
+        massiv[i] := seed;
+        i := i + 1;
+    finish;
+    call sort with massiv;
+    return massiv;
+finish;
+"""
+
+FIBONACCI_PROGRAM = """
+integer fib(integer n)
+start
+    integer result := n;
+    checkzero(n < 2)
+        result := (call fib with n - 1) + (call fib with n - 2);
+    return result;
+finish;
+
+integer main()
+start
+    return call fib with {size};
+finish;
+"""
+
+APPEND_PROGRAM = """
+integer main()
+start
+    array of integer values[1];
+    integer i := 0;
+    while (i < {size}) start
+        values.append(i);
+        i := i + 1;
+    finish;
+    return ?values;
+finish;
+"""
+
+DECLARE_PROGRAM = """
+integer main()
+start
+    array of integer values[{size}];
+    values[{size} - 1] := 1;
+    return ?values;
+finish;
+"""
+
+MOVES_PROGRAM = """
+integer main()
+start
+    integer i := 0;
+    integer moved := 0;
+    while (i < {size}) start
+        moved := right;
+        moved := left;
+        i := i + 1;
+    finish;
+    return i;
+finish;
+"""
+
+CORRIDOR_MAP = "1 1\n1 1 1 1\n1 0 0 1\n1 1 1 1\n"
+
+
+def benchmark(name: str, *sizes, modes=("tree", "compiled"), linear: bool = False):
+    if linear:
+        LINEAR.add(name)
+
+    def register(setup):
+        for size in sizes:
+            for mode in modes:
+                key = f"{name}[{size}]" if mode is None else f"{name}[{size}]/{mode}"
+                BENCHMARKS[key] = partial(setup, size=size, mode=mode)
+        return setup
+    return register
+
+
+def _write(directory: str, name: str, content: str) -> str:
+    filename = os.path.relpath(os.path.join(directory, name))
+    with open(filename, "w") as f:
+        f.write(content)
+    return filename
+
+
+def _program_call(directory: str, program: str, size: int, mode: str, config: str = None) -> Callable:
+    runtime = Runtime(config=config)
+    main_func = runtime.run(compile_script, _write(directory, "benchmark.help", program.format(size=size)),
+                            compiled=mode == "compiled", stackless=mode == "stackless")
+    return partial(runtime.run, methods._function_call, main_func, [])
+
+
+@benchmark("engine_build", "grammar", modes=(None,))
+def _engine_build(directory: str, size, mode) -> Callable:
+    build_directory = tempfile.mkdtemp(dir=directory) + os.sep
+    return partial(Parser, buildDirectory=build_directory)
+
+
+@benchmark("parse_string", 10, 100, 1000, modes=tuple(FRONTENDS))
+def _parse_string(directory: str, size: int, mode: str) -> Callable:
+    # identifiers can not contain digits, so the copies are told apart by letters
+    names = ["fib" + "".join(chr(ord("a") + int(digit)) for digit in str(i)) for i in range(size)]
+    source = "".join(FIBONACCI_PROGRAM.split("integer main()")[0].replace("fib", name) for name in names)
+    parser = get_parser(frontend=mode)
+    return partial(parser.parse_string, source)
+
+
+@benchmark("parse_body", 10000, 100000, 1000000, modes=tuple(FRONTENDS), linear=True)
+def _parse_body(directory: str, size: int, mode: str) -> Callable:
+    # a single straight-line body, the shape of generated solver scripts
+    source = ("integer main()\nstart\n    mutable integer value;\n" + "    value := 1;\n" * size
+              + "    return value;\nfinish;\n")
+    parser = get_parser(frontend=mode)
+    return partial(parser.parse_string, source)
+
+
+@benchmark("compile_script", 100)
+def _compile_script(directory: str, size: int, mode: str) -> Callable:
+    filename = _write(directory, "benchmark.help", SORT_PROGRAM.format(size=size))
+    return partial(Runtime().run, compile_script, filename, compiled=mode == "compiled")
+
+
+@benchmark("shell_sort", 100, 300, 1000)
+def _shell_sort(directory: str, size: int, mode: str) -> Callable:
+    return _program_call(directory, SORT_PROGRAM, size, mode)
+
+
+@benchmark("fibonacci", 10, 15, modes=("tree", "compiled", "stackless"))
+def _fibonacci(directory: str, size: int, mode: str) -> Callable:
+    return _program_call(directory, FIBONACCI_PROGRAM, size, mode)
+
+
+@benchmark("array_append", 1000, 10000)
+def _array_append(directory: str, size: int, mode: str) -> Callable:
+    return _program_call(directory, APPEND_PROGRAM, size, mode)
+
+
+@benchmark("array_declare", 1000000)
+def _array_declare(directory: str, size: int, mode: str) -> Callable:
+    return _program_call(directory, DECLARE_PROGRAM, size, mode)
+
+
+@benchmark("robot_moves", 1000, 10000)
+def _robot_moves(directory: str, size: int, mode: str) -> Callable:
+    config = _write(directory, "corridor.config", CORRIDOR_MAP)
+    return _program_call(directory, MOVES_PROGRAM, size, mode, config=config)
+
+
+def measure(setup: Callable[[str], Callable], repeat: int = 5) -> Dict:
+    """
+    Times the call returned by the setup, every repetition gets a fresh setup. One more run is
+    traced with tracemalloc for its peak memory and the number of memory blocks it left allocated.
+    """
+    directory = tempfile.mkdtemp(dir=".")
+    try:
+        times = []
+        for _ in range(repeat):
+            call = setup(directory)
+            started = time.perf_counter()
+            call()
+            times.append(time.perf_counter() - started)
+        call = setup(directory)
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        try:
+            call()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        blocks = sys.getallocatedblocks() - blocks
+    finally:
+        shutil.rmtree(directory)
+    return {"time": min(times), "median": statistics.median(times), "peak_kib": peak / 1024, "blocks": blocks}
+
+
+def run_benchmarks(pattern: str = None, repeat: int = 5) -> Dict[str, Dict]:
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern is None or re.search(pattern, name):
+            results[name] = measure(setup, repeat)
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float = 1.2) -> List[str]:
+    """
+    Adds the ratio to the baseline time to every result that has a baseline.
+
+    :return: names of the benchmarks that got slower than threshold times their baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        if name in baseline and baseline[name]["time"] > 0:
+            result["ratio"] = result["time"] / baseline[name]["time"]
+            if result["ratio"] > threshold:
+                regressions.append(name)
+    return regressions
+
+
+def nonlinear(results: Dict[str, Dict], tolerance: float = 2.0) -> List[str]:
+    """
+    Compares the time per unit of size of every linear benchmark with its smallest size in the
+    same mode.
+
+    :return: names of the sizes that took more than tolerance times as long per unit
+    """
+    runs = {}
+    for name, result in results.items():
+        match = re.fullmatch(r"(\w+)\[(\d+)\](/\w+)?", name)
+        if match is not None and match.group(1) in LINEAR:
+            size = int(match.group(2))
+            runs.setdefault((match.group(1), match.group(3)), []).append((size, result["time"] / size, name))
+    slower = []
+    for group in runs.values():
+        group.sort()
+        slower += [name for _, unit_time, name in group[1:] if unit_time > tolerance * group[0][1]]
+    return slower
+
+
+def format_results(results: Dict[str, Dict], regressions: List[str] = ()) -> str:
+    lines = [f"{'benchmark':<36}{'min ms':>12}{'median ms':>12}{'peak KiB':>12}{'blocks':>10}{'ratio':>8}"]
+    for name, result in results.items():
+        ratio = f"{result['ratio']:.2f}" if "ratio" in result else "-"
+        line = (f"{name:<36}{result['time'] * 1000:>12.2f}{result['median'] * 1000:>12.2f}"
+                f"{result['peak_kib']:>12.1f}{result['blocks']:>10}{ratio:>8}")
+        lines.append(line + ("  REGRESSION" if name in regressions else ""))
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="benchmark", description="Benchmark the interpreter hot paths")
+    parser.add_argument("-k", "--filter", default=None, help="Run only benchmarks whose name matches the regex")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("-b", "--baseline", default=None, help="Baseline JSON to compare the results with")
+    parser.add_argument("-t", "--threshold", type=float, default=1.2,
+                        help="Slowdown relative to the baseline reported as a regression")
+    parser.add_argument("-o", "--output", default=None, help="Store the results as a baseline JSON")
+    parser.add_argument("-l", "--linearity", type=float, default=2.0,
+                        help="Growth of the time per unit of size of linear benchmarks reported as a regression")
+    args = parser.parse_args(argv)
+    bison_logger.set_level("off")
+
+    results = run_benchmarks(args.filter, args.repeat)
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    regressions += [name for name in nonlinear(results, args.linearity) if name not in regressions]
+    print(format_results(results, regressions))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
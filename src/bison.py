@@ -1,27 +1,40 @@
 import builtins
-import logging
+import operator
+import threading
 from .classes.storage import *
 from .classes.function import Function
 from .methods import methods
+from .cache import engine_directory, load_program, store_program
+from .grammar import PythonFrontend
 
-from bison import BisonParser
-from six.moves import input
-
-logging.basicConfig(level=logging.INFO, filename="logger.log",
-                    format=f"%(asctime)s %(levelname)s %(message)s")
+try:
+    from bison import BisonParser
+except ImportError:
+    # without PyBison only the python frontend is available
+    class BisonParser:
+        def __init__(self, *args, **kwargs):
+            raise RuntimeError("PyBison is not installed, use the python frontend")
 
 from .general import *
 
 class CommitedOperation:
     func = None
     args = None
-    non_wrap_funcs = [methods._while, methods._if]
+    # position of the first token of the operation in the script, set by the python frontend only
+    line = None
+    column = None
+    non_wrap_funcs = [methods._while, methods._if, methods._block]
 
     def __init__(self, func, *args, **kwargs):
         self.func = func
         self.kwargs = kwargs
         self.args = args
 
+    def located(self, node: 'CommitedOperation') -> 'CommitedOperation':
+        # takes the position of the operation it was rebuilt from
+        self.line, self.column = node.line, node.column
+        return self
+
     def __call__(self):
         if self.func in self.non_wrap_funcs:
             return self.func(*self.args, **self.kwargs)
@@ -56,7 +69,7 @@ class Parser(BisonParser):
     # lexer tokens - these must match those in your lex script (below)
     # ----------------------------------------------------------------
     tokens = [
-        'TOP', 'BOTTOM', 'LEFT', 'RIGHT', 'TIMESHIFT', 'BIND',
+        'TOP', 'BOTTOM', 'LEFT', 'RIGHT', 'TIMESHIFT', 'BIND', 'DISTANCE', 'REGION',
         'START', 'FINISH', 'WHILE', 'INSTEAD', 'BREAK', 'CHECKZERO', 'CALL', 'WITH', 'COMMA', 'RETURN',
         'NUMBER', 'STR',
         'INTEGER', 'STRING', 'POINTER', 'ARRAY', 'MUTABLE',
@@ -89,6 +102,18 @@ class Parser(BisonParser):
             if isinstance(v, Exception):
                 raise v
 
+    # grammar actions are written to the interpreter trace log only by parsers created with
+    # trace, see get_parser; the default parse does no logging work
+    trace = False
+
+    def trace_action(self, target, option, names, values):
+        bison_logger.info("%s, %s, %s, %s", target, option, names, values)
+
+    def _handle(self, targetname, option, names, values):
+        if self.trace:
+            self.trace_action(targetname, option, names, values)
+        return super()._handle(targetname, option, names, values)
+
     start = "global_thread"
 
     def on_global_thread(self, target, option, names, values):
@@ -97,10 +122,11 @@ class Parser(BisonParser):
                       | global_thread function_init
         """
         self.check_exceptions(values)
-        logging.info(f"{target}, {option}, {names}, {values}")
         if option != 0:
+            # the list of the left recursion belongs to this production alone, it is extended in place
             if values[0] is not False:
-                return values[0] + [values[1]]
+                values[0].append(values[1])
+                return values[0]
             return [values[1]]
         else:
             return False
@@ -111,10 +137,9 @@ class Parser(BisonParser):
                       | POINTER IDENTIFIER LPAREN func_params RPAREN group
                       | ARRAY IDENTIFIER LPAREN func_params RPAREN group
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         kwargs = {
             "name": values[1],
-            "type": FunctionType,
+            "type": "function",
             "value": values[5],
             "value_type": values[0],
             "parameters": values[3]
@@ -127,12 +152,12 @@ class Parser(BisonParser):
                     | var_type IDENTIFIER
                     | func_params COMMA var_type IDENTIFIER
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         transform_dict = {"string": String, "integer": Integer, "pointer": Pointer, "array of": Array}
         if option == 0:
             return []
         elif option == 2:
-            return values[0] + [(values[3], transform_dict[values[2]])]
+            values[0].append((values[3], transform_dict[values[2]]))
+            return values[0]
         elif option == 1:
             return [(values[1], transform_dict[values[0]])]
 
@@ -140,7 +165,6 @@ class Parser(BisonParser):
         """
         group : START set FINISH SEM
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         return values[1]
 
     def on_set(self, target, option, names, values):
@@ -148,11 +172,11 @@ class Parser(BisonParser):
         set :
             | set operation
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         self.check_exceptions(values)
         if option == 1:
             if values[0] is not False:
-                return values[0] + [values[1]]
+                values[0].append(values[1])
+                return values[0]
             return [values[1]]
         else:
             return False
@@ -165,7 +189,6 @@ class Parser(BisonParser):
                   | function_init
         """
         self.check_exceptions(values)
-        logging.info(f"{target}, {option}, {names}, {values}")
         return values[0]
 
     # def on_main(self, target, option, names, values):
@@ -187,7 +210,6 @@ class Parser(BisonParser):
                   | CHECKZERO paren group instead
                   | CHECKZERO paren operation instead
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         self.check_exceptions(values)
         if option == 0:
             return CommitedOperation(methods._if, values[1], values[2])
@@ -206,7 +228,6 @@ class Parser(BisonParser):
               | WHILE paren group instead
               | WHILE paren operation instead
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         self.check_exceptions(values)
         if option == 0:
             return CommitedOperation(methods._while, values[1], values[2])
@@ -223,7 +244,6 @@ class Parser(BisonParser):
         instead : INSTEAD group
                 | INSTEAD operation
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         if option == 0:
             return values[1]
         else:
@@ -247,7 +267,6 @@ class Parser(BisonParser):
                 | RIGHT SEM
                 | function_call SEM
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         if option == 6:
             return CommitedOperation(Break)
         elif option == 7:
@@ -270,7 +289,6 @@ class Parser(BisonParser):
         """
         return : RETURN exp
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         return CommitedOperation(Result, values[1])
 
     def on_var_init(self, target, option, names, values):
@@ -279,7 +297,6 @@ class Parser(BisonParser):
                  | pointer_init
                  | array_init
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         self.check_exceptions(values)
         return values[0]
 
@@ -290,7 +307,6 @@ class Parser(BisonParser):
                      | MUTABLE str_or_int IDENTIFIER EQUALS exp
         """
         self.check_exceptions(values)
-        logging.info(f"{target}, {option}, {names}, {values}")
 
         if option == 0:
             return CommitedOperation(init_variable, type=values[1], name=values[2])
@@ -304,7 +320,6 @@ class Parser(BisonParser):
         str_or_int : INTEGER
                    | STRING
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         return values[0]
 
     def on_pointer_init(self, target, option, names, values):
@@ -388,7 +403,6 @@ class Parser(BisonParser):
                    | MUTABLE ARRAY type_exp IDENTIFIER LBRACKET exp RBRACKET
                    | ARRAY type_exp IDENTIFIER LBRACKET exp RBRACKET
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         if option == 0:
             return CommitedOperation(init_variable, type=values[0], name=values[2], is_static=False, value_type=values[1])
         elif option == 1:
@@ -405,8 +419,7 @@ class Parser(BisonParser):
                    | IDENTIFIER EQUALS deref_assign
         """
         self.check_exceptions(values)
-        logging.info(f"{target}, {option}, {names}, {values}")
-        cur = CommitedOperation(lambda name: global_storage[name], values[0])
+        cur = CommitedOperation(methods._lookup, values[0])
         return CommitedOperation(methods._setattr, cur, "value", values[2])
 
     def on_array_assign(self, target, option, names, values):
@@ -417,7 +430,6 @@ class Parser(BisonParser):
                      | array_el EQUALS deref_assign
         """
         self.check_exceptions(values)
-        logging.info(f"{target}, {option}, {names}, {values}")
         return CommitedOperation(methods._setattr, values[0], "value", values[2])
 
     def on_deref_assign(self, target, option, names, values):
@@ -428,8 +440,7 @@ class Parser(BisonParser):
                      | TIMES IDENTIFIER EQUALS deref_assign
         """
         self.check_exceptions(values)
-        logging.info(f"{target}, {option}, {names}, {values}")
-        ref = CommitedOperation(lambda name: global_storage[name], values[1])
+        ref = CommitedOperation(methods._lookup, values[1])
         deref = CommitedOperation(methods._dereference, ref, True)
         return CommitedOperation(methods._setattr, deref, "value", values[3])
 
@@ -447,7 +458,6 @@ class Parser(BisonParser):
         type_exp : INTEGER | STRING | POINTER | ARRAY | exp
         """
         name_list = ["integer", "string", "pointer", "array of"]
-        logging.info(f"{target}, {option}, {names}, {values}")
         current = values[0]
         if callable(current):
             current = current()
@@ -460,8 +470,7 @@ class Parser(BisonParser):
         var_append : IDENTIFIER APPEND paren
         """
         self.check_exceptions(values)
-        logging.info(f"{target}, {option}, {names}, {values}")
-        current = CommitedOperation(lambda name: global_storage[name], values[0])
+        current = CommitedOperation(methods._lookup, values[0])
         return CommitedOperation(methods._append, current, values[2])
 
     def on_exp(self, target, option, names, values):
@@ -487,20 +496,41 @@ class Parser(BisonParser):
             | BOTTOM
             | LEFT
             | RIGHT
+            | query
         """
-        logging.info(f"{target}, {option}, {names}, {values}")
         if option == 17:
-            return CommitedOperation(lambda: methods._top)
+            return CommitedOperation(methods._action, "top")
         elif option == 18:
-            return CommitedOperation(lambda: methods._bottom)
+            return CommitedOperation(methods._action, "bottom")
         elif option == 19:
-            return CommitedOperation(lambda: methods._left)
+            return CommitedOperation(methods._action, "left")
         elif option == 20:
-            return CommitedOperation(lambda: methods._right)
+            return CommitedOperation(methods._action, "right")
         else:
             self.check_exceptions(values)
             return values[0]
 
+    def on_query(self, target, option, names, values):
+        """
+        query : DISTANCE
+              | DISTANCE direction
+              | REGION
+              | REGION direction
+        """
+        query = methods._distance if option < 2 else methods._region
+        if option % 2 == 1:
+            return CommitedOperation(query, values[1])
+        return CommitedOperation(query)
+
+    def on_direction(self, target, option, names, values):
+        """
+        direction : TOP
+                  | BOTTOM
+                  | LEFT
+                  | RIGHT
+        """
+        return ["top", "bottom", "left", "right"][option]
+
     def on_number(self, target, option, names, values):
         """
         number : NUMBER
@@ -517,43 +547,43 @@ class Parser(BisonParser):
         """
         plus : exp PLUS exp
         """
-        return CommitedOperation(lambda a, b: a + b, values[0], values[2])
+        return CommitedOperation(operator.add, values[0], values[2])
 
     def on_minus(self, target, option, names, values):
         """
         minus : exp MINUS exp
         """
-        return CommitedOperation(lambda a, b: a - b, values[0], values[2])
+        return CommitedOperation(operator.sub, values[0], values[2])
 
     def on_times(self, target, option, names, values):
         """
         times : exp TIMES exp
         """
-        return CommitedOperation(lambda a, b: a * b, values[0], values[2])
+        return CommitedOperation(operator.mul, values[0], values[2])
 
     def on_div(self, target, option, names, values):
         """
         div : exp DIVIDE exp
         """
-        return CommitedOperation(lambda a, b: a / b, values[0], values[2])
+        return CommitedOperation(operator.truediv, values[0], values[2])
 
     def on_mod(self, target, option, names, values):
         """
         mod : exp MOD exp
         """
-        return CommitedOperation(lambda a, b: a % b, values[0], values[2])
+        return CommitedOperation(operator.mod, values[0], values[2])
 
     def on_var(self, target, option, names, values):
         """
         var : IDENTIFIER
         """
-        return CommitedOperation(lambda name: global_storage[name], values[0])
+        return CommitedOperation(methods._lookup, values[0])
 
     def on_array_el(self, target, option, names, values):
         """
         array_el : IDENTIFIER LBRACKET exp RBRACKET
         """
-        get_el = CommitedOperation(lambda name: global_storage[name], values[0])
+        get_el = CommitedOperation(methods._lookup, values[0])
         return CommitedOperation(methods._getitem, get_el, values[2])
 
     def on_ref(self, target, option, names, values):
@@ -586,19 +616,19 @@ class Parser(BisonParser):
         """
         op_equal : exp OP_EQUAL exp
         """
-        return CommitedOperation(lambda a, b: a == b, values[0], values[2])
+        return CommitedOperation(operator.eq, values[0], values[2])
 
     def on_op_greater(self, target, option, names, values):
         """
         op_greater : exp OP_GREATER exp
         """
-        return CommitedOperation(lambda a, b: a > b, values[0], values[2])
+        return CommitedOperation(operator.gt, values[0], values[2])
 
     def on_op_less(self, target, option, names, values):
         """
         op_less : exp OP_LESS exp
         """
-        return CommitedOperation(lambda a, b: a < b, values[0], values[2])
+        return CommitedOperation(operator.lt, values[0], values[2])
 
     def on_function_call(self, target, option, names, values):
         """
@@ -622,7 +652,8 @@ class Parser(BisonParser):
         elif option == 1:
             return [values[0]]
         else:
-            return values[0] + [values[2]]
+            values[0].append(values[2])
+            return values[0]
 
     # -----------------------------------------
     # raw lex script, verbatim here
@@ -632,36 +663,133 @@ class Parser(BisonParser):
     lexscript = lex_read
 
 
-def compile_script(filename: str):
-    import argparse
-
-    parser = argparse.ArgumentParser(prog="PyBison")
-    parser.add_argument("-k", "--keepfiles", action="store_true",
-                        help="Keep temporary files used in building parse engine lib")
-    parser.add_argument("-v", "--verbose", action="store_true",
-                        help="Enable verbose messages while parser is running")
-    parser.add_argument("-d", "--debug", action="store_true",
-                        help="Enable garrulous debug messages from parser engine")
-    args = parser.parse_args()
-
-    p = Parser(keepfiles=args.keepfiles, verbose=args.verbose)
-
+class PythonParser(PythonFrontend, Parser):
+    """
+    Parser with the same grammar and handlers that does not need the bison engine.
+    """
+    located = (CommitedOperation,)
+
+
+FRONTENDS = {"bison": Parser, "python": PythonParser}
+_parsers = {}
+# the parse engine keeps its state in the parser instance, so runtimes in other threads wait
+_parse_lock = threading.Lock()
+
+
+def get_parser(keepfiles: bool = False, verbose: bool = False, cache: bool = False,
+               frontend: str = "bison", trace: bool = False) -> Parser:
+    """
+    Returns a parser instance, reused between calls. With cache enabled the engine library is
+    built in a directory keyed by the grammar hash, so it survives between processes.
+
+    :param frontend: "bison" for the generated C engine, "python" for the pure python one
+    :param trace: write every grammar action with its values to the interpreter trace log, at the
+        info level of bison_logger
+    """
+    if frontend not in FRONTENDS:
+        raise ValueError(f"Unknown frontend {frontend}, expected one of {sorted(FRONTENDS)}")
+    build_directory = engine_directory(Parser) if cache and frontend == "bison" else None
+    key = (frontend, keepfiles, verbose, build_directory, trace)
+    if key not in _parsers:
+        _parsers[key] = FRONTENDS[frontend](buildDirectory=build_directory, keepfiles=keepfiles, verbose=verbose)
+        _parsers[key].trace = trace
+    return _parsers[key]
+
+
+def compile_script(filename: str, keepfiles: bool = False, verbose: bool = False, compiled: bool = False,
+                   cache: bool = False, frontend: str = "bison", stream: bool = False, optimize: bool = False,
+                   stackless: bool = False, memoize: bool = False, memo_overrides: Dict[str, bool] = None,
+                   memo_size: int = 128, trace: bool = False, profiler=None, asynchronous: bool = False):
+    """
+    Parses the script and instantiates its top-level functions.
+
+    :param filename: path to the script relative to the working directory
+    :param keepfiles: keep temporary files used in building parse engine lib
+    :param verbose: enable verbose messages while parser is running
+    :param compiled: compile function bodies into closures before execution
+    :param cache: reuse the parse engine and parse trees stored on disk by previous runs of the
+        same frontend, in a cache directory only the current user can write to
+    :param frontend: parser implementation, "bison" or "python"
+    :param stream: read the script line by line and instantiate every function as soon as it is
+        parsed instead of parsing the whole file first, needs the python frontend and skips the cache
+    :param optimize: fold constant expressions and checkzero conditions before execution
+    :param stackless: compile function bodies to run on an explicit call stack with tail calls, so
+        the recursion depth of the script is not limited by the Python stack
+    :param memoize: remember the results of the functions found pure by memo.pure_functions
+    :param memo_overrides: function name -> whether to memoize it regardless of the analysis,
+        memoization of the named functions only when memoize is off; only functions taking and
+        returning integers and strings can be enabled; a streamed script is parsed
+        completely before any of its functions is declared
+    :param memo_size: number of results remembered per function
+    :param trace: write the grammar actions to the interpreter trace log, the script is parsed
+        even if its parse tree is cached
+    :param profiler: profiler.Profiler measuring every statement and call of the script, which
+        then runs in the tree walking mode; the script is parsed even if its parse tree is cached,
+        and its statements have lines with the python frontend only
+    :param asynchronous: compile function bodies stackless, pausing after every robot action and
+        loop iteration, for asynchronous.call_async
+    :return: the main function of the script
+    """
+    if stream:
+        if frontend != "python":
+            raise ValueError("Streaming needs the python frontend")
+        return _instantiate(_stream_script(filename, verbose, trace), compiled, optimize, stackless,
+                            memoize, memo_overrides, memo_size, profiler, asynchronous)
     with open(f'./{filename}', 'r') as content_file:
         content = content_file.read()
-    compiled_program = p.parse_string(content, debug=True)
-    if isinstance(compiled_program, Exception):
-        raise compiled_program
-    if compiled_program is False:
-        raise RuntimeError("Error in parsing")
-    func_list = []
-    for statement in compiled_program:
-        func_list.append(statement())
-
+    parser_cls = FRONTENDS.get(frontend)
+    compiled_program = None
+    if cache and parser_cls is not None and not trace and profiler is None:
+        compiled_program = load_program(content, parser_cls)
+    if compiled_program is None:
+        with _parse_lock:
+            p = get_parser(keepfiles=keepfiles, verbose=verbose, cache=cache, frontend=frontend, trace=trace)
+            compiled_program = p.parse_string(content, debug=True)
+        if isinstance(compiled_program, Exception):
+            raise compiled_program
+        if compiled_program is False:
+            raise RuntimeError("Error in parsing")
+        if cache:
+            store_program(content, parser_cls, compiled_program)
+    return _instantiate(compiled_program, compiled, optimize, stackless, memoize, memo_overrides, memo_size,
+                        profiler, asynchronous)
+
+
+def _stream_script(filename: str, verbose: bool, trace: bool = False):
+    parser = get_parser(verbose=verbose, frontend="python", trace=trace)
+    with open(f'./{filename}', 'r') as content_file:
+        yield from parser.parse_lines(content_file)
+
+
+def _instantiate(program, compiled: bool, optimize: bool, stackless: bool, memoize: bool = False,
+                 memo_overrides: Dict[str, bool] = None, memo_size: int = 128, profiler=None,
+                 asynchronous: bool = False):
+    # declares the top-level functions in order and returns the first one named main
+    if profiler is not None and (compiled or stackless or asynchronous):
+        raise ValueError("Profiling needs the tree walking mode")
+    if optimize:
+        from .optimizer import optimize_program
+        program = optimize_program(program)
+    memoized = set()
+    if memoize or memo_overrides:
+        from .memo import memoize as memoize_function, select_memoized
+        program = list(program)
+        memoized = select_memoized(program, memoize, memo_overrides)
+    if profiler is not None:
+        program = profiler.instrument(program)
+    if stackless or asynchronous:
+        from .stackless import compile_program
+        program = compile_program(program, pausing=asynchronous)
+    elif compiled:
+        from .compiler import compile_program
+        program = compile_program(program)
     main_func = None
-    for func in func_list:
-        if func.name == "main":
+    for statement in program:
+        func = statement()
+        if func.name in memoized:
+            memoize_function(func, memo_size)
+        if main_func is None and func.name == "main":
             main_func = func
-            break
     if main_func is None:
         raise RuntimeError("No main function found")
     return main_func
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from functools import lru_cache
+from typing import List, Union
+
+CACHE_VERSION = 3
+
+
+def cache_directory() -> str:
+    return os.environ.get("TALAB3_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "talab3"))
+
+
+def _private(path: str) -> bool:
+    """
+    Whether a cache directory or file can be trusted: owned by the current user and not writable
+    by anyone else. Loading an engine library or unpickling a parse tree executes code, so
+    entries that other users could have written are never read.
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    try:
+        status = os.stat(path)
+    except OSError:
+        return False
+    return status.st_uid == os.getuid() and not status.st_mode & 0o022
+
+
+def _trusted(path: str) -> bool:
+    """
+    :return: whether the path and every directory above it up to the cache directory are private
+    """
+    root = os.path.abspath(cache_directory())
+    path = os.path.abspath(path)
+    while _private(path):
+        if path == root or os.path.dirname(path) == path:
+            return True
+        path = os.path.dirname(path)
+    return False
+
+
+def _private_directory(path: str) -> bool:
+    """
+    Creates the directory, readable by the current user only, unless it exists.
+
+    :return: whether it can be trusted
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+    except OSError:
+        return False
+    return _trusted(path)
+
+
+@lru_cache(maxsize=None)
+def grammar_hash(parser_cls) -> str:
+    """
+    Hash of everything the parse engine is generated from: rule docstrings, tokens,
+    precedences, bison options and the lex script.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(parser_cls.lexscript.encode("utf-8"))
+    hasher.update(",".join(parser_cls.tokens).encode("utf-8"))
+    for direction, tokens in parser_cls.precedences:
+        hasher.update((direction + "".join(tokens)).encode("utf-8"))
+    hasher.update("\n".join(parser_cls.options).encode("utf-8"))
+    for name in sorted(dir(parser_cls)):
+        if name.startswith("on_"):
+            hasher.update((getattr(parser_cls, name).__doc__ or "").encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def _package_sources(module_name: str) -> List[str]:
+    # every module of the package a pickled tree can reference: the actions, the classes and
+    # methods the operations call, and the frontends recording positions
+    package = os.path.dirname(sys.modules[module_name.split(".")[0]].__file__)
+    sources = []
+    for directory, subdirectories, files in os.walk(package):
+        subdirectories[:] = sorted(name for name in subdirectories if name != "__pycache__")
+        sources.extend(os.path.relpath(os.path.join(directory, name), package) for name in sorted(files)
+                       if name.endswith(".py") and not name.startswith("test_"))
+    return sources
+
+
+@lru_cache(maxsize=None)
+def frontend_hash(parser_cls) -> str:
+    """
+    Hash of the frontend class, its grammar and the sources of the package, which together
+    determine the parse tree produced for a source and the code its pickle refers to.
+    """
+    hasher = hashlib.sha256(grammar_hash(parser_cls).encode("utf-8"))
+    hasher.update(f"{parser_cls.__module__}.{parser_cls.__qualname__}".encode("utf-8"))
+    package = os.path.dirname(sys.modules[parser_cls.__module__.split(".")[0]].__file__)
+    for source in _package_sources(parser_cls.__module__):
+        hasher.update(source.encode("utf-8"))
+        with open(os.path.join(package, source), "rb") as f:
+            hasher.update(hashlib.sha256(f.read()).digest())
+    hasher.update(f"{CACHE_VERSION} {sys.version_info[:2]}".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def engine_directory(parser_cls) -> Union[str, None]:
+    """
+    :return: directory the engine library of the grammar is built in, None if the cache
+        directory can not be trusted
+    """
+    path = os.path.join(cache_directory(), "engine", grammar_hash(parser_cls))
+    if not _private_directory(path):
+        return None
+    return path + os.sep
+
+
+def _program_path(source: str, parser_cls) -> str:
+    key = hashlib.sha256(frontend_hash(parser_cls).encode("utf-8"))
+    key.update(source.encode("utf-8"))
+    return os.path.join(cache_directory(), "programs", key.hexdigest() + ".pickle")
+
+
+def load_program(source: str, parser_cls) -> Union[List, None]:
+    """
+    :param parser_cls: frontend class the source is parsed with, the trees of other frontends
+        are not used
+    :return: the cached parse tree of the source or None on a cache miss
+    """
+    path = _program_path(source, parser_cls)
+    if not _trusted(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+
+def store_program(source: str, parser_cls, program: List) -> bool:
+    path = _program_path(source, parser_cls)
+    try:
+        data = pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+        return False
+    if not _private_directory(os.path.dirname(path)):
+        return False
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return True
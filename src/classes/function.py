@@ -10,6 +10,9 @@ class Function(Variable):
     parameters: List[Tuple[str, Type[Variable]]] = None
     var_type = FunctionType
     view: List[str] = None
+    # set by the compiler: slot-resolved body and the frame the function was declared in
+    code: Callable = None
+    closure = None
 
     def __init__(self, name = None, value = None, return_type: Type[Variable] = None, parameters: List[Tuple[str, Type[Variable]]] = None, view: List[str] = None):
         if view is None:
@@ -33,7 +36,8 @@ class Function(Variable):
             for func in value:
                 if not callable(func):
                     raise ValueError(f"Value must be a list of callables, not '{type(func)}'.")
-        bison_log(f"set: {self.name} {key} = {value}")
+        if bison_logger.debug_enabled:
+            bison_logger.debug("set: %s %s = %s", self.name, key, value)
         super().__setattr__(key, value, skip_check=True)
         return self
 
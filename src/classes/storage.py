@@ -3,6 +3,7 @@ from ..general import *
 from .variable import Variable, Integer, String, Pointer, Array, Break, Result
 from .function import Function
 from types import FunctionType
+from contextvars import ContextVar
 
 
 class Storage:
@@ -70,6 +71,14 @@ class Storage:
 
 
 global_storage: Storage = Storage()
+_current_storage: ContextVar = ContextVar("storage", default=global_storage)
+
+
+def current_storage() -> Storage:
+    """
+    :return: storage of the runtime active in the current context, global_storage if there is none
+    """
+    return _current_storage.get()
 
 
 def _init_pointer(**kwargs) -> Pointer:
@@ -85,22 +94,22 @@ def _init_array(**kwargs) -> Array:
     value_type: Type[Variable] = kwargs.get("value_type", None)
     if value_type is None:
         raise ValueError("Array value type not specified.")
-    return Array(name=kwargs.get("name", None), is_static=is_static, size=size, value_type=value_type)
+    return Array(name=kwargs.get("name", None), is_static=is_static, size=size, value_type=value_type,
+                 capacity=kwargs.get("capacity", None))
 
 
 def _init_function(**kwargs) -> Function:
-    return Function(name=kwargs.get("name", None), value=kwargs.get("value", None), return_type=kwargs.get("value_type", None), parameters=kwargs.get("parameters", None), view=global_storage.current_view_set.copy())
+    return Function(name=kwargs.get("name", None), value=kwargs.get("value", None), return_type=kwargs.get("value_type", None), parameters=kwargs.get("parameters", None), view=current_storage().current_view_set.copy())
 
 
 # builder/factory pattern
-def init_variable(**kwargs):
+def create_variable(**kwargs):
     """
-    Initializes a variable with the specified type and value.
+    Creates a variable with the specified type and value without registering it in storage.
 
     :param kwargs: type, name and value (optional)
     :return:
     """
-    global global_storage
     name_dict = {
         "integer": Integer,
         "string": String,
@@ -146,6 +155,18 @@ def init_variable(**kwargs):
     else:
         value = kwargs.get("value", None)
         resulted_var: Type[Variable] = var_type(var_name, value)
-    global_storage.add_variable(resulted_var)
-    bison_log(f"initialized: {kwargs}")
+    if bison_logger.info_enabled:
+        bison_logger.info("initialized: %s", kwargs)
+    return resulted_var
+
+
+def init_variable(**kwargs):
+    """
+    Initializes a variable with the specified type and value.
+
+    :param kwargs: type, name and value (optional)
+    :return:
+    """
+    resulted_var = create_variable(**kwargs)
+    current_storage().add_variable(resulted_var)
     return resulted_var
\ No newline at end of file
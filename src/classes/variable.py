@@ -1,6 +1,12 @@
 from typing import Dict, Type, Union, List
 from ..general import *
 from copy import copy
+from array import array
+from itertools import count
+from weakref import WeakValueDictionary
+
+_allocate = object.__new__
+_set = object.__setattr__
 
 class Break:
     def __call__(self, *args, **kwargs):
@@ -15,18 +21,23 @@ class Result:
         return self
 
 class Variable:
-    _memory_index: int = 0
-    memory_id: int = None
-    value = None
-    name: str = None
+    __slots__ = ("value", "name", "is_const", "_memory_id", "__weakref__")
+    # shared by all runtimes, next() on it is atomic so ids stay unique across threads
+    _memory_ids = count()
     var_type = None
     size_iden: int = 1
-    is_const: bool = False
 
     def __init__(self, name: str = None):
+        _set(self, "is_const", False)
+        _set(self, "_memory_id", None)
         self.name = name
-        self.memory_id = Variable._memory_index
-        Variable._memory_index += 1
+
+    @property
+    def memory_id(self) -> int:
+        # ids are handed out on first use, most temporaries never need one
+        if self._memory_id is None:
+            _set(self, "_memory_id", next(Variable._memory_ids))
+        return self._memory_id
 
     def __setattr__(self, key, value, skip_check: bool = False):
         if skip_check:
@@ -37,7 +48,8 @@ class Variable:
                 raise ValueError(f"Value must be of type '{self.var_type}', not '{type(value)}'.")
         if self.is_const and key == "value":
             raise ValueError(f"Cannot modify constant variable '{self.name}'.")
-        bison_log(f"set: {self.name} {key} = {value}")
+        if bison_logger.debug_enabled:
+            bison_logger.debug("set: %s %s = %s", self.name, key, value)
         super().__setattr__(key, value)
         return self
 
@@ -50,9 +62,9 @@ class Variable:
         if hasattr(self, "value_type") and hasattr(other, "value_type") and self.value_type != other.value_type:
             raise RuntimeError(f"Cannot compare variables of different types '{self.value_type}' and '{other.value_type}'.")
         if self.value != other.value:
-            return Integer(value=0)
+            return _FALSE
         else:
-            return Integer(value=1)
+            return _TRUE
 
     def __lt__(self, other):
         if type(self) != type(other):
@@ -60,9 +72,9 @@ class Variable:
         if hasattr(self, "value_type") and hasattr(other, "value_type") and self.value_type != other.value_type:
             raise RuntimeError(f"Cannot compare variables of different types '{self.value_type}' and '{other.value_type}'.")
         if self.value < other.value:
-            return Integer(value=1)
+            return _TRUE
         else:
-            return Integer(value=0)
+            return _FALSE
 
     def __gt__(self, other):
         if type(self) != type(other):
@@ -70,9 +82,9 @@ class Variable:
         if hasattr(self, "value_type") and hasattr(other, "value_type") and self.value_type != other.value_type:
             raise RuntimeError(f"Cannot compare variables of different types '{self.value_type}' and '{other.value_type}'.")
         if self.value > other.value:
-            return Integer(value=1)
+            return _TRUE
         else:
-            return Integer(value=0)
+            return _FALSE
 
     def __bool__(self):
         return bool(self.value)
@@ -80,10 +92,10 @@ class Variable:
     def __copy__(self):
         cls = self.__class__
         result = cls.__new__(cls)
+        _set(result, "is_const", self.is_const)
+        _set(result, "_memory_id", None)
+        _set(result, "name", None)
         result.__dict__.update(self.__dict__)
-        result.memory_id = Variable._memory_index
-        Variable._memory_index += 1
-        result.name = None
         return result
 
     def dereference(self):
@@ -94,7 +106,8 @@ class Variable:
 
 
 class String(Variable):
-    value: Union[str, None] = None
+    __slots__ = ()
+    value: Union[str, None]
     var_type = str
 
 
@@ -117,17 +130,26 @@ class String(Variable):
     def __add__(self, other: 'String'):
         if self.value is None or other.value is None:
             raise ValueError(f"Trying to add undefined variable '{self.memory_id}' to '{other.memory_id}'.")
-        result_int = String(None, self.value + other.value)
-        return result_int
+        return _new_string(self.value + other.value)
 
     def __setattr__(self, key, value):
         if self.is_const and key == "value":
             raise ValueError(f"Cannot modify constant variable '{self.name}'.")
-        if key == "value":
-            if value is not None and type(value) is type(self):
-                self.is_const = value.is_const
+        if key != "value":
+            return super().__setattr__(key, value)
+        if value is not None:
+            if type(value) is String:
+                _set(self, "is_const", value.is_const)
                 value = value.value
-        return super().__setattr__(key, value)
+            elif type(value) is not str:
+                raise ValueError(f"Value must be of type '{self.var_type}', not '{type(value)}'.")
+        if bison_logger.debug_enabled:
+            bison_logger.debug("set: %s %s = %s", self.name, key, value)
+        _set(self, "value", value)
+        return self
+
+    def __copy__(self):
+        return _new_string(self.value, self.is_const)
 
     def append(self, value: 'String'):
         if type(value) is not String:
@@ -137,51 +159,79 @@ class String(Variable):
 
 
 class Integer(Variable):
-    value: Union[int, None] = None
+    # buffer and position of the array element this variable stands for
+    __slots__ = ("owner", "index")
+    value: Union[int, None]
+    owner: 'IntegerBuffer'
+    index: int
     var_type = int
 
     def __init__(self, name: str = None, value: int = None):
+        _set(self, "owner", None)
+        _set(self, "index", None)
         super().__init__(name)
         self.value = value
 
     def __setattr__(self, key, value):
         if self.is_const and key == "value":
             raise ValueError(f"Cannot modify constant variable '{self.name}'.")
-        if key == "value":
-            if value is not None and type(value) is type(self):
-                self.is_const = value.is_const
+        if key != "value":
+            return super().__setattr__(key, value)
+        if value is not None:
+            if type(value) is Integer:
+                _set(self, "is_const", value.is_const)
                 value = value.value
-        return super().__setattr__(key, value)
+            elif type(value) is not int:
+                raise ValueError(f"Value must be of type '{self.var_type}', not '{type(value)}'.")
+        if bison_logger.debug_enabled:
+            bison_logger.debug("set: %s %s = %s", self.name, key, value)
+        _set(self, "value", value)
+        if self.owner is not None:
+            self.owner.store(self.index, value)
+        return self
+
+    def __copy__(self):
+        return _new_integer(self.value, self.is_const)
+
+    def __eq__(self, other):
+        if type(other) is not Integer:
+            return super().__eq__(other)
+        return _TRUE if self.value == other.value else _FALSE
+
+    def __lt__(self, other):
+        if type(other) is not Integer:
+            return super().__lt__(other)
+        return _TRUE if self.value < other.value else _FALSE
+
+    def __gt__(self, other):
+        if type(other) is not Integer:
+            return super().__gt__(other)
+        return _TRUE if self.value > other.value else _FALSE
 
     def __add__(self, other: 'Integer'):
         if self.value is None or other.value is None:
             raise ValueError(f"Trying to add undefined variable '{self.memory_id}' to '{other.memory_id}'.")
-        result_int = Integer(None, self.value + other.value)
-        return result_int
+        return _integer(self.value + other.value)
 
     def __sub__(self, other: 'Integer'):
         if self.value is None or other.value is None:
             raise ValueError(f"Trying to subtract undefined variable '{self.memory_id}' from '{other.memory_id}'.")
-        result_int = Integer(None, self.value - other.value)
-        return result_int
+        return _integer(self.value - other.value)
 
     def __mul__(self, other: 'Integer'):
         if self.value is None or other.value is None:
             raise ValueError(f"Trying to multiply undefined variable '{self.memory_id}' by '{other.memory_id}'.")
-        result_int = Integer(None, self.value * other.value)
-        return result_int
+        return _integer(self.value * other.value)
 
     def __truediv__(self, other: 'Integer'):
         if self.value is None or other.value is None:
             raise ValueError(f"Trying to divide undefined variable '{self.memory_id}' by '{other.memory_id}'.")
-        result_int = Integer(None, int(self.value) // int(other.value))
-        return result_int
+        return _integer(int(self.value) // int(other.value))
 
     def __mod__(self, other: 'Integer'):
         if self.value is None or other.value is None:
             raise ValueError(f"Trying to modulo undefined variable '{self.memory_id}' by '{other.memory_id}'.")
-        result_int = Integer(None, self.value % other.value)
-        return result_int
+        return _integer(self.value % other.value)
 
     def __int__(self: 'Integer'):
         if self.value is not None:
@@ -190,6 +240,132 @@ class Integer(Variable):
             raise ValueError(f"Trying to get int from undefined variable '{self.memory_id}'.")
 
 
+def _new_string(value: str, is_const: bool = False) -> String:
+    result = _allocate(String)
+    _set(result, "value", value)
+    _set(result, "name", None)
+    _set(result, "is_const", is_const)
+    _set(result, "_memory_id", None)
+    return result
+
+
+def _new_integer(value: int, is_const: bool = False) -> Integer:
+    result = _allocate(Integer)
+    _set(result, "value", value)
+    _set(result, "name", None)
+    _set(result, "is_const", is_const)
+    _set(result, "_memory_id", None)
+    _set(result, "owner", None)
+    _set(result, "index", None)
+    return result
+
+
+# results of arithmetic and comparisons are never assigned to in place, so small values
+# are shared; Pointer.create_ref copies them before a reference to one can be written
+_SMALL_INTEGERS = [_new_integer(value) for value in range(-5, 257)]
+_FALSE = _SMALL_INTEGERS[5]
+_TRUE = _SMALL_INTEGERS[6]
+
+
+def _integer(value: int) -> Integer:
+    if -5 <= value <= 256:
+        return _SMALL_INTEGERS[value + 5]
+    return _new_integer(value)
+
+
+def _is_shared(value: Variable) -> bool:
+    if type(value) is not Integer or value.value is None or not -5 <= value.value <= 256:
+        return False
+    return _SMALL_INTEGERS[value.value + 5] is value
+
+
+class IntegerBuffer:
+    """
+    Storage of the elements of an integer array as machine integers. Element variables are
+    created on access only and write their value through to the buffer, so they are kept
+    weakly and dropped once nothing refers to them. Values that do not fit into 64 bits make
+    the buffer fall back to a list of python integers.
+    """
+    UNDEFINED = -2 ** 63
+
+    def __init__(self, name: str = None, size: int = 0):
+        self.name = name
+        self.data = array("q", [IntegerBuffer.UNDEFINED]) * size
+        self.compact = True
+        self.elements = WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Integer:
+        element = self.elements.get(index)
+        if element is None:
+            element = Integer(name=f"{self.name}_{index}", value=self.load(index))
+            _set(element, "owner", self)
+            _set(element, "index", index)
+            self.elements[index] = element
+        return element
+
+    def __setitem__(self, index: int, value: Integer):
+        element = self.elements.pop(index, None)
+        if element is not None:
+            _set(element, "owner", None)
+            _set(element, "index", None)
+        self.store(index, value.value)
+
+    def __iter__(self):
+        for index in range(len(self.data)):
+            yield self[index]
+
+    def __eq__(self, other):
+        if type(other) is not IntegerBuffer:
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def load(self, index: int) -> Union[int, None]:
+        value = self.data[index]
+        if self.compact and value == IntegerBuffer.UNDEFINED:
+            return None
+        return value
+
+    def store(self, index: int, value: Union[int, None]):
+        if not self.compact:
+            self.data[index] = value
+        elif value is None:
+            self.data[index] = IntegerBuffer.UNDEFINED
+        elif IntegerBuffer.UNDEFINED < value < 2 ** 63:
+            self.data[index] = value
+        else:
+            self.data = self.values()
+            self.compact = False
+            self.data[index] = value
+
+    def values(self) -> List[Union[int, None]]:
+        if not self.compact:
+            return list(self.data)
+        return [None if value == IntegerBuffer.UNDEFINED else value for value in self.data]
+
+    def append(self, value: Union[int, None]):
+        if self.compact:
+            self.data.append(IntegerBuffer.UNDEFINED)
+        else:
+            self.data.append(None)
+        self.store(len(self.data) - 1, value)
+
+    def extend(self, values: List[Union[int, None]]):
+        if self.compact and all(value is None or IntegerBuffer.UNDEFINED < value < 2 ** 63 for value in values):
+            self.data.extend(array("q", [IntegerBuffer.UNDEFINED if value is None else value for value in values]))
+            return
+        if self.compact:
+            self.data = self.values()
+            self.compact = False
+        self.data.extend(values)
+
+
 class Pointer(Variable):
     class Link:
         value: Union[Type[Variable], None] = None
@@ -230,8 +406,8 @@ class Pointer(Variable):
 
     def __init__(self, name: str = None, value: 'Pointer.Link' = None, value_type: Type[Variable] = None,
                  is_const: bool = False, is_value_const: bool = False):
-        self.var_type = Pointer.Link
         super().__init__(name)
+        self.var_type = Pointer.Link
         if value is not None:
             if value_type is not None:
                 if isinstance(value, Pointer):
@@ -257,6 +433,8 @@ class Pointer(Variable):
     def create_ref(cls, value: Type[Variable]) -> 'Pointer':
         if callable(value):
             value = value()
+        if _is_shared(value):
+            value = copy(value)
         return Pointer(value=Pointer.Link(value=value))
 
 
@@ -319,26 +497,28 @@ class Pointer(Variable):
     def __eq__(self, other):
         self.__check_type(other)
         if self.value.value.memory_id != self.value.value.memory_id:
-            return Integer(value=0)
+            return _FALSE
         else:
-            return Integer(value=1)
+            return _TRUE
 
     def __gt__(self, other):
         self.__check_type(other)
         if self.value.value.memory_id > self.value.value.memory_id:
-            return Integer(value=1)
+            return _TRUE
         else:
-            return Integer(value=0)
+            return _FALSE
 
     def __lt__(self, other):
         self.__check_type(other)
         if self.value.value.memory_id < self.value.value.memory_id:
-            return Integer(value=1)
+            return _TRUE
         else:
-            return Integer(value=0)
+            return _FALSE
 
 
 class Array(Variable):
+    # current_size elements are stored and can be indexed, size_iden is the size reported by the
+    # size operator: elements are appended within it, and it grows by quant once they fill it
     value: Union[List[Type[Variable]], None] = None
     var_type = list
     value_type: Type[Variable] = None
@@ -347,14 +527,22 @@ class Array(Variable):
     size_iden: int = 10
     quant: int = 10
 
-    def __init__(self, name: str = None, is_static: bool = False, value_type: Type[Variable] = None, size: int = 10):
+    def __init__(self, name: str = None, is_static: bool = False, value_type: Type[Variable] = None, size: int = 10,
+                 capacity: int = None):
+        """
+        :param size: number of elements the array is created with
+        :param capacity: size to report and append within before growing, the size by default
+        """
         super().__init__(name)
         self.current_size = int(size)
         self.is_static = is_static
         self.value_type = value_type
-        self.size_iden = int(size)
-        self.quant = int(size) if int(size) != 0 else 10
-        self.value = [value_type(name=f"{self.name}_{i}") for i in range(int(size))]
+        self.size_iden = max(int(size), int(capacity)) if capacity is not None else int(size)
+        self.quant = self.size_iden if self.size_iden != 0 else 10
+        if value_type is Integer:
+            self.value = IntegerBuffer(name=self.name, size=int(size))
+        else:
+            self.value = [value_type(name=f"{self.name}_{i}") for i in range(int(size))]
 
     def __getitem__(self, item: Union[int, Integer]) -> Type[Variable]:
         if callable(item):
@@ -380,21 +568,55 @@ class Array(Variable):
                 self.size_iden = value.size_iden
                 self.quant = value.quant
                 value = value.value
+            if type(value) is IntegerBuffer:
+                if bison_logger.debug_enabled:
+                    bison_logger.debug("set: %s %s = %s", self.name, key, value)
+                return super().__setattr__(key, value, skip_check=True)
         return super().__setattr__(key, value)
 
     def size(self):
         return Integer(value=self.size_iden)
 
+    def _grow(self, count: int):
+        # makes room for count more elements in the reported size, the storage itself grows with
+        # every element appended and is over-allocated by python
+        if self.current_size + count > self.size_iden:
+            if self.is_static:
+                raise RuntimeError(f"Cannot change size of static array '{self.name}'.")
+            steps = -(-(self.current_size + count - self.size_iden) // self.quant)
+            self.size_iden += steps * self.quant
+
     def append(self, value: Type[Variable]):
         if type(value) != self.value_type:
             raise ValueError(f"Array value must be of type '{self.value_type}', not '{type(value)}'.")
-        if self.current_size >= self.size_iden:
-            if self.is_static:
-                raise RuntimeError(f"Cannot change size of static array '{self.name}'.")
-            self.value += [self.value_type(name=f"{self.name}_{self.size_iden + i}") for i in range(self.quant)]
-            self.size_iden += self.quant
-        self.value[self.current_size] = copy(value)
+        self._grow(1)
+        # an array assigned from this one shares the storage and may have appended past our end
+        if self.current_size < len(self.value):
+            self.value[self.current_size] = copy(value)
+        elif type(self.value) is IntegerBuffer:
+            self.value.append(value.value)
+        else:
+            self.value.append(copy(value))
         self.current_size += 1
         return self.value
 
+    def extend(self, values: List[Type[Variable]]):
+        """
+        Appends all the values at once, growing the size as many appends would.
+        """
+        values = list(values)
+        for value in values:
+            if type(value) != self.value_type:
+                raise ValueError(f"Array value must be of type '{self.value_type}', not '{type(value)}'.")
+        self._grow(len(values))
+        shared = min(max(len(self.value) - self.current_size, 0), len(values))
+        for i in range(shared):
+            self.value[self.current_size + i] = copy(values[i])
+        if type(self.value) is IntegerBuffer:
+            self.value.extend([value.value for value in values[shared:]])
+        else:
+            self.value.extend(copy(value) for value in values[shared:])
+        self.current_size += len(values)
+        return self.value
+
 
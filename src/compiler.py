@@ -0,0 +1,349 @@
+from copy import copy
+from typing import Callable, List, Dict, Iterable, Iterator, Tuple
+from types import FunctionType
+from .classes import *
+from .methods import methods
+from .bison import CommitedOperation
+from .limits import current_limits
+
+
+class Frame:
+    """
+    Activation record of a compiled function call: one slot per local variable.
+    """
+    __slots__ = ("slots", "parent")
+
+    def __init__(self, size: int, parent: 'Frame' = None):
+        self.slots: List[Type[Variable]] = [None] * size
+        self.parent = parent
+
+
+class Scope:
+    """
+    Compile-time counterpart of a frame: maps local names of a script function to slot indexes.
+    """
+    def __init__(self, parent: 'Scope' = None):
+        self.parent = parent
+        self.slots: Dict[str, int] = {}
+
+    def declare(self, name: str) -> int:
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    def resolve(self, name: str) -> List[Tuple[int, int]]:
+        """
+        :return: (depth, slot) for every enclosing scope declaring the name, innermost first
+        """
+        chain = []
+        scope, depth = self, 0
+        while scope is not None:
+            if name in scope.slots:
+                chain.append((depth, scope.slots[name]))
+            scope, depth = scope.parent, depth + 1
+        return chain
+
+
+class CompiledFunction:
+    """
+    Slot-resolved body of a script function, invoked by methods._function_call. The body is
+    compiled on the first call, so the functions a run never calls are never compiled.
+    """
+    def __init__(self, scope: Scope, source):
+        self.scope = scope
+        self.source = source
+        self.size = 0
+        self.body = None
+
+    def compile(self):
+        _declare_all(self.source, self.scope)
+        self.size = len(self.scope.slots)
+        self.body = _compile_block(self.source, self.scope) if type(self.source) is list else self.source
+
+    def __call__(self, func_var: Function, parameters: List[Type[Variable]]):
+        if self.body is None:
+            self.compile()
+        frame = Frame(self.size, func_var.closure)
+        slots = frame.slots
+        func_parameters = func_var.parameters
+        for i in range(len(parameters)):
+            new_var = copy(parameters[i])
+            new_var.name = func_parameters[i][0]
+            slots[i] = new_var
+        for statement in self.body:
+            return_check = statement(frame)
+            if return_check is not None and isinstance(return_check, Result):
+                if return_check.value is not None:
+                    return copy(return_check.value)
+                return None
+        return None
+
+
+def _is_escape(result) -> bool:
+    return isinstance(result, (Break, Result))
+
+
+def _declare_all(statements, scope: Scope):
+    """
+    Assigns slots to every variable declared in a function body. Loop, checkzero and block bodies share
+    the slots of the function, nested functions only contribute their own name.
+    """
+    if type(statements) is not list:
+        return
+    for statement in statements:
+        if not isinstance(statement, CommitedOperation):
+            continue
+        if statement.func is init_variable:
+            scope.declare(statement.kwargs["name"])
+        elif statement.func is methods._while or statement.func is methods._if:
+            for block in statement.args[1:]:
+                _declare_all(block, scope)
+        elif statement.func is methods._block:
+            _declare_all(statement.args[0], scope)
+
+
+def _compile_value(node, scope: Scope) -> Callable:
+    if isinstance(node, CommitedOperation):
+        return compile_node(node, scope)
+    if callable(node):
+        return lambda frame: node()
+    return lambda frame: node
+
+
+def _compile_block(statements, scope: Scope):
+    if statements is None:
+        return None
+    return [compile_node(statement, scope) for statement in statements]
+
+
+def _compile_while(scope: Scope, condition, body, instead=None):
+    condition = compile_node(condition, scope)
+    body = _compile_block(body, scope)
+    instead = _compile_block(instead, scope)
+
+    def run_while(frame):
+        was_iterated = False
+        marker = Integer(value=0)
+        limits = current_limits()
+        while not (condition(frame) == marker):
+            was_iterated = True
+            if limits is not None:
+                limits.check()
+            for statement in body:
+                break_check = statement(frame)
+                if break_check is not None and _is_escape(break_check):
+                    if isinstance(break_check, Break):
+                        return None
+                    return break_check
+        if not was_iterated and instead is not None:
+            for statement in instead:
+                statement(frame)
+        return None
+    return run_while
+
+
+def _run_block(statements, frame):
+    for statement in statements:
+        break_check = statement(frame)
+        if break_check is not None and _is_escape(break_check):
+            if isinstance(break_check, Break):
+                return Break()
+            return break_check
+    return None
+
+
+def _compile_if(scope: Scope, condition, body, instead=None):
+    condition = _compile_value(condition, scope)
+    body = _compile_block(body, scope)
+    instead = _compile_block(instead, scope)
+    run_block = _run_block
+
+    if instead is None:
+        def run_if(frame):
+            marker = Integer(value=0)
+            if condition(frame) == marker:
+                return run_block(body, frame)
+            return None
+    else:
+        def run_if(frame):
+            marker = Integer(value=0)
+            if condition(frame) == marker:
+                return run_block(body, frame)
+            return run_block(instead, frame)
+    return run_if
+
+
+def _read_global(name: str) -> Callable:
+    def read(frame):
+        storage = current_storage()
+        variables = storage.name_storage.get(())
+        if variables is not None and name in variables:
+            return variables[name]
+        return storage[name]
+    return read
+
+
+def _read_slot(depth: int, index: int, fallback: Callable) -> Callable:
+    # an empty slot means the variable is not declared yet in this call, so the lookup
+    # continues outwards exactly like the view based storage lookup does
+    if depth == 0:
+        def read(frame):
+            value = frame.slots[index]
+            if value is None:
+                return fallback(frame)
+            return value
+    elif depth == 1:
+        def read(frame):
+            value = frame.parent.slots[index]
+            if value is None:
+                return fallback(frame)
+            return value
+    else:
+        def read(frame):
+            target = frame
+            for _ in range(depth):
+                target = target.parent
+            value = target.slots[index]
+            if value is None:
+                return fallback(frame)
+            return value
+    return read
+
+
+def _compile_lookup(name: str, scope: Scope) -> Callable:
+    reader = _read_global(name)
+    if scope is not None:
+        for depth, index in reversed(scope.resolve(name)):
+            reader = _read_slot(depth, index, reader)
+    return reader
+
+
+def _compile_declaration(operation: CommitedOperation, scope: Scope) -> Callable:
+    create = _specialize(create_variable, [], _compile_kwargs(operation.kwargs, scope))
+    if scope is None:
+        def declare_global(frame):
+            var = create(frame)
+            current_storage().add_variable(var)
+            return var
+        return declare_global
+    index = scope.slots[operation.kwargs["name"]]
+
+    def declare(frame):
+        var = create(frame)
+        frame.slots[index] = var
+        return var
+    return declare
+
+
+def _compile_function(operation: CommitedOperation, scope: Scope) -> Callable:
+    kwargs = dict(operation.kwargs)
+    inner = Scope(scope)
+    for name, _ in kwargs.get("parameters") or []:
+        inner.declare(name)
+    code = CompiledFunction(inner, kwargs.get("value"))
+
+    if scope is None:
+        def declare_global(frame):
+            func = init_variable(**kwargs)
+            func.code = code
+            return func
+        return declare_global
+    index = scope.slots[kwargs["name"]]
+
+    def declare(frame):
+        func = create_variable(**kwargs)
+        func.code = code
+        func.closure = frame
+        frame.slots[index] = func
+        return func
+    return declare
+
+
+def _compile_call(operation: CommitedOperation, scope: Scope) -> Callable:
+    get_func = _compile_value(operation.kwargs["func_var"], scope)
+    parameters = [_compile_value(parameter, scope) for parameter in operation.kwargs["parameters"]]
+    function_call = methods._function_call
+    if not parameters:
+        return lambda frame: function_call(get_func(frame), [])
+    return lambda frame: function_call(get_func(frame), [parameter(frame) for parameter in parameters])
+
+
+def _compile_kwargs(kwargs, scope: Scope):
+    result = {}
+    for key, value in kwargs.items():
+        if isinstance(value, CommitedOperation):
+            result[key] = (compile_node(value, scope), "frame")
+        elif callable(value) and value != FunctionType:
+            result[key] = (value, "call")
+        else:
+            result[key] = (value, None)
+    return result
+
+
+def _specialize(func, args, kwargs) -> Callable:
+    """
+    Generates a closure calling func with all argument dispatch resolved ahead of time.
+
+    :param args: list of (value, mode) pairs
+    :param kwargs: dict of name -> (value, mode)
+    :return: callable taking the current frame
+    """
+    namespace = {"func": func}
+    modes = {"frame": "({})(frame)", "call": "({})()", None: "{}"}
+    call_args = []
+    for i, (value, mode) in enumerate(args):
+        namespace[f"a{i}"] = value
+        call_args.append(modes[mode].format(f"a{i}"))
+    for key, (value, mode) in kwargs.items():
+        namespace[f"k_{key}"] = value
+        call_args.append(f"{key}=" + modes[mode].format(f"k_{key}"))
+    return eval(f"lambda frame: func({', '.join(call_args)})", namespace)
+
+
+def _compile_operation(operation: CommitedOperation, scope: Scope) -> Callable:
+    func = operation.func
+    if func is methods._while:
+        return _compile_while(scope, *operation.args, **operation.kwargs)
+    if func is methods._if:
+        return _compile_if(scope, *operation.args, **operation.kwargs)
+    if func is methods._block:
+        body = _compile_block(operation.args[0], scope)
+        return lambda frame: _run_block(body, frame)
+    if func is methods._lookup and type(operation.args[0]) is str:
+        return _compile_lookup(operation.args[0], scope)
+    if func is methods._function_call:
+        return _compile_call(operation, scope)
+    if func is init_variable:
+        if operation.kwargs.get("type") in ("function", FunctionType):
+            return _compile_function(operation, scope)
+        return _compile_declaration(operation, scope)
+    args = []
+    for arg in operation.args:
+        if isinstance(arg, CommitedOperation):
+            args.append((compile_node(arg, scope), "frame"))
+        elif callable(arg):
+            args.append((arg, "call"))
+        else:
+            args.append((arg, None))
+    return _specialize(func, args, _compile_kwargs(operation.kwargs, scope))
+
+
+def compile_node(node, scope: Scope = None):
+    """
+    Compiles a parsed node into a closure taking the current frame. Variable reads are resolved
+    to frame slots of the enclosing script functions; names not declared in any of them fall
+    back to the global storage.
+    """
+    if isinstance(node, CommitedOperation):
+        return _compile_operation(node, scope)
+    return _compile_value(node, scope)
+
+
+def compile_program(program: Iterable[CommitedOperation]) -> Iterator[Callable]:
+    """
+    Compiles the top-level statements one by one as they are taken, so a streamed program is
+    never held in full.
+    """
+    for statement in program:
+        closure = compile_node(statement)
+        yield lambda closure=closure: closure(None)
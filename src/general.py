@@ -1,4 +1,153 @@
-def bison_log(msg):
-    log_file = "bison.log"
-    with open(log_file, "a+") as f:
-        f.write(msg + "\n")
\ No newline at end of file
+import atexit
+import os
+import threading
+import weakref
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+OFF = 100
+LEVELS = {"debug": DEBUG, "info": INFO, "off": OFF}
+
+
+class BisonLogger:
+    """
+    Interpreter trace log. Records are formatted into a bounded ring buffer and written to the
+    log file in batches by a background thread, the oldest records are dropped when the writer
+    falls behind. Call sites check debug_enabled / info_enabled before building the message, so
+    a disabled level costs a single attribute lookup. Loggers are flushed at exit and may be
+    garbage collected, the writer thread only holds a weak reference.
+    """
+    debug_enabled: bool = False
+    info_enabled: bool = False
+
+    def __init__(self, filename: str = "bison.log", level: int = OFF, capacity: int = 65536,
+                 batch_size: int = 1024, flush_interval: float = 0.5):
+        self.filename = filename
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=capacity)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._writer = None
+        self._pid = None
+        self.set_level(level)
+        _loggers.add(self)
+
+    def set_level(self, level):
+        if type(level) is str:
+            if level.lower() not in LEVELS:
+                raise ValueError(f"Unknown log level '{level}'.")
+            level = LEVELS[level.lower()]
+        self.level = level
+        self.debug_enabled = level <= DEBUG
+        self.info_enabled = level <= INFO
+
+    def configure(self, level=None, filename: str = None, capacity: int = None):
+        self.flush()
+        if filename is not None:
+            self.filename = filename
+        if capacity is not None:
+            self.capacity = capacity
+            with self._lock:
+                self.buffer = deque(self.buffer, maxlen=capacity)
+        if level is not None:
+            self.set_level(level)
+
+    def log(self, level: int, msg: str, *args):
+        if level < self.level:
+            return
+        if args:
+            msg = msg % args
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start_writer()
+            buffer = self.buffer
+            if len(buffer) == buffer.maxlen:
+                self.dropped += 1
+            buffer.append(msg)
+            full = len(buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def debug(self, msg: str, *args):
+        self.log(DEBUG, msg, *args)
+
+    def info(self, msg: str, *args):
+        self.log(INFO, msg, *args)
+
+    def _start_writer(self):
+        # called with the lock held, after a fork the writer thread of the parent does not exist
+        # in the child and the records of the parent are not the child's to write
+        self._pid = os.getpid()
+        self.buffer.clear()
+        self.dropped = 0
+        self._wake = threading.Event()
+        self._writer = threading.Thread(target=BisonLogger._write_loop,
+                                        args=(weakref.ref(self), self._wake, self.flush_interval),
+                                        name="bison-log-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _write_loop(reference: weakref.ref, wake: threading.Event, interval: float):
+        while True:
+            wake.wait(interval)
+            wake.clear()
+            logger = reference()
+            if logger is None:
+                return
+            logger.flush()
+            del logger
+
+    def flush(self):
+        # records are taken under the lock and written under the flush lock, so logging does
+        # not wait for the file and concurrent flushes keep the order of the records
+        with self._flush_lock:
+            with self._lock:
+                records = list(self.buffer)
+                self.buffer.clear()
+                dropped, self.dropped = self.dropped, 0
+            if not records and not dropped:
+                return
+            if dropped:
+                records.insert(0, f"... {dropped} records dropped")
+            records.append("")
+            with open(self.filename, "a+") as f:
+                f.write("\n".join(records))
+
+    def close(self):
+        if self._pid == os.getpid():
+            self.flush()
+
+    def _after_fork(self):
+        # a thread of the parent may have held the locks when it forked
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+
+_loggers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_loggers():
+    for logger in list(_loggers):
+        logger.close()
+
+
+def _after_fork():
+    for logger in list(_loggers):
+        logger._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+bison_logger = BisonLogger()
+
+
+def bison_log(msg, *args, level: int = INFO):
+    if level >= bison_logger.level:
+        bison_logger.log(level, msg, *args)
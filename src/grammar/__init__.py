@@ -0,0 +1 @@
+from .frontend import ParseError, PythonFrontend, get_tables, tokenize
@@ -0,0 +1,170 @@
+import io
+import re
+import sys
+from typing import Dict, Iterable, Iterator, Tuple, Union
+
+from .lalr import ACCEPT, END, REDUCE, SHIFT, Grammar, Tables, parse_docstring
+
+# the rules of recognizer.l, keep both in sync
+KEYWORDS = {
+    "top": "TOP", "bottom": "BOTTOM", "left": "LEFT", "right": "RIGHT", "timeshift": "TIMESHIFT", "bind": "BIND",
+    "distance": "DISTANCE", "region": "REGION",
+    "start": "START", "finish": "FINISH", "while": "WHILE", "instead": "INSTEAD", "break": "BREAK",
+    "checkzero": "CHECKZERO", "call": "CALL", "with": "WITH", "return": "RETURN",
+    "integer": "INTEGER", "string": "STRING", "pointer": "POINTER", "mutable": "MUTABLE",
+}
+OPERATORS = {
+    ",": "COMMA", ";": "SEM", "+": "PLUS", "-": "MINUS", "*": "TIMES", "/": "DIVIDE", "%": "MOD", "&": "REF",
+    "(": "LPAREN", ")": "RPAREN", "[": "LBRACKET", "]": "RBRACKET", ":=": "EQUALS", "?": "SIZE",
+    "=": "OP_EQUAL", ">": "OP_GREATER", "<": "OP_LESS", "array of": "ARRAY", ".append": "APPEND",
+}
+# alternatives are tried in order, so the longer lexemes come first like flex's longest match
+TOKEN_PATTERN = re.compile(
+    r'(?P<NUMBER>[0-9]+)|(?P<operator>array of|\.append|:=|[,;+\-*/%&()\[\]?=><])|(?P<word>[a-zA-Z]+)'
+    r'|(?P<STR>"[^"\x00-\x1f\x7f]+")|(?P<space>[ \t\v\f\r\n]+)|(?P<unknown>.)', re.S)
+
+
+def tokenize(lines: Union[str, Iterable[str]]) -> Iterator[Tuple[str, str, int, int, str]]:
+    """
+    Splits a string or an iterable of lines, like an open file, into tokens. No token spans a
+    line, so the lines are read one at a time.
+
+    :return: token name, text, line number, column and line of every token, the end token last
+    """
+    if isinstance(lines, str):
+        lines = io.StringIO(lines)
+    number, line = 0, ""
+    for number, line in enumerate(lines, 1):
+        for match in TOKEN_PATTERN.finditer(line):
+            kind = match.lastgroup
+            if kind == "word":
+                text = match.group()
+                token = KEYWORDS.get(text)
+                # keyword texts are shared like the interned values of the flex lexer
+                if token:
+                    yield token, sys.intern(text), number, match.start() + 1, line
+                else:
+                    yield "IDENTIFIER", text, number, match.start() + 1, line
+            elif kind == "operator":
+                text = match.group()
+                yield OPERATORS[text], sys.intern(text), number, match.start() + 1, line
+            elif kind in ("NUMBER", "STR"):
+                yield kind, match.group(), number, match.start() + 1, line
+    yield END, None, number, len(line) + 1, line
+
+
+def build_tables(parser_cls) -> Tables:
+    """
+    Generates the parse tables from the docstrings of the on_* handlers, in the order they are
+    defined like PyBison does.
+    """
+    handlers = [getattr(parser_cls, name) for name in dir(parser_cls) if name.startswith("on_")]
+    handlers.sort(key=lambda handler: handler.__code__.co_firstlineno)
+    rules = [parse_docstring(handler.__doc__) for handler in handlers]
+    return Tables(Grammar(parser_cls.start, parser_cls.tokens, parser_cls.precedences, rules))
+
+
+class ParseError(SyntaxError, RuntimeError):
+    """
+    Syntax error in a script, a RuntimeError like the parse failures of the bison engine.
+    """
+
+
+_tables: Dict[type, Tables] = {}
+
+
+def get_tables(parser_cls) -> Tables:
+    if parser_cls not in _tables:
+        _tables[parser_cls] = build_tables(parser_cls)
+    return _tables[parser_cls]
+
+
+class PythonFrontend:
+    """
+    Mixin for a BisonParser subclass that parses in python with LALR(1) tables generated from the
+    grammar of the class. The same on_* handlers are called with the same arguments, so it builds
+    the same parse tree as the bison engine without a C compiler, flex or bison. With trace set,
+    the trace_action method of the parser is called before every handler. Unlike the engine, it
+    knows where every rule starts in the source and records it in the located values.
+    """
+    verbose = False
+    trace = False
+    # types of the values that get the line and column of their first token, when they have none
+    located: tuple = ()
+    tables: Tables = None
+
+    def __init__(self, verbose: bool = False, tables: Tables = None, **kwargs):
+        self.verbose = verbose
+        self.tables = tables if tables is not None else get_tables(type(self))
+
+    def parse_string(self, string: str, debug: bool = False):
+        """
+        :return: value of the start rule, exceptions raised by the handlers are returned as values
+        """
+        parse = self._parse(tokenize(string), stream=False)
+        try:
+            next(parse)
+        except StopIteration as stop:
+            return stop.value
+
+    def parse_lines(self, lines: Iterable[str]) -> Iterator:
+        """
+        Parses lines as they are read and yields every item of the left recursive start rule, a
+        top-level function for this grammar, as soon as it is reduced. The items are not collected
+        into the value of the start rule.
+        """
+        yield from self._parse(tokenize(lines), stream=True)
+
+    def _parse(self, tokens: Iterator, stream: bool):
+        action, goto, productions = self.tables.action, self.tables.goto, self.tables.productions
+        start = productions[0][3][0]
+        handlers = {}
+        trace = self.trace
+        located = self.located
+        states = [0]
+        values = []
+        positions = []
+        token, text, number, column, line = next(tokens)
+        while True:
+            kind, argument = action[states[-1]].get(token, (None, None))
+            if kind == SHIFT:
+                states.append(argument)
+                values.append(text)
+                positions.append((number, column))
+                token, text, number, column, line = next(tokens)
+            elif kind == REDUCE:
+                target, length, option, names = productions[argument]
+                if length:
+                    arguments = values[-length:]
+                    position = positions[-length]
+                    del values[-length:]
+                    del states[-length:]
+                    del positions[-length:]
+                else:
+                    arguments = []
+                    position = (number, column)
+                if stream and target == start:
+                    for item in arguments[1:]:
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+                    value = None
+                else:
+                    if target not in handlers:
+                        handlers[target] = getattr(self, "on_" + target)
+                    if trace:
+                        self.trace_action(target, option, list(names), arguments)
+                    try:
+                        value = handlers[target](target=target, option=option, names=list(names), values=arguments)
+                    except Exception as e:
+                        value = e
+                    if type(value) in located and value.line is None:
+                        value.line, value.column = position
+                values.append(value)
+                positions.append(position)
+                states.append(goto[states[-1]][target])
+            elif kind == ACCEPT:
+                return values[-1]
+            else:
+                near = "end of input" if token == END else repr(text)
+                raise ParseError(f"syntax error near {near}", ("<script>", number, column, line.rstrip("\r\n")))
@@ -0,0 +1,224 @@
+import re
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+# matches only outside of double quoted strings
+_unquoted = r'(?=(?:[^"]*"[^"]*")*[^"]*$)'
+
+SHIFT, REDUCE, ACCEPT = "shift", "reduce", "accept"
+END = "$end"
+
+
+def parse_docstring(doc: str) -> Tuple[str, List[List[str]]]:
+    """
+    Reads a rule from the docstring of a PyBison handler.
+
+    :return: target of the rule and the symbols of each of its options
+    """
+    doc = re.sub(";" + _unquoted, "", doc.strip())
+    target, options = re.split(":" + _unquoted, doc, maxsplit=1)
+    alternatives = re.split(r"\|" + _unquoted, " " + options.strip())
+    return target.strip(), [alternative.split() for alternative in alternatives]
+
+
+class Grammar:
+    """
+    Context free grammar with bison style precedences. Production 0 is the augmented start rule.
+    """
+    def __init__(self, start: str, tokens: List[str], precedences, rules: List[Tuple[str, List[List[str]]]]):
+        self.start = start
+        self.terminals = list(tokens) + [END]
+        self.token_precedence: Dict[str, Tuple[int, str]] = {}
+        for level, (associativity, names) in enumerate(precedences):
+            for name in names:
+                self.token_precedence[name] = (level + 1, associativity)
+        # (target, symbols, option index within the rule)
+        self.productions: List[Tuple[str, Tuple[str, ...], int]] = [("$accept", (start,), 0)]
+        for target, options in rules:
+            for option, symbols in enumerate(options):
+                self.productions.append((target, tuple(symbols), option))
+        self.nonterminals = {production[0] for production in self.productions}
+        self.by_target: Dict[str, List[int]] = {}
+        for index, (target, _, _) in enumerate(self.productions):
+            self.by_target.setdefault(target, []).append(index)
+        self._compute_first()
+
+    def rule_precedence(self, production: int):
+        # like bison: the precedence of the last terminal of the rule
+        for symbol in reversed(self.productions[production][1]):
+            if symbol not in self.nonterminals:
+                return self.token_precedence.get(symbol)
+        return None
+
+    def _compute_first(self):
+        self.nullable: Set[str] = set()
+        self.first: Dict[str, Set[str]] = {name: set() for name in self.nonterminals}
+        changed = True
+        while changed:
+            changed = False
+            for target, symbols, _ in self.productions:
+                before = len(self.first[target])
+                all_nullable = True
+                for symbol in symbols:
+                    if symbol in self.nonterminals:
+                        self.first[target] |= self.first[symbol]
+                        if symbol not in self.nullable:
+                            all_nullable = False
+                            break
+                    else:
+                        self.first[target].add(symbol)
+                        all_nullable = False
+                        break
+                if all_nullable and target not in self.nullable:
+                    self.nullable.add(target)
+                    changed = True
+                if len(self.first[target]) != before:
+                    changed = True
+
+    def first_of(self, symbols, lookahead: str) -> Set[str]:
+        result = set()
+        for symbol in symbols:
+            if symbol in self.nonterminals:
+                result |= self.first[symbol]
+                if symbol not in self.nullable:
+                    return result
+            else:
+                result.add(symbol)
+                return result
+        result.add(lookahead)
+        return result
+
+
+class Tables:
+    """
+    LALR(1) parse tables, built from the LR(0) automaton by lookahead propagation (dragon book,
+    algorithm 4.62). Conflicts are resolved the way bison does: precedences first, otherwise
+    shift over reduce and the earlier production over the later one.
+    """
+    def __init__(self, grammar: Grammar):
+        self.productions = [(target, len(symbols), option, list(symbols))
+                            for target, symbols, option in grammar.productions]
+        self.action: List[Dict[str, Tuple[str, int]]] = []
+        self.goto: List[Dict[str, int]] = []
+        self.conflicts: List[str] = []
+        self._build(grammar)
+
+    @staticmethod
+    def _closure0(grammar: Grammar, kernel) -> Set[Tuple[int, int]]:
+        items = set(kernel)
+        work = list(kernel)
+        while work:
+            production, dot = work.pop()
+            symbols = grammar.productions[production][1]
+            if dot < len(symbols) and symbols[dot] in grammar.nonterminals:
+                for candidate in grammar.by_target[symbols[dot]]:
+                    if (candidate, 0) not in items:
+                        items.add((candidate, 0))
+                        work.append((candidate, 0))
+        return items
+
+    @staticmethod
+    def _closure1(grammar: Grammar, items) -> Set[Tuple[int, int, str]]:
+        result = set(items)
+        work = list(items)
+        while work:
+            production, dot, lookahead = work.pop()
+            symbols = grammar.productions[production][1]
+            if dot < len(symbols) and symbols[dot] in grammar.nonterminals:
+                for follow in grammar.first_of(symbols[dot + 1:], lookahead):
+                    for candidate in grammar.by_target[symbols[dot]]:
+                        item = (candidate, 0, follow)
+                        if item not in result:
+                            result.add(item)
+                            work.append(item)
+        return result
+
+    def _build(self, grammar: Grammar):
+        start: FrozenSet = frozenset({(0, 0)})
+        kernels: List[FrozenSet] = [start]
+        index = {start: 0}
+        transitions: List[Dict[str, int]] = []
+        state = 0
+        while state < len(kernels):
+            moves: Dict[str, Set] = {}
+            for production, dot in self._closure0(grammar, kernels[state]):
+                symbols = grammar.productions[production][1]
+                if dot < len(symbols):
+                    moves.setdefault(symbols[dot], set()).add((production, dot + 1))
+            transition = {}
+            for symbol in sorted(moves):
+                kernel = frozenset(moves[symbol])
+                if kernel not in index:
+                    index[kernel] = len(kernels)
+                    kernels.append(kernel)
+                transition[symbol] = index[kernel]
+            transitions.append(transition)
+            state += 1
+
+        lookaheads = [{item: set() for item in kernel} for kernel in kernels]
+        propagation = [{item: [] for item in kernel} for kernel in kernels]
+        lookaheads[0][(0, 0)].add(END)
+        for state, kernel in enumerate(kernels):
+            for item in kernel:
+                for production, dot, lookahead in self._closure1(grammar, {(item[0], item[1], "#")}):
+                    symbols = grammar.productions[production][1]
+                    if dot >= len(symbols):
+                        continue
+                    target = transitions[state][symbols[dot]]
+                    if lookahead == "#":
+                        propagation[state][item].append((target, (production, dot + 1)))
+                    else:
+                        lookaheads[target][(production, dot + 1)].add(lookahead)
+        changed = True
+        while changed:
+            changed = False
+            for state in range(len(kernels)):
+                for item, targets in propagation[state].items():
+                    source = lookaheads[state][item]
+                    for target, moved in targets:
+                        destination = lookaheads[target][moved]
+                        if not source <= destination:
+                            destination |= source
+                            changed = True
+
+        for state in range(len(kernels)):
+            action: Dict[str, Tuple[str, int]] = {}
+            goto: Dict[str, int] = {}
+            for symbol, target in transitions[state].items():
+                if symbol in grammar.nonterminals:
+                    goto[symbol] = target
+                else:
+                    action[symbol] = (SHIFT, target)
+            items = {(production, dot, lookahead)
+                     for (production, dot), follows in lookaheads[state].items() for lookahead in follows}
+            for production, dot, lookahead in sorted(self._closure1(grammar, items)):
+                if dot != len(grammar.productions[production][1]):
+                    continue
+                if production == 0:
+                    action[END] = (ACCEPT, 0)
+                else:
+                    self._add_reduce(grammar, state, action, lookahead, production)
+            self.action.append(action)
+            self.goto.append(goto)
+
+    def _add_reduce(self, grammar: Grammar, state: int, action: Dict, lookahead: str, production: int):
+        current = action.get(lookahead)
+        if current is None:
+            action[lookahead] = (REDUCE, production)
+            return
+        if current[0] == REDUCE:
+            if current[1] != production:
+                self.conflicts.append(f"state {state}: reduce/reduce conflict on {lookahead}")
+                action[lookahead] = (REDUCE, min(current[1], production))
+            return
+        token_precedence = grammar.token_precedence.get(lookahead)
+        rule_precedence = grammar.rule_precedence(production)
+        if token_precedence is None or rule_precedence is None:
+            self.conflicts.append(f"state {state}: shift/reduce conflict on {lookahead}")
+            return
+        if rule_precedence[0] > token_precedence[0]:
+            action[lookahead] = (REDUCE, production)
+        elif rule_precedence[0] == token_precedence[0]:
+            if token_precedence[1] == "left":
+                action[lookahead] = (REDUCE, production)
+            elif token_precedence[1] == "nonassoc":
+                del action[lookahead]
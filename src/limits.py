@@ -0,0 +1,89 @@
+import threading
+import time
+from contextvars import ContextVar
+
+_current_limits: ContextVar = ContextVar("limits", default=None)
+
+
+class Terminated(Exception):
+    """
+    Stops a running script before its main function returns. Raised through the interpreter
+    instead of exiting the process, the run reports the reason.
+    """
+    reason = "terminated"
+
+
+class ExitReached(Terminated):
+    reason = "exit"
+
+    def __init__(self, position):
+        super().__init__(f"Robot has reached the exit at position ({position[0]}, {position[1]}).")
+        self.position = tuple(position)
+
+
+class BudgetExhausted(Terminated):
+    reason = "budget"
+
+
+class TimedOut(Terminated):
+    reason = "timeout"
+
+
+class Cancelled(Terminated):
+    reason = "cancelled"
+
+
+class CancellationToken:
+    """
+    Shared between a run and whoever may stop it, cancel can be called from any thread.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class Limits:
+    """
+    Bounds of a run, checked by the interpreter at every loop iteration and function call: a
+    budget of such steps, a wall-clock timeout started by start, and a cancellation token. Runs
+    without limits do not count anything.
+    """
+    def __init__(self, steps: int = None, timeout: float = None, token: CancellationToken = None):
+        """
+        :param steps: number of loop iterations and calls allowed, unlimited if None
+        :param timeout: seconds the run may take, unlimited if None
+        """
+        self.max_steps = steps
+        self.timeout = timeout
+        self.token = token if token is not None else CancellationToken()
+        self.steps = 0
+        self.deadline = None
+
+    def start(self):
+        self.steps = 0
+        self.deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+    def cancel(self):
+        self.token.cancel()
+
+    def check(self):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise BudgetExhausted(f"Step budget of {self.max_steps} exhausted.")
+        if self.token.cancelled:
+            raise Cancelled("Run cancelled.")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimedOut(f"Run took longer than {self.timeout} s.")
+
+
+def current_limits() -> Limits:
+    """
+    :return: limits of the runtime active in the current context or None
+    """
+    return _current_limits.get()
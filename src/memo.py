@@ -0,0 +1,194 @@
+import operator
+from collections import Counter, OrderedDict
+from copy import copy
+from typing import Dict, List, Set, Type
+from types import FunctionType
+from .bison import CommitedOperation
+from .classes import *
+from .methods import methods
+
+# operations a pure function may use besides lookups, assignments, declarations and calls, which
+# are checked separately; anything else may move the robot or reach state outside the call
+PURE_OPERATIONS = {operator.add, operator.sub, operator.mul, operator.truediv, operator.mod,
+                   operator.eq, operator.gt, operator.lt, Integer, String, Result, Break}
+VALUE_TYPES = ("integer", "string")
+MISSING = object()
+
+
+def _is_function(node) -> bool:
+    return (isinstance(node, CommitedOperation) and node.func is init_variable
+            and node.kwargs.get("type") in ("function", FunctionType))
+
+
+def _check_block(statements, local: Set[str], calls: Set[str]) -> bool:
+    # variables declared in a block may not exist after it, so they stay local to the block
+    if type(statements) is not list:
+        return False
+    local = set(local)
+    return all(_check(statement, local, calls) for statement in statements)
+
+
+def _check(node, local: Set[str], calls: Set[str]) -> bool:
+    """
+    :param local: names declared in the function at this point of the body
+    :param calls: collects the names of the functions called
+    :return: whether the node only computes with integers and strings held in local variables
+    """
+    if not isinstance(node, CommitedOperation):
+        return not callable(node)
+    func = node.func
+    if func is methods._lookup:
+        return node.args[0] in local
+    if func is init_variable:
+        if node.kwargs.get("type") not in VALUE_TYPES or not set(node.kwargs) <= {"type", "name", "value"}:
+            return False
+        if "value" in node.kwargs and not _check(node.kwargs["value"], local, calls):
+            return False
+        local.add(node.kwargs["name"])
+        return True
+    if func is methods._setattr:
+        target, name, value = node.args
+        return (isinstance(target, CommitedOperation) and target.func is methods._lookup
+                and target.args[0] in local and name == "value" and _check(value, local, calls))
+    if func is methods._function_call:
+        target = node.kwargs["func_var"]
+        if not (isinstance(target, CommitedOperation) and target.func is methods._lookup
+                and target.args[0] not in local):
+            return False
+        calls.add(target.args[0])
+        return all(_check(parameter, local, calls) for parameter in node.kwargs["parameters"])
+    if func is methods._while or func is methods._if:
+        condition, *blocks = node.args
+        return _check(condition, local, calls) and all(_check_block(block, local, calls) for block in blocks)
+    if func is methods._block:
+        return _check_block(node.args[0], local, calls)
+    if func not in PURE_OPERATIONS:
+        return False
+    return (all(_check(arg, local, calls) for arg in node.args)
+            and all(_check(value, local, calls) for value in node.kwargs.values()))
+
+
+def _value_signature(declaration: CommitedOperation) -> bool:
+    # the results are remembered by the values of the parameters and handed out as copies, which
+    # is only sound for integers and strings: arrays are not hashable and share their elements,
+    # pointers would be remembered by their target instead of its contents
+    parameters = declaration.kwargs.get("parameters") or []
+    return (declaration.kwargs.get("value_type") in VALUE_TYPES
+            and all(var_type in (Integer, String) for _, var_type in parameters))
+
+
+def pure_functions(program: List[CommitedOperation]) -> Set[str]:
+    """
+    Finds the top-level functions whose result depends on nothing but their arguments: integer
+    and string parameters and result, no robot actions, pointers, arrays or variables declared
+    outside of the call, and calls to pure functions only.
+
+    :return: names of the pure functions
+    """
+    declarations = [node for node in program if _is_function(node)]
+    counts = Counter(node.kwargs.get("name") for node in declarations)
+    candidates: Dict[str, Set[str]] = {}
+    for node in declarations:
+        name = node.kwargs.get("name")
+        parameters = node.kwargs.get("parameters") or []
+        if counts[name] > 1 or not _value_signature(node):
+            continue
+        calls = set()
+        if _check_block(node.kwargs.get("value"), {parameter for parameter, _ in parameters}, calls):
+            candidates[name] = calls
+    changed = True
+    while changed:
+        changed = False
+        for name, calls in list(candidates.items()):
+            if not calls <= candidates.keys():
+                del candidates[name]
+                changed = True
+    return set(candidates)
+
+
+def select_memoized(program: List[CommitedOperation], automatic: bool = True,
+                    overrides: Dict[str, bool] = None) -> Set[str]:
+    """
+    :param automatic: memoize every pure function
+    :param overrides: function name -> whether to memoize it, regardless of the analysis
+    :return: names of the functions to memoize
+    :raises ValueError: if an override enables a function taking or returning anything but
+        integers and strings
+    """
+    selected = pure_functions(program) if automatic else set()
+    declarations = [node for node in program if _is_function(node)]
+    for name, enabled in (overrides or {}).items():
+        if enabled:
+            if not all(_value_signature(node) for node in declarations if node.kwargs.get("name") == name):
+                raise ValueError(f"Function '{name}' can not be memoized, only functions taking and returning "
+                                 f"integers and strings can")
+            selected.add(name)
+        else:
+            selected.discard(name)
+    return selected
+
+
+class Memoized:
+    """
+    Code of a function that remembers its results for the last maxsize distinct argument values.
+    Wraps the compiled code of the function, or its parsed body when code is None.
+    """
+    def __init__(self, code=None, maxsize: int = 128):
+        self.code = code
+        self.maxsize = maxsize
+        self.cache: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(parameters: List[Type[Variable]]) -> tuple:
+        return tuple(parameter.value for parameter in parameters)
+
+    def lookup(self, key: tuple):
+        """
+        :return: the remembered result or MISSING
+        """
+        value = self.cache.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self.cache.move_to_end(key)
+        return copy(value) if value is not None else None
+
+    def store(self, key: tuple, value):
+        self.cache[key] = copy(value) if value is not None else None
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+
+    def __call__(self, func_var: Function, parameters: List[Type[Variable]]):
+        key = self.key(parameters)
+        value = self.lookup(key)
+        if value is MISSING:
+            if self.code is not None:
+                value = self.code(func_var, parameters)
+            else:
+                value = methods._run_tree(func_var, parameters)
+            self.store(key, value)
+        return value
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "maxsize": self.maxsize, "currsize": len(self.cache)}
+
+
+def memoize(func_var: Function, maxsize: int = 128) -> Memoized:
+    """
+    Memoizes an instantiated function, whether it is pure or not is up to the caller.
+    """
+    if not isinstance(func_var.code, Memoized):
+        func_var.code = Memoized(func_var.code, maxsize)
+    return func_var.code
+
+
+def memo_statistics(storage: Storage = None) -> Dict[str, Dict[str, int]]:
+    """
+    :return: cache_info of every memoized top-level function of the storage, current by default
+    """
+    storage = storage if storage is not None else current_storage()
+    return {name: var.code.cache_info() for name, var in storage.name_storage.get((), {}).items()
+            if isinstance(var, Function) and isinstance(var.code, Memoized)}
@@ -1,5 +1,11 @@
 from ..classes import *
-from ..robot import global_robot
+from ..limits import current_limits
+from ..robot import current_robot
+
+def _lookup(name):
+    return current_storage()[name]
+
+_ASSIGNED_BY_VALUE = (Integer, String, Array)
 
 def _setattr(target, name, value):
     if callable(target):
@@ -8,7 +14,10 @@ def _setattr(target, name, value):
         name = name()
     if callable(value):
         value = value()
-    value = value.__copy__()
+    # integers, strings and arrays take only the value out of the assigned variable, so they are
+    # assigned without a copy; a pointer would share its link and has to be copied
+    if type(value) not in _ASSIGNED_BY_VALUE:
+        value = value.__copy__()
     return target.__setattr__(name, value)
 
 def _getitem(target, item):
@@ -38,8 +47,11 @@ def _append(target, value):
 def _while(condition, body, instead = None):
     was_iterated = False
     marker = Integer(value=0)
+    limits = current_limits()
     while not (condition() == marker):
         was_iterated = True
+        if limits is not None:
+            limits.check()
         for statement in body:
             break_check = statement()
             if isinstance(break_check, Break):
@@ -71,12 +83,17 @@ def _if(condition, body, instead = None):
                     return break_check
     return None
 
-def _function_call(func_var, parameters):
-    if callable(func_var):
-        func_var = func_var()
-    for i in range(len(parameters)):
-        if callable(parameters[i]):
-            parameters[i] = parameters[i]()
+def _block(statements):
+    # a checkzero whose branch is known ahead of time, breaks and returns propagate the same way
+    for statement in statements:
+        break_check = statement()
+        if isinstance(break_check, Break):
+            return Break()
+        if isinstance(break_check, Result):
+            return break_check
+    return None
+
+def _check_parameters(func_var, parameters):
     func_parameters = func_var.parameters
     if len(parameters) != len(func_parameters):
         raise ValueError(f"Function '{func_var.name}' expects {len(func_parameters)} parameters, got {len(parameters)}.")
@@ -84,43 +101,73 @@ def _function_call(func_var, parameters):
         if type(parameters[i]) != func_parameters[i][1]:
             raise ValueError(f"Function '{func_var.name}' expects parameter {i} to be of type {func_parameters[i]}, got {type(parameters[i])}.")
 
-    previous_view = global_storage.current_view_set.copy()
-    global_storage.add_view(func_var.name)
-    global_storage.current_view_set = func_var.view
-    for i in range(len(parameters)):
-        new_var = copy(parameters[i])
-        new_var.name = func_parameters[i][0]
-        global_storage.add_variable(new_var)
-    return_value: Type[Variable] = None
-    for statement in func_var.value:
-        return_check = statement()
-        if isinstance(return_check, Result):
-            return_value = return_check.value
-            break
-    if return_value is not None:
-        return_value = copy(return_value)
-    global_storage.remove_view(func_var.name)
-    global_storage.current_view_set = previous_view
+def _function_call(func_var, parameters):
+    if callable(func_var):
+        func_var = func_var()
+    parameters = [parameter() if callable(parameter) else parameter for parameter in parameters]
+    _check_parameters(func_var, parameters)
+    limits = current_limits()
+    if limits is not None:
+        limits.check()
+    if func_var.code is not None:
+        return func_var.code(func_var, parameters)
+    return _run_tree(func_var, parameters)
+
+def _run_tree(func_var, parameters):
+    # runs the parsed body with its locals in a storage view of the function
+    func_parameters = func_var.parameters
+    storage = current_storage()
+    previous_view = storage.current_view_set.copy()
+    storage.add_view(func_var.name)
+    storage.current_view_set = func_var.view
+    # the view is removed even when the body raises, so a failed call leaves no locals behind
+    try:
+        for i in range(len(parameters)):
+            new_var = copy(parameters[i])
+            new_var.name = func_parameters[i][0]
+            storage.add_variable(new_var)
+        return_value: Type[Variable] = None
+        for statement in func_var.value:
+            return_check = statement()
+            if isinstance(return_check, Result):
+                return_value = return_check.value
+                break
+        if return_value is not None:
+            return_value = copy(return_value)
+    finally:
+        storage.remove_view(func_var.name)
+        storage.current_view_set = previous_view
     return return_value
 
 def _top():
-    return Integer(value=global_robot.move_top())
+    return Integer(value=current_robot().move_top())
 
 def _bottom():
-    return Integer(value=global_robot.move_down())
+    return Integer(value=current_robot().move_down())
 
 def _left():
-    return Integer(value=global_robot.move_left())
+    return Integer(value=current_robot().move_left())
 
 def _right():
-    return Integer(value=global_robot.move_right())
+    return Integer(value=current_robot().move_right())
+
+_actions = {"top": _top, "bottom": _bottom, "left": _left, "right": _right}
+
+def _action(name):
+    return _actions[name]
+
+def _distance(direction=None):
+    return Integer(value=current_robot().exit_distance(direction))
+
+def _region(direction=None):
+    return Integer(value=current_robot().region(direction))
 
 def _bind(key):
     if callable(key):
         key = key()
     if type(key) != String:
         raise ValueError(f"Key must be of type String, not {type(key)}.")
-    global_robot.bind(key.value)
+    current_robot().bind(key.value)
 
 def _timeshift(value):
     if callable(value):
@@ -128,4 +175,4 @@ def _timeshift(value):
     if type(value) != Integer and type(value) != String:
         raise ValueError(f"Value must be of type Integer or String, not {type(value)}.")
     value = value.value
-    return global_robot.timeshift(value)
\ No newline at end of file
+    return current_robot().timeshift(value)
\ No newline at end of file
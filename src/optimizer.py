@@ -0,0 +1,169 @@
+import operator
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .bison import CommitedOperation
+from .classes import *
+from .methods import methods
+
+# operators evaluated ahead of time when all their operands are literals
+FOLDABLE = {operator.add, operator.sub, operator.mul, operator.truediv, operator.mod,
+            operator.eq, operator.gt, operator.lt}
+LITERALS = {Integer: "integer", String: "string"}
+# operations whose first argument is used as a variable rather than read for its value
+_TARGETS = {methods._setattr, methods._append, methods._getitem, methods._size, methods._dereference}
+
+
+def _literal(node):
+    """
+    :return: the variable type of a literal node or None if the node is not a literal
+    """
+    if (isinstance(node, CommitedOperation) and node.func in LITERALS and not node.args
+            and list(node.kwargs) == ["value"] and node.kwargs["value"] is not None):
+        return node.func
+    return None
+
+
+def _is_function(node) -> bool:
+    return node.func is init_variable and node.kwargs.get("type") in ("function", FunctionType)
+
+
+def _scan(node, declared: Counter, written: set, in_pointer: bool = False):
+    """
+    Counts the declarations of every name in a function, nested functions included, and collects
+    the names that are used as variables: assigned, appended to, referenced, called or read into
+    a pointer. Only the remaining names can be replaced by their value.
+    """
+    if type(node) is list:
+        for item in node:
+            _scan(item, declared, written, in_pointer)
+        return
+    if not isinstance(node, CommitedOperation):
+        return
+    func = node.func
+    if func is methods._lookup:
+        if in_pointer:
+            written.add(node.args[0])
+        return
+    if func is init_variable:
+        declared[node.kwargs.get("name")] += 1
+        for name, _ in node.kwargs.get("parameters") or []:
+            declared[name] += 1
+        in_pointer = in_pointer or node.kwargs.get("type") == "pointer"
+    if func is Pointer.create_ref:
+        in_pointer = True
+    for index, arg in enumerate(node.args):
+        if index == 0 and func in _TARGETS and isinstance(arg, CommitedOperation) and arg.func is methods._lookup:
+            written.add(arg.args[0])
+        _scan(arg, declared, written, in_pointer)
+    for key, value in node.kwargs.items():
+        if key == "func_var" and isinstance(value, CommitedOperation) and value.func is methods._lookup:
+            written.add(value.args[0])
+        _scan(value, declared, written, in_pointer)
+
+
+def fold(node, constants: Dict[str, Tuple[type, object]] = None):
+    """
+    Rebuilds an expression with its constant subexpressions evaluated and the known constants
+    inlined. Operations that fail on their literals are left to fail at run time.
+    """
+    if type(node) is list:
+        return [fold(item, constants) for item in node]
+    if not isinstance(node, CommitedOperation):
+        return node
+    func = node.func
+    if func is methods._lookup:
+        if constants and type(node.args[0]) is str and node.args[0] in constants:
+            var_type, value = constants[node.args[0]]
+            return CommitedOperation(var_type, value=value).located(node)
+        return node
+    args = [fold(arg, constants) for arg in node.args]
+    kwargs = {key: fold(value, constants) for key, value in node.kwargs.items()}
+    folded = CommitedOperation(func, *args, **kwargs).located(node)
+    if func in FOLDABLE and not kwargs and all(_literal(arg) for arg in args):
+        try:
+            result = func(*(arg() for arg in args))
+        except Exception:
+            return folded
+        if type(result) in LITERALS and result.value is not None:
+            return CommitedOperation(type(result), value=result.value).located(node)
+    return folded
+
+
+def _optimize_block(statements, constants: Dict) -> List:
+    if type(statements) is not list:
+        return statements
+    result = []
+    for statement in statements:
+        optimized = _optimize_statement(statement, constants)
+        if optimized is not None:
+            result.append(optimized)
+    return result
+
+
+def _optimize_statement(statement, constants: Dict):
+    if not isinstance(statement, CommitedOperation):
+        return statement
+    func = statement.func
+    if func is init_variable and _is_function(statement):
+        return optimize_function(statement)
+    if func is methods._while:
+        condition, *blocks = statement.args
+        return CommitedOperation(func, fold(condition, constants),
+                                 *(_optimize_block(block, constants) for block in blocks),
+                                 **statement.kwargs).located(statement)
+    if func is methods._if:
+        condition, *blocks = statement.args
+        condition = fold(condition, constants)
+        blocks = [_optimize_block(block, constants) for block in blocks]
+        if _literal(condition):
+            try:
+                taken = bool(condition() == Integer(value=0))
+            except Exception:
+                return CommitedOperation(func, condition, *blocks).located(statement)
+            block = blocks[0] if taken else (blocks[1] if len(blocks) > 1 else None)
+            # the block keeps the break and return handling of the checkzero it replaces
+            return CommitedOperation(methods._block, block).located(statement) if block is not None else None
+        return CommitedOperation(func, condition, *blocks).located(statement)
+    if func is methods._block:
+        return CommitedOperation(func, _optimize_block(statement.args[0], constants)).located(statement)
+    return fold(statement, constants)
+
+
+def optimize_function(declaration: CommitedOperation) -> CommitedOperation:
+    """
+    Optimizes the body of a function declaration. Integer and string variables declared once at
+    the top level of the body with a literal value and never used as a variable are inlined in
+    the statements that follow their declaration; the declaration itself stays.
+    """
+    body = declaration.kwargs.get("value")
+    if type(body) is not list:
+        return declaration
+    declared, written = Counter(), set()
+    _scan(declaration, declared, written)
+    constants = {}
+    result = []
+    for statement in body:
+        optimized = _optimize_statement(statement, constants)
+        if optimized is None:
+            continue
+        result.append(optimized)
+        if optimized.func is init_variable and not _is_function(optimized):
+            name, var_type = optimized.kwargs.get("name"), optimized.kwargs.get("type")
+            literal = _literal(optimized.kwargs.get("value"))
+            if (literal is not None and LITERALS[literal] == var_type and declared[name] == 1
+                    and name not in written and set(optimized.kwargs) == {"type", "name", "value"}):
+                constants[name] = (literal, optimized.kwargs["value"].kwargs["value"])
+    kwargs = dict(declaration.kwargs)
+    kwargs["value"] = result
+    return CommitedOperation(declaration.func, *declaration.args, **kwargs).located(declaration)
+
+
+def optimize_program(program: Iterable) -> Iterator:
+    """
+    Folds constant expressions, drops checkzero branches decided by a constant condition and
+    inlines constant locals, one top-level statement at a time. The result runs the same way as
+    the input in both the tree walking and the compiled mode.
+    """
+    for statement in program:
+        yield _optimize_statement(statement, {})
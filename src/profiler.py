@@ -0,0 +1,275 @@
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+from types import FunctionType
+from .bison import CommitedOperation
+from .classes import *
+from .methods import methods
+
+TOP_LEVEL = "<script>"
+
+
+def _label(function: str, line) -> str:
+    return f"{function}:{line if line is not None else '?'}"
+
+
+def format_collapsed(stacks: Counter, scale: float = 1e6) -> List[str]:
+    """
+    :param stacks: path of frame labels -> weight
+    :param scale: factor turning the weights into the integer counts of the format
+    :return: lines of the collapsed stack format read by flamegraph.pl and speedscope,
+        "main;main:12;fib;fib:4 120"
+    """
+    lines = []
+    for path, weight in sorted(stacks.items()):
+        count = int(round(weight * scale))
+        if count > 0:
+            lines.append(f"{';'.join(path)} {count}")
+    return lines
+
+
+def write_collapsed(filename: str, stacks: Counter, scale: float = 1e6):
+    with open(filename, "w") as f:
+        for line in format_collapsed(stacks, scale):
+            f.write(line + "\n")
+
+
+class Probe(CommitedOperation):
+    """
+    Statement of an instrumented tree: runs the operation it replaces between the enter and exit
+    of the profiler.
+    """
+    def __init__(self, profiler: 'Profiler', statement: CommitedOperation, function: str):
+        super().__init__(statement.func, *statement.args, **statement.kwargs)
+        self.located(statement)
+        self.profiler = profiler
+        self.key = (function, statement.line, statement.column)
+        self.label = _label(function, statement.line)
+
+    def __call__(self):
+        profiler = self.profiler
+        profiler.enter(self.label, self.key)
+        try:
+            return CommitedOperation.__call__(self)
+        finally:
+            profiler.exit(profiler.statements, self.key)
+
+
+class FunctionProbe(CommitedOperation):
+    """
+    Function declaration of an instrumented tree: the declared function runs its calls through
+    the profiler.
+    """
+    def __init__(self, profiler: 'Profiler', declaration: CommitedOperation, value):
+        kwargs = dict(declaration.kwargs)
+        kwargs["value"] = value
+        super().__init__(declaration.func, *declaration.args, **kwargs)
+        self.located(declaration)
+        self.profiler = profiler
+
+    def __call__(self):
+        func = CommitedOperation.__call__(self)
+        func.code = Profiled(self.profiler, func.code)
+        return func
+
+
+class Profiled:
+    """
+    Code of a function that counts its calls and the time spent in them. Wraps the code of the
+    function, or its parsed body when code is None.
+    """
+    def __init__(self, profiler: 'Profiler', code=None):
+        self.profiler = profiler
+        self.code = code
+
+    def __call__(self, func_var: Function, parameters: List[Type[Variable]]):
+        profiler = self.profiler
+        profiler.enter(func_var.name, func_var.name)
+        try:
+            if self.code is not None:
+                return self.code(func_var, parameters)
+            return methods._run_tree(func_var, parameters)
+        finally:
+            profiler.exit(profiler.functions, func_var.name)
+
+
+class Profiler:
+    """
+    Deterministic profile of an instrumented program: the number of executions, the total time
+    and the own time, without the nested statements and calls, of every statement and function.
+    Time spent in recursive activations is added to the total of the outermost one only. Only
+    the program returned by instrument is measured, the uninstrumented tree runs as fast as ever.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        # (function, line, column) -> [count, total, own]
+        self.statements: Dict[Tuple[str, int, int], List] = {}
+        # name -> [calls, total, own]
+        self.functions: Dict[str, List] = {}
+        # path of frame labels -> own time
+        self.stacks: Counter = Counter()
+        self._path: List[str] = []
+        # [start, time of the nested frames] of every open frame
+        self._frames: List[List[float]] = []
+        self._active: Counter = Counter()
+
+    def enter(self, label: str, key):
+        self._path.append(label)
+        self._active[key] += 1
+        self._frames.append([self.clock(), 0.0])
+
+    def exit(self, table: Dict, key):
+        start, nested = self._frames.pop()
+        elapsed = self.clock() - start
+        own = elapsed - nested
+        if self._frames:
+            self._frames[-1][1] += elapsed
+        self.stacks[tuple(self._path)] += own
+        self._path.pop()
+        self._active[key] -= 1
+        record = table.get(key)
+        if record is None:
+            record = table[key] = [0, 0.0, 0.0]
+        record[0] += 1
+        record[2] += own
+        # the total of the outermost activation already covers the recursive ones
+        if not self._active[key]:
+            record[1] += elapsed
+
+    def _instrument_block(self, statements, function: str):
+        if type(statements) is not list:
+            return statements
+        return [self._instrument(statement, function) for statement in statements]
+
+    def _instrument(self, statement, function: str):
+        if not isinstance(statement, CommitedOperation):
+            return statement
+        func = statement.func
+        if func is init_variable and statement.kwargs.get("type") in ("function", FunctionType):
+            name = statement.kwargs.get("name")
+            return FunctionProbe(self, statement, self._instrument_block(statement.kwargs.get("value"), name))
+        if func is methods._while or func is methods._if:
+            condition, *blocks = statement.args
+            rebuilt = CommitedOperation(func, condition, *(self._instrument_block(block, function) for block in blocks),
+                                        **statement.kwargs).located(statement)
+            return Probe(self, rebuilt, function)
+        if func is methods._block:
+            rebuilt = CommitedOperation(func, self._instrument_block(statement.args[0], function)).located(statement)
+            return Probe(self, rebuilt, function)
+        return Probe(self, statement, function)
+
+    def instrument(self, program: Iterable) -> Iterator:
+        """
+        Rebuilds the top-level statements one at a time with every statement of every function
+        body measured. Statements have a line only when the script was parsed by the python
+        frontend; without it the statements of a function are told apart by nothing.
+        """
+        for statement in program:
+            yield self._instrument(statement, TOP_LEVEL)
+
+    def format_profile(self, limit: int = None) -> str:
+        """
+        :param limit: number of statements shown, all by default
+        :return: flat profile of the functions, then of the statements, by own time
+        """
+        lines = [f"{'calls':>10} {'total s':>10} {'own s':>10}  function"]
+        for name, (count, total, own) in sorted(self.functions.items(), key=lambda item: -item[1][2]):
+            lines.append(f"{count:>10} {total:>10.6f} {own:>10.6f}  {name}")
+        lines.append("")
+        lines.append(f"{'count':>10} {'total s':>10} {'own s':>10}  statement")
+        statements = sorted(self.statements.items(), key=lambda item: -item[1][2])
+        for (function, line, column), (count, total, own) in statements[:limit]:
+            location = _label(function, line) + (f":{column}" if column is not None else "")
+            lines.append(f"{count:>10} {total:>10.6f} {own:>10.6f}  {location}")
+        return "\n".join(lines)
+
+    def collapsed(self) -> List[str]:
+        """
+        :return: own time of every stack of functions and statements in microseconds, in the
+            collapsed stack format
+        """
+        return format_collapsed(self.stacks)
+
+    def write_collapsed(self, filename: str):
+        write_collapsed(filename, self.stacks)
+
+
+class Sampler:
+    """
+    Statistical profile of a running script. A background thread looks at the Python stack of
+    the interpreting thread every interval and counts the script stack found in it: the called
+    functions and, for a tree walking run of a script parsed by the python frontend, the lines
+    of the running statements. The stackless mode keeps its calls off the Python stack, they
+    are not seen. Nothing in the program is changed, so the run itself pays only for the time
+    the sampling thread holds the interpreter lock.
+    """
+    def __init__(self, interval: float = 0.001, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self, frame) -> Tuple[str, ...]:
+        """
+        :return: labels of the script frames found in the Python frames, outermost first
+        """
+        from .compiler import CompiledFunction
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        path = []
+        function = TOP_LEVEL
+        for frame in reversed(frames):
+            code = frame.f_code
+            if code is methods._run_tree.__code__ or code is CompiledFunction.__call__.__code__:
+                function = frame.f_locals["func_var"].name
+                path.append(function)
+            elif code is CommitedOperation.__call__.__code__:
+                line = frame.f_locals["self"].line
+                if line is not None:
+                    label = _label(function, line)
+                    if path[-1:] != [label]:
+                        path.append(label)
+        return tuple(path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            path = self.sample(frame)
+            if path:
+                self.stacks[path] += 1
+                self.samples += 1
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self) -> 'Sampler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def collapsed(self) -> List[str]:
+        """
+        :return: sample count of every stack, in the collapsed stack format
+        """
+        return format_collapsed(self.stacks, scale=1)
+
+    def write_collapsed(self, filename: str):
+        write_collapsed(filename, self.stacks, scale=1)
@@ -1 +1,3 @@
-from .robot import Robot, global_robot
\ No newline at end of file
+from .robot import Robot, current_robot, default_robot
+from .renderer import Renderer, FrameRenderer, AsyncRenderer, RENDERERS
+from .maze import Maze, DIRECTIONS, UNREACHABLE
\ No newline at end of file
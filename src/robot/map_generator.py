@@ -1,64 +1,96 @@
-from typing import List, Tuple
+import argparse
 import random
+from typing import List, Tuple
+
+WALL = ord("1")
+FREE = ord("0")
+
+
+def generate_grid(width: int, height: int, seed: int = None) -> bytearray:
+    """
+    Carves a perfect maze with an iterative depth first search: every free cell can be reached from
+    every other one by exactly one path. Cells are the odd rows and columns, the walls between them
+    are knocked down as the search goes. One exit is opened in the right border.
 
-def generate_map(size: int = 5) -> List[List[int]]:
-    def checkNeighbors(_y_pos, _x_pos):
-        neighbors = []
+    :param seed: seed of the random generator, the same seed gives the same maze
+    :return: the map as a flat grid of ASCII "0" and "1", row by row
+    """
+    if width < 3 or height < 3:
+        raise ValueError(f"Map must be at least 3x3, not {width}x{height}.")
+    rng = random.Random(seed)
+    grid = bytearray([WALL]) * (width * height)
+    # the last odd row and column inside the border
+    last_x = height - 2 if height % 2 == 1 else height - 3
+    last_y = width - 2 if width % 2 == 1 else width - 3
+    # the search runs on a grid of the cells alone, surrounded by visited cells so that it needs
+    # no bounds checks; a step to a neighbouring cell is a step of two in the map
+    columns = (last_y + 1) // 2 + 2
+    visited = bytearray([1]) * (columns * ((last_x + 1) // 2 + 2))
+    for row in range(1, (last_x + 1) // 2 + 1):
+        visited[row * columns + 1:(row + 1) * columns - 1] = bytes(columns - 2)
+    steps = ((-columns, -2 * width), (columns, 2 * width), (-1, -2), (1, 2))
+    random_choice = rng.random
+    cell, index = columns + 1, width + 1
+    visited[cell] = 1
+    grid[index] = FREE
+    stack = [(cell, index)]
+    while stack:
+        cell, index = stack[-1]
+        candidates = [step for step in steps if not visited[cell + step[0]]]
+        if not candidates:
+            stack.pop()
+            continue
+        cell_step, map_step = candidates[int(random_choice() * len(candidates))]
+        cell += cell_step
+        visited[cell] = 1
+        grid[index + map_step // 2] = FREE
+        index += map_step
+        grid[index] = FREE
+        stack.append((cell, index))
+    exit_x = 2 * rng.randrange((last_x + 1) // 2) + 1
+    for y in range(last_y + 1, width):
+        grid[exit_x * width + y] = FREE
+    return grid
 
-        top = None
-        right = None
-        bottom = None
-        left = None
 
-        if (_y_pos > 1):
-            top = grid[_y_pos - 2][_x_pos]
+def format_config(grid: bytearray, width: int, start: Tuple[int, int] = (1, 1)) -> bytes:
+    """
+    :return: the text of a config read by Robot.import_config: the start position, then the map
+        with its cells separated by spaces
+    """
+    height = len(grid) // width
+    text = bytearray(b" ") * (2 * len(grid))
+    text[0::2] = grid
+    text[2 * width - 1::2 * width] = b"\n" * height
+    return f"{start[0]} {start[1]}\n".encode() + bytes(text)
 
-        if (_x_pos < size - 2):
-            right = grid[_y_pos][_x_pos + 2]
 
-        if (_y_pos < size - 2):
-            bottom = grid[_y_pos + 2][_x_pos]
+def write_config(filename: str, width: int, height: int = None, seed: int = None):
+    """
+    Generates a maze and writes its config at once.
+    """
+    height = height if height is not None else width
+    with open(filename, "wb") as f:
+        f.write(format_config(generate_grid(width, height, seed), width))
 
-        if (_x_pos > 1):
-            left = grid[_y_pos][_x_pos - 2]
 
-        if top:
-            neighbors.append((_y_pos - 2, _x_pos))
-        if right and not right.visited:
-            neighbors.append((_y_pos, _x_pos + 2))
-        if bottom and not bottom.visited:
-            neighbors.append((_y_pos + 2, _x_pos))
-        if left and not left.visited:
-            neighbors.append((_y_pos, _x_pos - 2))
+def generate_map(size: int = 5, seed: int = None) -> List[List[int]]:
+    """
+    :return: a size by size maze as rows of 0 for free cells and 1 for walls
+    """
+    grid = generate_grid(size, size, seed)
+    return [[cell - FREE for cell in grid[x * size:(x + 1) * size]] for x in range(size)]
 
-        if len(neighbors) > 0:
-            r = random.randint(0, len(neighbors) - 1)
-            return neighbors[r]
-        else:
-            return None
 
-    grid = []
-    for y in range(size):
-        grid.append([])
-        for x in range(size):
-            grid[y].append("1")
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog="map_generator", description="Generate a maze config for the robot")
+    parser.add_argument("width", type=int, help="Number of columns of the map")
+    parser.add_argument("height", type=int, nargs="?", default=None, help="Number of rows, the width by default")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="Seed of the maze, random by default")
+    parser.add_argument("-o", "--output", default="maze.config", help="Config file to write")
+    args = parser.parse_args(argv)
+    write_config(args.output, args.width, args.height, args.seed)
 
-    visited: List[Tuple[int, int]] = []
-    x_pos = 1
-    y_pos = 1
-    current_cell = grid[1][1]
-    stack = []
-    done = False
 
-    while not done:
-        current_cell.visited = True
-        next_cell = current_cell.checkNeighbors()
-        if next_cell != None:
-            stack.append(current_cell)
-            current_cell[x_pos][y_pos] = "0"
-            removeWalls(current_cell, next_cell)
-            current_cell = next_cell
-        elif len(stack) > 0:
-            current_cell = stack.pop()
-        else:
-            done = True
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from array import array
+from collections import deque
+from typing import List, Tuple
+
+UNREACHABLE = -1
+# row and column offsets of the moves, by the direction keyword of the language
+DIRECTIONS = {"top": (-1, 0), "bottom": (1, 0), "left": (0, -1), "right": (0, 1)}
+
+
+class Maze:
+    """
+    Index of a map built once per imported map: the free cells as a flat byte grid, the number of
+    moves from every free cell to the nearest exit, and connected component labels. A free cell on
+    the border is an exit; cells that reach no exit have distance UNREACHABLE, walls have label 0.
+    """
+    def __init__(self, grid: List[List[int]]):
+        self.height = len(grid)
+        self.width = len(grid[0]) if grid else 0
+        self.free = bytearray(self.width * self.height)
+        for x, row in enumerate(grid):
+            cells = bytes(map((0).__eq__, row[:self.width]))
+            self.free[x * self.width:x * self.width + len(cells)] = cells
+        self.distances = array("l", [UNREACHABLE]) * len(self.free)
+        self.components = array("l", [0]) * len(self.free)
+        self.component_count = 0
+        self._measure()
+        self._label()
+
+    def index(self, x: int, y: int) -> int:
+        """
+        :return: position of the cell in the flat grids, -1 if it is outside the map
+        """
+        if 0 <= x < self.height and 0 <= y < self.width:
+            return x * self.width + y
+        return -1
+
+    def is_free(self, x: int, y: int) -> bool:
+        index = self.index(x, y)
+        return index >= 0 and self.free[index] == 1
+
+    def is_exit(self, x: int, y: int) -> bool:
+        return self.is_free(x, y) and (x in (0, self.height - 1) or y in (0, self.width - 1))
+
+    def distance(self, x: int, y: int) -> int:
+        index = self.index(x, y)
+        return self.distances[index] if index >= 0 else UNREACHABLE
+
+    def component(self, x: int, y: int) -> int:
+        index = self.index(x, y)
+        return self.components[index] if index >= 0 else 0
+
+    def _neighbors(self, index: int):
+        x, y = divmod(index, self.width)
+        if x > 0 and self.free[index - self.width]:
+            yield index - self.width
+        if x < self.height - 1 and self.free[index + self.width]:
+            yield index + self.width
+        if y > 0 and self.free[index - 1]:
+            yield index - 1
+        if y < self.width - 1 and self.free[index + 1]:
+            yield index + 1
+
+    def _measure(self):
+        # breadth first search started from all the exits at once
+        distances = self.distances
+        border = {x * self.width + y for x in (0, self.height - 1) for y in range(self.width)}
+        border.update(x * self.width + y for x in range(self.height) for y in (0, self.width - 1))
+        queue = deque(sorted(index for index in border if self.free[index]))
+        for index in queue:
+            distances[index] = 0
+        while queue:
+            index = queue.popleft()
+            for neighbor in self._neighbors(index):
+                if distances[neighbor] == UNREACHABLE:
+                    distances[neighbor] = distances[index] + 1
+                    queue.append(neighbor)
+
+    def _label(self):
+        components = self.components
+        for start in range(len(self.free)):
+            if not self.free[start] or components[start]:
+                continue
+            self.component_count += 1
+            components[start] = self.component_count
+            stack = [start]
+            while stack:
+                for neighbor in self._neighbors(stack.pop()):
+                    if not components[neighbor]:
+                        components[neighbor] = self.component_count
+                        stack.append(neighbor)
+
+    def shortest_path(self, x: int, y: int) -> List[Tuple[int, int]]:
+        """
+        :return: cells of a shortest way from the cell to an exit, both included, or an empty list
+            if no exit can be reached
+        """
+        index = self.index(x, y)
+        if index < 0 or self.distances[index] == UNREACHABLE:
+            return []
+        path = [divmod(index, self.width)]
+        while self.distances[index] > 0:
+            index = next(neighbor for neighbor in self._neighbors(index)
+                         if self.distances[neighbor] == self.distances[index] - 1)
+            path.append(divmod(index, self.width))
+        return path
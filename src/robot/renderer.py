@@ -0,0 +1,119 @@
+import sys
+import threading
+from typing import Tuple, TextIO
+
+CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+
+class Renderer:
+    """
+    Receives the moves of a robot. The base renderer is headless: it does no I/O at all.
+    """
+    def moved(self, robot, position: Tuple[int, int]):
+        pass
+
+    def exited(self, robot, position: Tuple[int, int]):
+        pass
+
+    def close(self):
+        pass
+
+
+class FrameRenderer(Renderer):
+    """
+    Redraws the map after every move, each frame is built as a single string and written at once.
+    """
+    def __init__(self, stream: TextIO = None, delay: float = 0.2, clear: bool = True):
+        self.stream = stream
+        self.delay = delay
+        self.clear = clear
+        self.rows = None
+        self.rows_map = None
+
+    def write(self, text: str):
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(text)
+        stream.flush()
+
+    def frame(self, robot, position: Tuple[int, int]) -> str:
+        if self.rows_map is not robot.imported_map:
+            self.rows = ["".join("_ " if cell == 0 else "# " for cell in row) for row in robot.imported_map]
+            self.rows_map = robot.imported_map
+        rows = self.rows.copy()
+        x, y = position
+        rows[x] = rows[x][:2 * y] + "R" + rows[x][2 * y + 1:]
+        return "\n".join(rows) + "\n"
+
+    def moved(self, robot, position: Tuple[int, int]):
+        x, y = position
+        text = f"Robot has moved to position ({x}, {y}).\n"
+        if robot.imported_map[x][y] == 0:
+            text = (CLEAR_SCREEN if self.clear else text) + self.frame(robot, position)
+        self.write(text)
+        if self.delay:
+            robot.wait(self.delay)
+
+    def exited(self, robot, position: Tuple[int, int]):
+        self.write(f"Robot has reached the exit at position ({position[0]}, {position[1]}).\nPath: {robot.path_log}\n")
+
+
+class AsyncRenderer(FrameRenderer):
+    """
+    Draws frames from a background thread at most fps times a second. Moves only replace the
+    pending frame, so the robot is never slowed down and frames are dropped under load.
+    """
+    def __init__(self, stream: TextIO = None, fps: float = 30, clear: bool = True):
+        super().__init__(stream=stream, delay=0, clear=clear)
+        self.interval = 1 / fps
+        self.pending = None
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def moved(self, robot, position: Tuple[int, int]):
+        with self.lock:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = (robot, tuple(position), len(robot.path_log))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._draw_loop, name="robot-viewer", daemon=True)
+            self.thread.start()
+        self.ready.set()
+
+    def draw_pending(self):
+        with self.lock:
+            pending, self.pending = self.pending, None
+        if pending is None:
+            return
+        robot, position, moves = pending
+        status = f"Robot at ({position[0]}, {position[1]}), {moves} moves, {self.dropped} frames dropped.\n"
+        self.write((CLEAR_SCREEN if self.clear else "") + self.frame(robot, position) + status)
+
+    def _draw_loop(self):
+        while not self.stopping.is_set():
+            self.ready.wait()
+            self.ready.clear()
+            self.draw_pending()
+            self.stopping.wait(self.interval)
+
+    def exited(self, robot, position: Tuple[int, int]):
+        self.close()
+        super().exited(robot, position)
+
+    def close(self):
+        self.stopping.set()
+        self.ready.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+        self.draw_pending()
+        self.stopping.clear()
+
+
+RENDERERS = {
+    "headless": Renderer,
+    "terminal": FrameRenderer,
+    "async": AsyncRenderer,
+}
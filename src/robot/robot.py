@@ -1,33 +1,66 @@
-from typing import List, Tuple, Union, Dict
 import os
+import threading
 import time
+from typing import List, Tuple, Union, Dict
+from contextvars import ContextVar
+from .renderer import Renderer, FrameRenderer
+from .maze import DIRECTIONS, Maze
+from ..limits import ExitReached
+
 class Robot:
     position: List[int] = [0, 0]
     imported_map: List[List[int]] = None
     path_log: List[Tuple[int, int]] = None
     memory: Dict[str, Tuple[int, int]] = None
+    renderer: Renderer = None
+    _maze: Maze = None
+    _maze_map: List[List[int]] = None
+    # set while an async run drives the robot, the animation delays are then collected for the
+    # run to await instead of blocking the thread
+    asynchronous: bool = False
+    pending_delay: float = 0.0
 
-    def __init__(self):
+    def __init__(self, renderer: Renderer = None):
         self.path_log = []
         self.memory = {}
         self.position = [1, 1]
         self.imported_map = []
+        self.renderer = renderer if renderer is not None else Renderer()
 
     def import_config(self, file_path: str):
         with open(file_path, "r") as f:
             self.position = list(map(int, f.readline().split()))
             self.imported_map = [[int(i) for i in line.split()] for line in f.readlines()]
+        self._maze = Maze(self.imported_map)
+        self._maze_map = self.imported_map
+
+    @property
+    def maze(self) -> Maze:
+        """
+        Index of the imported map, rebuilt when another map is assigned to imported_map.
+        """
+        if self._maze_map is not self.imported_map:
+            if not self.imported_map:
+                raise RuntimeError("No map is imported.")
+            self._maze = Maze(self.imported_map)
+            self._maze_map = self.imported_map
+        return self._maze
+
+    def wait(self, seconds: float):
+        if self.asynchronous:
+            self.pending_delay += seconds
+        else:
+            time.sleep(seconds)
+
+    def take_delay(self) -> float:
+        """
+        :return: the delays collected since the last call
+        """
+        delay, self.pending_delay = self.pending_delay, 0.0
+        return delay
 
     def draw_map(self):
-        for i in range(len(self.imported_map)):
-            for j in range(len(self.imported_map[i])):
-                if self.position[0] == i and self.position[1] == j:
-                    print("R", end=" ")
-                elif self.imported_map[i][j] == 0:
-                    print("_", end=" ")
-                else:
-                    print("#", end=" ")
-            print()
+        print(FrameRenderer().frame(self, self.position), end="")
 
     def set_pos(self, new_pos: Tuple[int, int]):
         x = new_pos[0]
@@ -35,14 +68,10 @@ class Robot:
         self.position[0] = x
         self.position[1] = y
         self.path_log.append(new_pos)
-        print(f"Robot has moved to position ({x}, {y}).")
-        if self.imported_map[x][y] == 0:
-            os.system('clear')
-            self.draw_map()
-            time.sleep(0.2)
-            if x == 0 or x == len(self.imported_map) - 1 or y == 0 or y == len(self.imported_map[0]) - 1:
-                print(f"Robot has reached the exit at position ({x}, {y}).\nPath: {self.path_log}")
-                exit(0)
+        self.renderer.moved(self, new_pos)
+        if self.maze.is_exit(x, y):
+            self.renderer.exited(self, new_pos)
+            raise ExitReached(new_pos)
 
     def timeshift(self, value: Union[int, str]):
         if type(value) is str:
@@ -62,30 +91,69 @@ class Robot:
     def bind(self, key: str):
         self.memory[key] = (self.position[0], self.position[1])
 
-    def move_top(self):
-        if self.position[0] > 0 and self.imported_map[self.position[0] - 1][self.position[1]] == 0:
-            self.set_pos((self.position[0] - 1, self.position[1]))
+    def _neighbor(self, direction: str = None) -> Tuple[int, int]:
+        if direction is None:
+            return self.position[0], self.position[1]
+        dx, dy = DIRECTIONS[direction]
+        return self.position[0] + dx, self.position[1] + dy
+
+    def move(self, direction: str) -> int:
+        new_pos = self._neighbor(direction)
+        if self.maze.is_free(*new_pos):
+            self.set_pos(new_pos)
             return 1
         return 0
 
+    def move_top(self):
+        return self.move("top")
+
     def move_down(self):
-        if self.position[0] < len(self.imported_map) - 1 and self.imported_map[self.position[0] + 1][self.position[1]] == 0:
-            self.set_pos((self.position[0] + 1, self.position[1]))
-            return 1
-        return 0
+        return self.move("bottom")
 
     def move_left(self):
-        if self.position[1] > 0 and self.imported_map[self.position[0]][self.position[1] - 1] == 0:
-            self.set_pos((self.position[0], self.position[1] - 1))
-            return 1
-        return 0
+        return self.move("left")
 
     def move_right(self):
-        if self.position[1] < len(self.imported_map[0]) - 1 and self.imported_map[self.position[0]][self.position[1] + 1] == 0:
-            self.set_pos((self.position[0], self.position[1] + 1))
-            return 1
-        return 0
+        return self.move("right")
+
+    def exit_distance(self, direction: str = None) -> int:
+        """
+        :return: moves from the robot's cell, or the neighbouring one in the direction, to the
+            nearest exit; -1 for walls and cells no exit can be reached from
+        """
+        return self.maze.distance(*self._neighbor(direction))
+
+    def region(self, direction: str = None) -> int:
+        """
+        :return: label of the connected free area of the robot's cell, or the neighbouring one in
+            the direction, the same for cells that can reach each other; 0 for walls
+        """
+        return self.maze.component(*self._neighbor(direction))
+
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs", "3.config")
+_default_robot: Robot = None
+_default_lock = threading.Lock()
+_current_robot: ContextVar = ContextVar("robot", default=None)
+
+
+def default_robot() -> Robot:
+    """
+    :return: robot driven outside of any runtime, placed on DEFAULT_CONFIG when first used
+    """
+    global _default_robot
+    if _default_robot is None:
+        with _default_lock:
+            if _default_robot is None:
+                robot = Robot(renderer=FrameRenderer())
+                robot.import_config(DEFAULT_CONFIG)
+                _default_robot = robot
+    return _default_robot
 
 
-global_robot: Robot = Robot()
-global_robot.import_config("./src/robot/configs/3.config")
\ No newline at end of file
+def current_robot() -> Robot:
+    """
+    :return: robot of the runtime active in the current context, default_robot() if there is none
+    """
+    robot = _current_robot.get()
+    return robot if robot is not None else default_robot()
\ No newline at end of file
@@ -0,0 +1,148 @@
+import time
+from contextvars import ContextVar, copy_context
+from typing import Callable, List, Type
+
+from .asynchronous import call_async
+from .bison import compile_script
+from .classes import Storage, Variable
+from .classes.storage import _current_storage
+from .limits import ExitReached, Limits, Terminated, _current_limits
+from .methods import methods
+from .robot import Robot, Renderer
+from .robot.robot import _current_robot
+
+_current_runtime: ContextVar = ContextVar("runtime", default=None)
+
+
+class RunResult:
+    """
+    How a run ended. The status is "returned" when main returned its value, "error" when the
+    script failed, or the reason of the Terminated that stopped it: "exit", "budget", "timeout"
+    or "cancelled".
+    """
+    def __init__(self, status: str, value=None, error: str = None, steps: int = None, wall_time: float = 0.0):
+        self.status = status
+        self.value = value
+        self.error = error
+        # loop iterations and calls made, counted only for runs with limits
+        self.steps = steps
+        self.wall_time = wall_time
+
+    @property
+    def exit_reached(self) -> bool:
+        return self.status == ExitReached.reason
+
+    def __repr__(self):
+        return f"RunResult(status={self.status!r}, value={self.value!r}, error={self.error!r}, steps={self.steps})"
+
+
+class Runtime:
+    """
+    State of one running program: its variable storage, the robot it drives and the limits of
+    the run. Code run through a runtime sees only its state, so programs can run side by side in
+    threads or asyncio tasks. Outside of any runtime the interpreter falls back to global_storage
+    and default_robot(), and runs without limits.
+    """
+    storage: Storage = None
+    robot: Robot = None
+    limits: Limits = None
+
+    def __init__(self, robot: Robot = None, storage: Storage = None, config: str = None, limits: Limits = None):
+        self.robot = robot if robot is not None else Robot(renderer=Renderer())
+        self.storage = storage if storage is not None else Storage()
+        self.limits = limits
+        if config is not None:
+            self.robot.import_config(config)
+
+    def _activate(self):
+        _current_runtime.set(self)
+        _current_storage.set(self.storage)
+        _current_robot.set(self.robot)
+        _current_limits.set(self.limits)
+
+    def run(self, func: Callable, *args, **kwargs):
+        """
+        Calls func in a copy of the current context with this runtime active.
+        """
+        context = copy_context()
+        context.run(self._activate)
+        return context.run(func, *args, **kwargs)
+
+    def execute(self, filename: str, parameters: List[Type[Variable]] = None, **options):
+        """
+        Compiles the script and calls its main function in this runtime. The limits start with
+        the call, the script is compiled without them.
+
+        :param options: keyword arguments of compile_script
+        :return: the value returned by main
+        :raises Terminated: when the robot reaches the exit or the run goes over its limits
+        """
+        def execute():
+            main_func = compile_script(filename, **options)
+            if self.limits is not None:
+                self.limits.start()
+            return methods._function_call(main_func, parameters=parameters or [])
+        return self.run(execute)
+
+    async def execute_async(self, filename: str, parameters: List[Type[Variable]] = None, **options):
+        """
+        Compiles the script for the async mode and awaits its main function in this runtime. The
+        run pauses at every robot action and loop iteration and awaits the animation delays, so
+        the runs of many runtimes can share one event loop. The script is parsed and compiled
+        without pausing.
+
+        :param options: keyword arguments of compile_script
+        :return: the value returned by main
+        :raises Terminated: when the robot reaches the exit or the run goes over its limits
+        """
+        context = copy_context()
+        context.run(self._activate)
+        main_func = context.run(compile_script, filename, asynchronous=True, **options)
+        if self.limits is not None:
+            self.limits.start()
+        return await call_async(main_func, parameters or [], context)
+
+    def _report(self, started: float, value=None, error: Exception = None) -> RunResult:
+        if error is None:
+            result = RunResult("returned", value)
+        elif isinstance(error, ExitReached):
+            result = RunResult(ExitReached.reason)
+        elif isinstance(error, Terminated):
+            result = RunResult(error.reason, error=str(error))
+        else:
+            result = RunResult("error", error=f"{type(error).__name__}: {error}")
+        result.wall_time = time.perf_counter() - started
+        result.steps = self.limits.steps if self.limits is not None else None
+        return result
+
+    def run_script(self, filename: str, parameters: List[Type[Variable]] = None, **options) -> RunResult:
+        """
+        Executes the script and reports how it ended instead of raising, so one failing or runaway
+        script does not stop the caller.
+        """
+        started = time.perf_counter()
+        try:
+            value = self.execute(filename, parameters, **options)
+        except Exception as e:
+            return self._report(started, error=e)
+        return self._report(started, value)
+
+    async def run_script_async(self, filename: str, parameters: List[Type[Variable]] = None,
+                               **options) -> RunResult:
+        """
+        Awaits execute_async and reports how the run ended like run_script. Cancelling the task
+        still raises asyncio.CancelledError.
+        """
+        started = time.perf_counter()
+        try:
+            value = await self.execute_async(filename, parameters, **options)
+        except Exception as e:
+            return self._report(started, error=e)
+        return self._report(started, value)
+
+
+def current_runtime() -> Runtime:
+    """
+    :return: the runtime active in the current context or None
+    """
+    return _current_runtime.get()
@@ -0,0 +1,457 @@
+from copy import copy
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+from types import FunctionType
+from .classes import *
+from .methods import methods
+from .bison import CommitedOperation
+from .compiler import CompiledFunction, Frame, Scope, _declare_all, _is_escape, compile_node
+from .limits import current_limits
+from .memo import MISSING, Memoized
+
+# operations that move the robot, bodies compiled with pausing pause after every one of them
+ACTIONS = {methods._top, methods._bottom, methods._left, methods._right, methods._timeshift, methods._action}
+
+
+class StackFrame(Frame):
+    """
+    Frame of a stackless call. A frame a nested function was declared in is captured by that
+    function and never goes back to the pool.
+    """
+    __slots__ = ("captured",)
+
+    def __init__(self, size: int, parent: Frame = None):
+        super().__init__(size, parent)
+        self.captured = False
+
+
+class Call:
+    """
+    Request of a running function body to the interpreter: call func with the parameters and send
+    back the result, or with tail set, replace the running function by the call.
+    """
+    __slots__ = ("func", "parameters", "tail")
+
+    def __init__(self, func, parameters: List[Type[Variable]], tail: bool = False):
+        self.func = func
+        self.parameters = parameters
+        self.tail = tail
+
+
+class Pause:
+    """
+    Request of a running function body to let other work run before it goes on, made after
+    every robot action and loop iteration of bodies compiled with pausing. The interpreter
+    passes it on to whoever drives it, run ignores it.
+    """
+    __slots__ = ()
+
+
+PAUSE = Pause()
+
+
+class StacklessScope(Scope):
+    """
+    Scope of a stackless function, nested functions are compiled with the pausing of the
+    function they are declared in.
+    """
+    def __init__(self, parent: Scope = None, pausing: bool = False):
+        super().__init__(parent)
+        self.pausing = pausing or getattr(parent, "pausing", False)
+
+
+class StacklessFunction(CompiledFunction):
+    """
+    Body of a script function compiled into a generator that yields a Call for every call it
+    makes instead of making it, so the Python stack does not grow with the script's.
+    """
+    def compile(self):
+        _declare_all(self.source, self.scope)
+        self.size = len(self.scope.slots)
+        self.body = _compile_block(self.source, self.scope) if type(self.source) is list else []
+
+    def start(self, frame: Frame):
+        for statement, suspends in self.body:
+            result = (yield from statement(frame)) if suspends else statement(frame)
+            if result is not None and isinstance(result, Result):
+                if result.value is not None:
+                    return copy(result.value)
+                return None
+        return None
+
+    def __call__(self, func_var: Function, parameters: List[Type[Variable]]):
+        return Interpreter().run(func_var, parameters)
+
+
+@lru_cache(maxsize=None)
+def _empty(size: int) -> Tuple:
+    return (None,) * size
+
+
+def _foreign(func_var: Function, code, parameters: List[Type[Variable]]):
+    # a function that was not compiled stackless is called on the Python stack
+    if code is not None:
+        return code(func_var, parameters)
+    return methods._run_tree(func_var, parameters)
+    yield
+
+
+def _remembered(value):
+    return value
+    yield
+
+
+class Interpreter:
+    """
+    Runs stackless function bodies on an explicit call stack. Frames of returned calls are kept
+    in a pool by size and reused, a tail call reuses nothing of the caller and drops it before
+    the callee runs. The results a memoized caller still has to remember move to its tail callee
+    and are stored when the callee returns.
+    """
+    def __init__(self):
+        self.pool: Dict[int, List[StackFrame]] = {}
+        self.max_depth = 0
+
+    def _acquire(self, size: int, parent: Frame) -> StackFrame:
+        frames = self.pool.get(size)
+        if frames:
+            frame = frames.pop()
+            frame.parent = parent
+            return frame
+        return StackFrame(size, parent)
+
+    def _release(self, frame: StackFrame):
+        if frame is None or frame.captured:
+            return
+        frame.slots[:] = _empty(len(frame.slots))
+        frame.parent = None
+        self.pool.setdefault(len(frame.slots), []).append(frame)
+
+    def _enter(self, func_var: Function, parameters: List[Type[Variable]]):
+        """
+        :return: body and frame of the call, and a list of the (memoized code, key) pairs its
+            result is stored under when it returns or None
+        """
+        methods._check_parameters(func_var, parameters)
+        code = func_var.code
+        if isinstance(code, Memoized):
+            key = code.key(parameters)
+            value = code.lookup(key)
+            if value is not MISSING:
+                return _remembered(value), None, None
+            body, frame = self._start(func_var, code.code, parameters)
+            return body, frame, [(code, key)]
+        body, frame = self._start(func_var, code, parameters)
+        return body, frame, None
+
+    def _start(self, func_var: Function, code, parameters: List[Type[Variable]]):
+        if type(code) is not StacklessFunction:
+            return _foreign(func_var, code, parameters), None
+        if code.body is None:
+            code.compile()
+        frame = self._acquire(code.size, func_var.closure)
+        slots = frame.slots
+        func_parameters = func_var.parameters
+        for i in range(len(parameters)):
+            new_var = copy(parameters[i])
+            new_var.name = func_parameters[i][0]
+            slots[i] = new_var
+        return code.start(frame), frame
+
+    def run(self, func_var: Function, parameters: List[Type[Variable]]):
+        """
+        Calls the function and every call it makes until it returns.
+
+        :return: the value returned by the function
+        """
+        steps = self.steps(func_var, parameters)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def steps(self, func_var: Function, parameters: List[Type[Variable]]) -> Iterator[Pause]:
+        """
+        Generator running the function like run, it yields at every pause of the bodies and
+        returns the value returned by the function.
+        """
+        stack: List[Tuple[Iterator, StackFrame, List]] = []
+        body, frame, pending = self._enter(func_var, parameters)
+        value = None
+        # the first call was counted by methods._function_call
+        limits = current_limits()
+        while True:
+            try:
+                request = body.send(value)
+            except StopIteration as stop:
+                self._release(frame)
+                if pending is not None:
+                    for memo, key in pending:
+                        memo.store(key, stop.value)
+                if not stack:
+                    return stop.value
+                body, frame, pending = stack.pop()
+                value = stop.value
+                continue
+            value = None
+            if request is PAUSE:
+                yield request
+                continue
+            if limits is not None:
+                limits.check()
+            callee, callee_frame, callee_pending = self._enter(request.func, request.parameters)
+            if request.tail:
+                # the parameters were copied into the callee's frame, nothing refers to the caller,
+                # whose result is the callee's
+                body.close()
+                self._release(frame)
+                if pending is None:
+                    pending = callee_pending
+                elif callee_pending is not None:
+                    pending.extend(callee_pending)
+            else:
+                stack.append((body, frame, pending))
+                if len(stack) > self.max_depth:
+                    self.max_depth = len(stack)
+                pending = callee_pending
+            body, frame = callee, callee_frame
+
+
+def _pausing(scope: Scope) -> bool:
+    return scope is not None and scope.pausing
+
+
+def _suspends(node, pausing: bool = False) -> bool:
+    """
+    :return: whether running the node can make a call, or pause with pausing set; function
+        declarations count as well, so that nested functions are compiled stackless too
+    """
+    if type(node) is list:
+        return any(_suspends(item, pausing) for item in node)
+    if not isinstance(node, CommitedOperation):
+        return False
+    if node.func is methods._function_call:
+        return True
+    if node.func is init_variable and node.kwargs.get("type") in ("function", FunctionType):
+        return True
+    if pausing and (node.func is methods._while or node.func in ACTIONS):
+        return True
+    return (any(_suspends(arg, pausing) for arg in node.args)
+            or any(_suspends(value, pausing) for value in node.kwargs.values()))
+
+
+def _compile_argument(value, scope: Scope) -> Tuple:
+    if isinstance(value, CommitedOperation):
+        compiled, suspends = _compile(value, scope)
+        return compiled, "suspend" if suspends else "frame"
+    if callable(value) and value != FunctionType:
+        return value, "call"
+    return value, None
+
+
+def _evaluate(argument: Tuple, frame: Frame):
+    value, mode = argument
+    if mode == "suspend":
+        return (yield from value(frame))
+    if mode == "frame":
+        return value(frame)
+    if mode == "call":
+        return value()
+    return value
+
+
+def _compile_block(statements, scope: Scope) -> List[Tuple[Callable, bool]]:
+    if statements is None:
+        return None
+    return [_compile(statement, scope) for statement in statements]
+
+
+def _run_block(statements, frame: Frame):
+    for statement, suspends in statements:
+        result = (yield from statement(frame)) if suspends else statement(frame)
+        if result is not None and _is_escape(result):
+            if isinstance(result, Break):
+                return Break()
+            return result
+    return None
+
+
+def _compile_while(scope: Scope, condition, body, instead=None):
+    condition = _compile_argument(condition, scope)
+    body = _compile_block(body, scope)
+    instead = _compile_block(instead, scope)
+    pausing = _pausing(scope)
+
+    def run_while(frame):
+        was_iterated = False
+        marker = Integer(value=0)
+        limits = current_limits()
+        while not ((yield from _evaluate(condition, frame)) == marker):
+            was_iterated = True
+            if limits is not None:
+                limits.check()
+            for statement, suspends in body:
+                result = (yield from statement(frame)) if suspends else statement(frame)
+                if result is not None and _is_escape(result):
+                    if isinstance(result, Break):
+                        return None
+                    return result
+            if pausing:
+                yield PAUSE
+        if not was_iterated and instead is not None:
+            for statement, suspends in instead:
+                if suspends:
+                    yield from statement(frame)
+                else:
+                    statement(frame)
+        return None
+    return run_while
+
+
+def _compile_if(scope: Scope, condition, body, instead=None):
+    condition = _compile_argument(condition, scope)
+    body = _compile_block(body, scope)
+    instead = _compile_block(instead, scope)
+
+    def run_if(frame):
+        marker = Integer(value=0)
+        if (yield from _evaluate(condition, frame)) == marker:
+            return (yield from _run_block(body, frame))
+        if instead is not None:
+            return (yield from _run_block(instead, frame))
+        return None
+    return run_if
+
+
+def _compile_call(operation: CommitedOperation, scope: Scope, tail: bool = False):
+    get_func = _compile_argument(operation.kwargs["func_var"], scope)
+    parameters = [_compile_argument(parameter, scope) for parameter in operation.kwargs["parameters"]]
+
+    def call(frame):
+        func = yield from _evaluate(get_func, frame)
+        if callable(func):
+            func = func()
+        values = []
+        for parameter in parameters:
+            value = yield from _evaluate(parameter, frame)
+            values.append(value() if callable(value) else value)
+        return (yield Call(func, values, tail))
+    return call
+
+
+def _compile_declaration(operation: CommitedOperation, scope: Scope):
+    kwargs = {key: _compile_argument(value, scope) for key, value in operation.kwargs.items()}
+    index = scope.slots[operation.kwargs["name"]] if scope is not None else None
+
+    def declare(frame):
+        values = {}
+        for key, argument in kwargs.items():
+            values[key] = yield from _evaluate(argument, frame)
+        var = create_variable(**values)
+        if index is None:
+            current_storage().add_variable(var)
+        else:
+            frame.slots[index] = var
+        return var
+    return declare
+
+
+def _compile_function(operation: CommitedOperation, scope: Scope, pausing: bool = False):
+    kwargs = dict(operation.kwargs)
+    inner = StacklessScope(scope, pausing)
+    for name, _ in kwargs.get("parameters") or []:
+        inner.declare(name)
+    code = StacklessFunction(inner, kwargs.get("value"))
+
+    if scope is None:
+        def declare_global(frame):
+            func = init_variable(**kwargs)
+            func.code = code
+            return func
+        return declare_global
+    index = scope.slots[kwargs["name"]]
+
+    def declare(frame):
+        func = create_variable(**kwargs)
+        func.code = code
+        func.closure = frame
+        frame.captured = True
+        frame.slots[index] = func
+        return func
+    return declare
+
+
+def _compile_generic(operation: CommitedOperation, scope: Scope):
+    func = operation.func
+    args = [_compile_argument(arg, scope) for arg in operation.args]
+    kwargs = {key: _compile_argument(value, scope) for key, value in operation.kwargs.items()}
+
+    def run(frame):
+        values = []
+        for argument in args:
+            values.append((yield from _evaluate(argument, frame)))
+        keywords = {}
+        for key, argument in kwargs.items():
+            keywords[key] = yield from _evaluate(argument, frame)
+        return func(*values, **keywords)
+    return run
+
+
+def _compile_action(operation: CommitedOperation, scope: Scope):
+    run = _compile_generic(operation, scope)
+    expression = operation.func is methods._action
+
+    def act(frame):
+        result = yield from run(frame)
+        if expression:
+            # the expression form evaluates to the move, it is made here so that the pause follows it
+            result = result()
+        yield PAUSE
+        return result
+    return act
+
+
+def _compile(node, scope: Scope, pausing: bool = False) -> Tuple[Callable, bool]:
+    """
+    Compiles a node that may make calls into a generator function taking the current frame, the
+    rest is compiled by the closure compiler.
+
+    :param pausing: pause after robot actions and loop iterations, in the functions of a
+        top-level node; nested nodes take it from their scope
+    :return: the compiled node and whether it is a generator function
+    """
+    if not isinstance(node, CommitedOperation):
+        return compile_node(node, scope), False
+    func = node.func
+    if func is init_variable and node.kwargs.get("type") in ("function", FunctionType):
+        return _compile_function(node, scope, pausing), False
+    if not _suspends(node, _pausing(scope)):
+        return compile_node(node, scope), False
+    if func in ACTIONS and _pausing(scope):
+        return _compile_action(node, scope), True
+    if func is methods._function_call:
+        return _compile_call(node, scope), True
+    if func is methods._while:
+        return _compile_while(scope, *node.args, **node.kwargs), True
+    if func is methods._if:
+        return _compile_if(scope, *node.args, **node.kwargs), True
+    if func is methods._block:
+        body = _compile_block(node.args[0], scope)
+        return (lambda frame: _run_block(body, frame)), True
+    if func is Result and isinstance(node.args[0], CommitedOperation) and node.args[0].func is methods._function_call:
+        return _compile_call(node.args[0], scope, tail=True), True
+    if func is init_variable:
+        return _compile_declaration(node, scope), True
+    return _compile_generic(node, scope), True
+
+
+def compile_program(program: Iterable[CommitedOperation], pausing: bool = False) -> Iterator[Callable]:
+    """
+    Compiles the top-level statements like compiler.compile_program, with stackless functions.
+
+    :param pausing: pause after every robot action and loop iteration, for the async mode
+    """
+    for statement in program:
+        closure, _ = _compile(statement, None, pausing)
+        yield lambda closure=closure: closure(None)
@@ -0,0 +1,155 @@
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextvars import copy_context
+from .asynchronous import call_async
+from .bison import compile_script
+from .classes import Integer
+from .limits import Limits
+from .methods import methods
+from .robot import FrameRenderer, Renderer, Robot
+from .runtime import Runtime
+from .stackless import PAUSE, Interpreter
+
+
+class Recorder(FrameRenderer):
+    """
+    Animates the moves into a string and logs the name of the robot that moved.
+    """
+    def __init__(self, name: str, log: list, delay: float = 0):
+        super().__init__(stream=io.StringIO(), delay=delay)
+        self.name = name
+        self.log = log
+
+    def moved(self, robot, position):
+        self.log.append(self.name)
+        super().moved(robot, position)
+
+
+class TestAsynchronous(unittest.TestCase):
+    walker = """
+            integer main()
+            start
+                integer moved := 0;
+                mutable integer i;
+                i := 0;
+                while (i < 3) start
+                    right;
+                    left;
+                    i := i + 1;
+                finish;
+                moved := right;
+                moved := bottom;
+                moved := right;
+                return i;
+            finish;
+            """
+    counter = """
+            integer sum(integer n)
+            start
+                checkzero(n) return 0;
+                return n + call sum with n - 1;
+            finish;
+
+            integer main(integer n)
+            start
+                mutable integer i;
+                mutable integer total;
+                i := 0;
+                total := 0;
+                while (i < n) start
+                    i := i + 1;
+                    total := total + call sum with i;
+                finish;
+                return total;
+            finish;
+            """
+    maze = "1 1\n1 1 1 1\n1 0 0 1\n1 1 0 0\n1 1 1 1\n"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=".")
+        self.files = {}
+        for name, content in [("walker.help", self.walker), ("counter.help", self.counter), ("maze.config", self.maze)]:
+            self.files[name] = os.path.relpath(os.path.join(self.directory, name))
+            with open(self.files[name], "w") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_pauses(self):
+        runtime = Runtime(config=self.files["maze.config"])
+        main_func = runtime.run(compile_script, self.files["counter.help"], frontend="python", asynchronous=True)
+        steps = runtime.run(Interpreter().steps, main_func, [Integer(value=10)])
+        pauses = 0
+        while True:
+            try:
+                self.assertIs(runtime.run(next, steps), PAUSE)
+            except StopIteration as stop:
+                self.assertEqual(int(stop.value), 220)
+                break
+            pauses += 1
+        # a pause after every iteration of the loop of main, sum recurses without loops
+        self.assertEqual(pauses, 10)
+        # run ignores the pauses
+        self.assertEqual(int(runtime.run(methods._function_call, main_func, [Integer(value=10)])), 220)
+
+    def test_sessions(self):
+        log = []
+        runtimes = [Runtime(robot=Robot(renderer=Recorder(name, log, delay=0.02)), config=self.files["maze.config"])
+                    for name in "abc"]
+
+        async def run_all():
+            return await asyncio.gather(*(runtime.run_script_async(self.files["walker.help"], frontend="python")
+                                          for runtime in runtimes))
+
+        started = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - started
+        self.assertEqual([result.status for result in results], ["exit"] * 3)
+        # the sessions take turns after every move and sleep their animation delays together
+        self.assertEqual("".join(log), "abc" * 9)
+        self.assertLess(elapsed, 3 * 9 * 0.02)
+        for runtime in runtimes:
+            self.assertEqual(runtime.robot.position, [2, 3])
+            self.assertFalse(runtime.robot.asynchronous)
+            self.assertEqual(runtime.robot.pending_delay, 0)
+
+    def test_results(self):
+        async def run(n):
+            runtime = Runtime(config=self.files["maze.config"], limits=Limits(steps=10 ** 6))
+            return await runtime.execute_async(self.files["counter.help"], [Integer(value=n)], frontend="python")
+
+        async def run_all():
+            return await asyncio.gather(*(run(n) for n in range(20, 30)))
+
+        self.assertEqual([int(value) for value in asyncio.run(run_all())],
+                         [n * (n + 1) * (n + 2) // 6 for n in range(20, 30)])
+
+    def test_deep_recursion(self):
+        runtime = Runtime(config=self.files["maze.config"])
+        runtime.run(compile_script, self.files["counter.help"], frontend="python", asynchronous=True)
+        # a context with the runtime active
+        context = runtime.run(copy_context)
+        result = asyncio.run(call_async(runtime.storage["sum"], [Integer(value=5000)], context))
+        self.assertEqual(int(result), 5000 * 5001 // 2)
+
+    def test_cancellation(self):
+        spinner = os.path.join(self.directory, "spinner.help")
+        with open(spinner, "w") as f:
+            f.write("integer main() start mutable integer i; i := 0; while (i < 1) start i := i; finish; "
+                    "return i; finish;")
+        runtime = Runtime(robot=Robot(renderer=Renderer()), config=self.files["maze.config"])
+
+        async def spin():
+            await asyncio.wait_for(runtime.execute_async(spinner, frontend="python"), timeout=0.05)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(spin())
+        runtime = Runtime(config=self.files["maze.config"], limits=Limits(steps=100))
+        result = asyncio.run(runtime.run_script_async(spinner, frontend="python"))
+        self.assertEqual((result.status, result.steps), ("budget", 101))
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from .batch import *
+
+
+class TestBatch(unittest.TestCase):
+    maze = "1 1\n1 1 1 1\n1 0 0 1\n1 1 0 0\n1 1 1 1\n"
+    walker = """
+            integer main()
+            start
+                integer moved := 0;
+                moved := right;
+                moved := left;
+                moved := right;
+                moved := bottom;
+                moved := right;
+                return 0;
+            finish;
+            """
+    idle = """
+            integer main()
+            start
+                return 7;
+            finish;
+            """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=".")
+        self.files = {}
+        for name, content in [("walker.help", self.walker), ("idle.help", self.idle), ("maze.config", self.maze)]:
+            self.files[name] = os.path.join(self.directory, name)
+            with open(self.files[name], "w") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_path_length(self):
+        self.assertEqual(path_length((1, 1), []), 0)
+        self.assertEqual(path_length((1, 1), [(1, 2), (1, 1), (1, 2), (2, 2), (2, 3)]), 3)
+
+    def test_run_batch(self):
+        scripts = [self.files["walker.help"], self.files["idle.help"]]
+        for jobs in [1, 2]:
+            reports = run_batch(scripts, [self.files["maze.config"]], jobs=jobs, cache=False)
+            self.assertEqual([report["script"] for report in reports], scripts)
+            walker, idle = reports
+            self.assertEqual(walker["status"], "exit")
+            self.assertTrue(walker["exit_reached"])
+            self.assertEqual(walker["steps"], 5)
+            self.assertEqual(walker["path_length"], 3)
+            self.assertEqual(walker["shortest_path"], 3)
+            self.assertTrue(walker["optimal"])
+            self.assertIsNone(walker["error"])
+            self.assertEqual(idle["status"], "returned")
+            self.assertFalse(idle["exit_reached"])
+            self.assertEqual(idle["steps"], 0)
+            self.assertEqual(idle["result"], 7)
+            self.assertFalse(idle["optimal"])
+
+    def test_limits(self):
+        reports = run_batch([self.files["walker.help"], self.files["idle.help"]], [self.files["maze.config"]],
+                            jobs=1, cache=False, max_steps=0)
+        # main itself is one call over the budget, the walker never moves
+        self.assertEqual([report["status"] for report in reports], ["budget", "budget"])
+        self.assertEqual(reports[0]["steps"], 0)
+        self.assertEqual(reports[0]["error"], "Step budget of 0 exhausted.")
+        self.assertFalse(reports[0]["exit_reached"])
+
+    def test_write_report(self):
+        reports = run_batch([self.files["idle.help"]], [self.files["maze.config"]], jobs=1, cache=False)
+        filename = os.path.join(self.directory, "report.json")
+        write_report(reports, filename)
+        with open(filename) as f:
+            self.assertEqual(json.load(f), reports)
+        filename = os.path.join(self.directory, "report.csv")
+        write_report(reports, filename)
+        with open(filename) as f:
+            self.assertEqual(f.readline().strip(), ",".join(REPORT_FIELDS))
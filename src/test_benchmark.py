@@ -0,0 +1,28 @@
+import unittest
+from .benchmark import *
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_benchmarks(self):
+        results = run_benchmarks(r"^fibonacci\[10\]", repeat=1)
+        self.assertEqual(sorted(results), ["fibonacci[10]/compiled", "fibonacci[10]/stackless", "fibonacci[10]/tree"])
+        for result in results.values():
+            self.assertGreater(result["time"], 0)
+            self.assertGreater(result["peak_kib"], 0)
+
+    def test_compare(self):
+        results = {"fast": {"time": 1.0}, "slow": {"time": 2.0}, "new": {"time": 1.0}}
+        baseline = {"fast": {"time": 1.0}, "slow": {"time": 1.0}}
+        self.assertEqual(compare(results, baseline, threshold=1.2), ["slow"])
+        self.assertEqual(results["slow"]["ratio"], 2.0)
+        self.assertNotIn("ratio", results["new"])
+
+    def test_nonlinear(self):
+        results = {
+            "parse_body[10]/python": {"time": 1.0}, "parse_body[100]/python": {"time": 11.0},
+            "parse_body[1000]/python": {"time": 300.0}, "parse_body[10]/bison": {"time": 1.0},
+            "parse_body[100]/bison": {"time": 10.0}, "fibonacci[15]/tree": {"time": 1000.0},
+            "fibonacci[10]/tree": {"time": 1.0},
+        }
+        self.assertEqual(nonlinear(results), ["parse_body[1000]/python"])
+        self.assertEqual(nonlinear(results, tolerance=50), [])
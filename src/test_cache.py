@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from . import *
+from . import bison
+from .cache import engine_directory, load_program
+
+
+class TestCache(unittest.TestCase):
+    program = """
+            integer test(integer n)
+            start
+                integer counter := 0;
+                mutable integer total;
+                total := 0;
+                while (counter < n) start
+                    counter := counter + 1;
+                    total := total + counter * 2 - counter % 2;
+                finish;
+                return total;
+            finish;
+
+            integer main()
+            start
+                return call test with 10;
+            finish;
+            """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.environ = mock.patch.dict(os.environ, {"TALAB3_CACHE_DIR": self.directory})
+        self.environ.start()
+        with open("temp.help", "w") as f:
+            f.write(self.program)
+
+    def tearDown(self):
+        self.environ.stop()
+        shutil.rmtree(self.directory)
+
+    def test_warm_start_skips_parser(self):
+        cold = methods._function_call(compile_script("temp.help", cache=True), parameters=[])
+        with mock.patch.object(bison, "get_parser", side_effect=AssertionError("parser was used")):
+            warm = methods._function_call(compile_script("temp.help", cache=True), parameters=[])
+            compiled = methods._function_call(compile_script("temp.help", cache=True, compiled=True), parameters=[])
+        self.assertEqual(int(cold), 105)
+        self.assertEqual(int(warm), 105)
+        self.assertEqual(int(compiled), 105)
+
+    def test_source_change_misses(self):
+        compile_script("temp.help", cache=True)
+        with open("temp.help", "w") as f:
+            f.write(self.program.replace("with 10", "with 4"))
+        self.assertIsNone(load_program(self.program.replace("with 10", "with 4"), bison.Parser))
+        self.assertEqual(int(methods._function_call(compile_script("temp.help", cache=True), parameters=[])), 18)
+
+    def test_frontends_keep_their_trees(self):
+        compile_script("temp.help", cache=True, frontend="python")
+        self.assertIsNotNone(load_program(self.program, bison.PythonParser))
+        self.assertIsNone(load_program(self.program, bison.Parser))
+        with mock.patch.object(bison, "get_parser", side_effect=AssertionError("parser was used")):
+            main_func = compile_script("temp.help", cache=True, frontend="python")
+        self.assertEqual(int(methods._function_call(main_func, parameters=[])), 105)
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "permissions are not checked on this platform")
+    def test_shared_directory_is_ignored(self):
+        compile_script("temp.help", cache=True, frontend="python")
+        os.chmod(self.directory, 0o777)
+        try:
+            self.assertIsNone(load_program(self.program, bison.PythonParser))
+            self.assertIsNone(engine_directory(bison.Parser))
+            with open("temp.help", "w") as f:
+                f.write(self.program.replace("with 10", "with 4"))
+            self.assertEqual(int(methods._function_call(compile_script("temp.help", cache=True, frontend="python"),
+                                                        parameters=[])), 18)
+            self.assertIsNone(load_program(self.program.replace("with 10", "with 4"), bison.PythonParser))
+        finally:
+            os.chmod(self.directory, 0o700)
@@ -0,0 +1,53 @@
+import unittest
+from .classes import Array, Integer, IntegerBuffer, String
+
+
+class TestArray(unittest.TestCase):
+    def test_append_grows_by_quant(self):
+        values = Array(name="values", value_type=Integer, size=2)
+        for i in range(5):
+            values.append(Integer(value=i))
+        self.assertEqual(values.current_size, 7)
+        self.assertEqual(int(values.size()), 8)
+        self.assertEqual(len(values.value), 7)
+        self.assertEqual(int(values[6]), 4)
+
+    def test_extend(self):
+        values = Array(name="values", value_type=Integer, size=1)
+        values.extend(Integer(value=i) for i in range(10))
+        self.assertEqual(int(values.size()), 11)
+        self.assertEqual([values.value.load(i) for i in range(1, 11)], list(range(10)))
+        values.extend([Integer(value=2 ** 70)])
+        self.assertEqual(int(values[11]), 2 ** 70)
+        with self.assertRaises(ValueError):
+            values.extend([Integer(value=1), String(value="a")])
+        self.assertEqual(values.current_size, 12)
+
+        words = Array(name="words", value_type=String, size=0)
+        words.extend([String(value="a"), String(value="b")])
+        self.assertEqual([str(word) for word in words.value], ["a", "b"])
+        self.assertEqual(int(words.size()), 10)
+
+    def test_capacity(self):
+        values = Array(name="values", value_type=Integer, size=0, capacity=100)
+        self.assertEqual(int(values.size()), 100)
+        values.extend(Integer(value=i) for i in range(100))
+        self.assertEqual(int(values.size()), 100)
+        values.append(Integer(value=100))
+        self.assertEqual(int(values.size()), 200)
+
+        static = Array(name="static", value_type=Integer, size=0, capacity=1, is_static=True)
+        static.append(Integer(value=1))
+        with self.assertRaises(RuntimeError):
+            static.append(Integer(value=2))
+
+    def test_shared_storage(self):
+        values = Array(name="values", value_type=Integer, size=1)
+        other = Array(name="other", value_type=Integer, size=1)
+        other.value = values
+        values.append(Integer(value=1))
+        other.append(Integer(value=2))
+        # both arrays write the element after their own end, like before the storage was shared
+        self.assertIs(type(values.value), IntegerBuffer)
+        self.assertEqual(int(values[1]), 2)
+        self.assertEqual(int(other[1]), 2)
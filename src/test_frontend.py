@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+from .bison import compile_script, get_parser
+from .classes import Integer, current_storage
+from .methods import methods
+from .general import bison_logger
+from .grammar import ParseError, tokenize
+
+
+class TestPythonFrontend(unittest.TestCase):
+    def test_tokenize(self):
+        tokens = [(token, text) for token, text, *_ in tokenize('array of integerx := "a b";\r\n.append(1)')]
+        self.assertEqual(tokens, [
+            ("ARRAY", "array of"), ("IDENTIFIER", "integerx"), ("EQUALS", ":="), ("STR", '"a b"'), ("SEM", ";"),
+            ("APPEND", ".append"), ("LPAREN", "("), ("NUMBER", "1"), ("RPAREN", ")"), ("$end", None),
+        ])
+
+    def test_syntax_error(self):
+        parser = get_parser(frontend="python")
+        with self.assertRaises(ParseError) as error:
+            parser.parse_string("integer main()\nstart\n    return 1 +;\nfinish;\n")
+        self.assertEqual((error.exception.lineno, error.exception.offset), (3, 15))
+
+    def test_locations(self):
+        from .optimizer import optimize_program
+        program = get_parser(frontend="python").parse_string(
+            "integer main()\nstart\n    mutable integer x;\n    x := 1 + 2;\n"
+            "    checkzero(x) left;\n    return x;\nfinish;\n")
+        self.assertEqual((program[0].line, program[0].column), (1, 1))
+        body = program[0].kwargs["value"]
+        self.assertEqual([(statement.line, statement.column) for statement in body], [(3, 5), (4, 5), (5, 5), (6, 5)])
+        # the value of the assignment starts at its own token
+        self.assertEqual((body[1].args[2].line, body[1].args[2].column), (4, 10))
+        body = list(optimize_program(program))[0].kwargs["value"]
+        self.assertEqual([statement.line for statement in body], [3, 4, 5, 6])
+        self.assertEqual((body[1].args[2].line, body[1].args[2].column), (4, 10))
+
+    def test_trace_actions(self):
+        program = "integer main()\nstart\n    return 1;\nfinish;\n"
+        fd, filename = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        level, previous = bison_logger.level, bison_logger.filename
+        try:
+            bison_logger.configure(level="info", filename=filename)
+            get_parser(frontend="python").parse_string(program)
+            bison_logger.flush()
+            with open(filename) as f:
+                self.assertEqual(f.read(), "")
+            parser = get_parser(frontend="python", trace=True)
+            self.assertIsNot(parser, get_parser(frontend="python"))
+            parser.parse_string(program)
+            bison_logger.flush()
+            with open(filename) as f:
+                records = f.read().splitlines()
+            self.assertEqual(records[0], "global_thread, 0, [], []")
+            self.assertIn("number, 0, ['NUMBER'], ['1']", records)
+            self.assertTrue(records[-1].startswith("global_thread, 1, "))
+        finally:
+            bison_logger.configure(level=level, filename=previous)
+            os.remove(filename)
+
+    def test_unknown_frontend(self):
+        with self.assertRaises(ValueError):
+            get_parser(frontend="yacc")
+
+    def test_parse_lines(self):
+        read = []
+
+        def lines():
+            for line in ["integer one()\n", "start return 1; finish;\n", "integer two()\n", "start return 2; finish;\n"]:
+                read.append(line)
+                yield line
+
+        functions = get_parser(frontend="python").parse_lines(lines())
+        self.assertEqual(next(functions).kwargs["name"], "one")
+        # the first function is emitted before the second one is read
+        self.assertEqual(len(read), 3)
+        self.assertEqual(next(functions).kwargs["name"], "two")
+        self.assertEqual(list(functions), [])
+
+    def test_lazy_compilation(self):
+        directory = tempfile.mkdtemp(dir=".")
+        try:
+            script = os.path.relpath(os.path.join(directory, "lazy.help"))
+            with open(script, "w") as f:
+                f.write("""
+                integer unused(integer n) start return n; finish;
+                integer used(integer n) start return n * 2; finish;
+                integer main() start return call used with 21; finish;
+                """)
+            main_func = compile_script(script, compiled=True, frontend="python", stream=True)
+            self.assertEqual(int(methods._function_call(main_func, parameters=[])), 42)
+            storage = current_storage()
+            self.assertIsNotNone(storage["used"].code.body)
+            self.assertIsNone(storage["unused"].code.body)
+            self.assertEqual(int(methods._function_call(storage["unused"], parameters=[Integer(value=7)])), 7)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_stream_needs_python_frontend(self):
+        with self.assertRaises(ValueError):
+            compile_script("temp.help", stream=True)
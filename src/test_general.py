@@ -0,0 +1,81 @@
+import gc
+import os
+import tempfile
+import threading
+import unittest
+import weakref
+from unittest import mock
+from .general import *
+
+
+class Unformattable:
+    def __str__(self):
+        raise AssertionError("disabled log record was formatted")
+
+
+class TestBisonLogger(unittest.TestCase):
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_disabled(self):
+        logger = BisonLogger(filename=self.filename, level=OFF)
+        self.assertFalse(logger.debug_enabled)
+        self.assertFalse(logger.info_enabled)
+        logger.debug("set: %s", Unformattable())
+        bison_log("set: %s", Unformattable(), level=DEBUG)
+        logger.flush()
+        self.assertEqual(len(logger.buffer), 0)
+        with open(self.filename) as f:
+            self.assertEqual(f.read(), "")
+
+    def test_levels_and_flush(self):
+        logger = BisonLogger(filename=self.filename, level="info")
+        logger.debug("set: %s", Unformattable())
+        logger.info("initialized: %s", {"name": "a"})
+        logger.info("plain")
+        logger.flush()
+        with open(self.filename) as f:
+            self.assertEqual(f.read(), "initialized: {'name': 'a'}\nplain\n")
+
+    def test_ring_buffer(self):
+        logger = BisonLogger(filename=self.filename, level=DEBUG, capacity=3, batch_size=100, flush_interval=60)
+        for i in range(5):
+            logger.debug("record %s", i)
+        logger.flush()
+        with open(self.filename) as f:
+            self.assertEqual(f.read().splitlines(), ["... 2 records dropped", "record 2", "record 3", "record 4"])
+
+    def test_threads(self):
+        logger = BisonLogger(filename=self.filename, level=DEBUG, capacity=50, batch_size=10, flush_interval=0.001)
+        barrier = threading.Barrier(8)
+
+        def work(n):
+            barrier.wait()
+            for i in range(500):
+                logger.debug("record %s %s", n, i)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        with mock.patch.object(logger, "_start_writer", wraps=logger._start_writer) as start_writer:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        logger.flush()
+        self.assertEqual(start_writer.call_count, 1)
+        with open(self.filename) as f:
+            lines = f.read().splitlines()
+        dropped = sum(int(line.split()[1]) for line in lines if line.endswith("records dropped"))
+        # every record is either written or counted as dropped
+        self.assertEqual(len(lines) - sum(line.endswith("records dropped") for line in lines) + dropped, 8 * 500)
+
+    def test_collected(self):
+        logger = BisonLogger(filename=self.filename, level=DEBUG)
+        logger.debug("record")
+        reference = weakref.ref(logger)
+        del logger
+        gc.collect()
+        self.assertIsNone(reference())
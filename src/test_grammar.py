@@ -3,6 +3,11 @@ from . import *
 
 
 class TestGrammar(unittest.TestCase):
+    options = {}
+
+    def compile_script(self, filename: str):
+        return compile_script(filename, **self.options)
+
     def test_init_int(self):
         program = """
         integer main()
@@ -16,7 +21,7 @@ class TestGrammar(unittest.TestCase):
         """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 99999999999 + 1)
 
         program = """
@@ -29,7 +34,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(RuntimeError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
         program = """
                 integer main()
@@ -41,7 +46,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(ValueError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
     def test_init_str(self):
         program = """
@@ -55,7 +60,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(str(compiled), "hello world")
 
         program = """
@@ -68,7 +73,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(RuntimeError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
     def test_init_pointer(self):
         program = """
@@ -86,7 +91,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 20)
 
         program = """
@@ -99,7 +104,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(RuntimeError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
         program = """
                 integer main()
@@ -114,7 +119,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(ValueError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
         program = """
                 integer main()
@@ -129,7 +134,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(ValueError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
         program = """
                 integer main()
@@ -144,7 +149,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 20)
 
         program = """
@@ -161,7 +166,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(ValueError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
     def test_init_array(self):
         program = """
@@ -175,7 +180,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 0)
 
         program = """
@@ -188,7 +193,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(RuntimeError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
         program = """
                 integer main()
@@ -205,7 +210,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 10)
 
         program = """
@@ -220,7 +225,7 @@ class TestGrammar(unittest.TestCase):
             f.write(program)
 
         with self.assertRaises(RuntimeError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
     def test_array_index(self):
         program = """
@@ -237,7 +242,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 10)
 
         program = """
@@ -250,24 +255,24 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
         with self.assertRaises(RuntimeError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
         program = """
                 integer main()
                 start
-                    string b = "hello";
+                    string b := "hello";
                     return b[0];
                 finish;
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(str(compiled), "h")
 
         program = """
                 integer main()
                 start
-                    string b = "hello";
+                    string b := "hello";
                     return b[5];
                 finish;
                 """
@@ -275,7 +280,37 @@ class TestGrammar(unittest.TestCase):
             f.write(program)
 
         with self.assertRaises(RuntimeError):
-            methods._function_call(compile_script("temp.help"), parameters=[])
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
+
+    def test_integer_array_storage(self):
+        program = """
+                integer main()
+                start
+                    array of integer big[1000000];
+                    big[999999] := 7;
+                    mutable pointer a := &big;
+                    mutable pointer b := a + 999999;
+                    *b := *b + 1;
+                    big.append(99999999999999999999);
+                    return big[999999] + big[1000000] + ?big;
+                finish;
+                """
+        with open("temp.help", "w") as f:
+            f.write(program)
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
+        self.assertEqual(int(compiled), 8 + 99999999999999999999 + 2000000)
+
+        program = """
+                integer main()
+                start
+                    array of integer b[5];
+                    return b[0] + 1;
+                finish;
+                """
+        with open("temp.help", "w") as f:
+            f.write(program)
+        with self.assertRaises(ValueError):
+            methods._function_call(self.compile_script("temp.help"), parameters=[])
 
     def test_pointer_value(self):
         program = """
@@ -288,7 +323,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 10)
 
         program = """
@@ -302,9 +337,22 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 20)
 
+        program = """
+                integer main()
+                start
+                    pointer integer a := &(1 < 2);
+                    *a := 20;
+                    return (1 < 2) + *a;
+                finish;
+                """
+        with open("temp.help", "w") as f:
+            f.write(program)
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
+        self.assertEqual(int(compiled), 21)
+
     def test_len_operator(self):
         program = """
                 integer main()
@@ -315,7 +363,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 1)
 
         program = """
@@ -328,7 +376,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 10)
 
     def test_arithmetic(self):
@@ -345,7 +393,7 @@ class TestGrammar(unittest.TestCase):
         with open("temp.help", "w") as f:
             f.write(program)
 
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 10)
 
     def test_while(self):
@@ -364,7 +412,7 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 11)
 
     # def test_checkzero(self):
@@ -383,7 +431,7 @@ class TestGrammar(unittest.TestCase):
     #             """
     #     with open("temp.help", "w") as f:
     #         f.write(program)
-    #     compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+    #     compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
     #     self.assertEqual(int(compiled), 11)
 
     def test_recursive(self):
@@ -410,9 +458,54 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
         self.assertEqual(int(compiled), 0)
 
+    def test_nested_scopes(self):
+        program = """
+                integer outer()
+                start
+                    integer a := 1;
+                    integer middle()
+                    start
+                        integer b := 10;
+                        integer inner()
+                        start
+                            return a + b;
+                        finish;
+                        return call inner;
+                    finish;
+                    return call middle;
+                finish;
+
+                integer main()
+                start
+                    return call outer;
+                finish;
+                """
+        with open("temp.help", "w") as f:
+            f.write(program)
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
+        self.assertEqual(int(compiled), 11)
+
+        program = """
+                integer main()
+                start
+                    integer a := 5;
+                    integer shadow()
+                    start
+                        integer b := a;
+                        integer a := 7;
+                        return b + a;
+                    finish;
+                    return call shadow;
+                finish;
+                """
+        with open("temp.help", "w") as f:
+            f.write(program)
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
+        self.assertEqual(int(compiled), 12)
+
     def test_fibonacci(self):
         program = """
                 integer test(integer n)
@@ -439,6 +532,80 @@ class TestGrammar(unittest.TestCase):
                 """
         with open("temp.help", "w") as f:
             f.write(program)
-        compiled = methods._function_call(compile_script("temp.help"), parameters=[Integer(value=9)])
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[Integer(value=9)])
         self.assertEqual(int(compiled), 55)
 
+    def test_assignment_semantics(self):
+        program = """
+                integer change(array of values, integer number, string text)
+                start
+                    values[0] := 7;
+                    number := 3;
+                    text := "changed";
+                    return 0;
+                finish;
+
+                integer main()
+                start
+                    array of integer values[2];
+                    values[0] := 1;
+                    array of integer other[2];
+                    other := values;
+                    other[1] := 5;
+                    mutable integer number;
+                    number := 1;
+                    mutable integer copied;
+                    copied := number;
+                    copied := 2;
+                    mutable string text;
+                    text := "text";
+                    call change with values, number, text;
+                    checkzero(text = "text") return 0;
+                    return values[0] * 100 + values[1] * 10 + number + copied;
+                finish;
+                """
+        with open("temp.help", "w") as f:
+            f.write(program)
+        compiled = methods._function_call(self.compile_script("temp.help"), parameters=[])
+        # arrays are shared by assignment and calls, integers and strings are copied
+        self.assertEqual(int(compiled), 753)
+
+
+class TestCompiledGrammar(TestGrammar):
+    options = {"compiled": True}
+
+
+class TestPythonFrontendGrammar(TestGrammar):
+    options = {"frontend": "python"}
+
+
+class TestPythonFrontendCompiledGrammar(TestGrammar):
+    options = {"frontend": "python", "compiled": True}
+
+
+class TestStreamingGrammar(TestGrammar):
+    options = {"frontend": "python", "stream": True, "compiled": True}
+
+
+class TestOptimizedGrammar(TestGrammar):
+    options = {"optimize": True}
+
+
+class TestOptimizedCompiledGrammar(TestGrammar):
+    options = {"optimize": True, "compiled": True}
+
+
+class TestStacklessGrammar(TestGrammar):
+    options = {"stackless": True}
+
+
+class TestOptimizedStacklessGrammar(TestGrammar):
+    options = {"stackless": True, "optimize": True}
+
+
+class TestMemoizedGrammar(TestGrammar):
+    options = {"memoize": True}
+
+
+class TestMemoizedStacklessGrammar(TestGrammar):
+    options = {"memoize": True, "stackless": True}
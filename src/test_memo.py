@@ -0,0 +1,167 @@
+import unittest
+from .bison import compile_script, get_parser
+from .classes import Integer, current_storage
+from .memo import *
+from .methods import methods
+
+FIBONACCI = """
+            integer fib(integer n)
+            start
+                checkzero(n) return 0;
+                checkzero(n - 1) return 1;
+                return (call fib with n - 1) + (call fib with n - 2);
+            finish;
+
+            integer main(integer n)
+            start
+                return call fib with n;
+            finish;
+            """
+
+
+class TestMemo(unittest.TestCase):
+    def compile(self, program: str, **options):
+        with open("temp.help", "w") as f:
+            f.write(program)
+        return compile_script("temp.help", frontend="python", **options)
+
+    def test_pure_functions(self):
+        program = get_parser(frontend="python").parse_string("""
+            integer square(integer n)
+            start
+                mutable integer result;
+                result := n * n;
+                return result;
+            finish;
+
+            integer sum(integer n)
+            start
+                mutable integer total;
+                total := 0;
+                while (n > 0) start
+                    total := total + call square with n;
+                    n := n - 1;
+                finish;
+                return total;
+            finish;
+
+            integer walk(integer n)
+            start
+                left;
+                return n;
+            finish;
+
+            integer caller(integer n)
+            start
+                return call walk with n;
+            finish;
+
+            integer first(array of values)
+            start
+                return values[0];
+            finish;
+
+            integer main()
+            start
+                return call sum with 3;
+            finish;
+            """)
+        self.assertEqual(pure_functions(program), {"square", "sum", "main"})
+        self.assertEqual(select_memoized(program, overrides={"walk": True, "main": False}), {"square", "sum", "walk"})
+        self.assertEqual(select_memoized(program, automatic=False, overrides={"square": True}), {"square"})
+        with self.assertRaises(ValueError):
+            select_memoized(program, automatic=False, overrides={"first": True})
+
+    def test_fibonacci(self):
+        for options in ({}, {"compiled": True}, {"stackless": True}):
+            with self.subTest(**options):
+                main_func = self.compile(FIBONACCI, memoize=True, **options)
+                result = methods._function_call(main_func, parameters=[Integer(value=30)])
+                self.assertEqual(int(result), 832040)
+                statistics = memo_statistics()
+                # every value of n is computed once, the second call of every level is a hit
+                self.assertEqual(statistics["fib"]["misses"], 31)
+                self.assertEqual(statistics["fib"]["hits"], 28)
+                result = methods._function_call(main_func, parameters=[Integer(value=30)])
+                self.assertEqual(int(result), 832040)
+                self.assertEqual(memo_statistics()["main"]["hits"], 1)
+
+    def test_eviction(self):
+        main_func = self.compile(FIBONACCI, memo_size=2, memo_overrides={"fib": True})
+        fib = current_storage()["fib"]
+        self.assertEqual(int(methods._function_call(main_func, parameters=[Integer(value=20)])), 6765)
+        self.assertEqual(fib.code.cache_info()["currsize"], 2)
+        self.assertNotIn("main", memo_statistics())
+        misses = fib.code.misses
+        methods._function_call(fib, parameters=[Integer(value=20)])
+        self.assertEqual(fib.code.misses, misses)
+        methods._function_call(fib, parameters=[Integer(value=1)])
+        self.assertEqual(fib.code.misses, misses + 1)
+        self.assertEqual(list(fib.code.cache), [(20,), (1,)])
+
+    def test_results_are_copies(self):
+        main_func = self.compile(FIBONACCI, memoize=True)
+        first = methods._function_call(main_func, parameters=[Integer(value=5)])
+        first.value = 0
+        self.assertEqual(int(methods._function_call(main_func, parameters=[Integer(value=5)])), 5)
+
+    def test_stackless_tail_calls(self):
+        main_func = self.compile("""
+            integer countdown(integer n)
+            start
+                checkzero(n) return 0;
+                return call countdown with n - 1;
+            finish;
+
+            integer twice(integer n)
+            start
+                return call countdown with n;
+            finish;
+
+            integer main()
+            start
+                integer first := call twice with 10;
+                integer second := call twice with 10;
+                return first + second + call countdown with 5;
+            finish;
+            """, stackless=True, memoize=True)
+        self.assertEqual(int(methods._function_call(main_func, parameters=[])), 0)
+        statistics = memo_statistics()
+        # the tail calls of twice and countdown store their results when the last callee returns
+        self.assertEqual((statistics["twice"]["misses"], statistics["twice"]["hits"]), (1, 1))
+        self.assertEqual((statistics["countdown"]["misses"], statistics["countdown"]["hits"]), (11, 1))
+        self.assertEqual(statistics["countdown"]["currsize"], 11)
+
+    def test_arrays_are_not_memoized(self):
+        program = """
+            integer first(array of values)
+            start
+                return values[0];
+            finish;
+
+            array of make(integer n)
+            start
+                array of integer result[1];
+                result[0] := n;
+                return result;
+            finish;
+
+            integer main()
+            start
+                array of integer a;
+                a := call make with 1;
+                a[0] := 99;
+                array of integer b;
+                b := call make with 1;
+                return b[0] + call first with a;
+            finish;
+            """
+        for options in ({}, {"compiled": True}, {"stackless": True}):
+            with self.subTest(**options):
+                # arrays are not hashable and share their elements with the cache
+                for name in ("first", "make"):
+                    with self.assertRaises(ValueError):
+                        self.compile(program, memo_overrides={name: True}, **options)
+                main_func = self.compile(program, memoize=True, **options)
+                self.assertEqual(int(methods._function_call(main_func, parameters=[])), 100)
+                self.assertEqual(set(memo_statistics()), set())
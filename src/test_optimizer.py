@@ -0,0 +1,113 @@
+import operator
+import unittest
+from .bison import compile_script, get_parser
+from .classes import Integer, String
+from .methods import methods
+from .optimizer import *
+
+
+class TestOptimizer(unittest.TestCase):
+    @staticmethod
+    def body(program: str):
+        functions = list(optimize_program(get_parser(frontend="python").parse_string(program)))
+        return functions[-1].kwargs["value"]
+
+    def test_fold(self):
+        body = self.body("""
+            integer main()
+            start
+                return (2 + 3) * 4 - 10 / 3 + (1 < 2);
+            finish;
+            """)
+        result = body[0].args[0]
+        self.assertIs(result.func, Integer)
+        self.assertEqual(result.kwargs, {"value": 18})
+
+    def test_failing_operation_is_kept(self):
+        body = self.body("""
+            integer main()
+            start
+                return 1 / 0 + "a";
+            finish;
+            """)
+        result = body[0].args[0]
+        self.assertIs(result.func, operator.add)
+        self.assertIs(result.args[0].func, operator.truediv)
+
+    def test_checkzero(self):
+        body = self.body("""
+            integer main()
+            start
+                checkzero(1 - 1) return 1;
+                instead return 2;
+                checkzero(1) return 3;
+                checkzero("a") return 4;
+                return 5;
+            finish;
+            """)
+        self.assertEqual(len(body), 3)
+        self.assertIs(body[0].func, methods._block)
+        self.assertEqual(body[0].args[0][0].args[0].kwargs, {"value": 1})
+        # a string can not be compared with zero, the error is left for run time
+        self.assertIs(body[1].func, methods._if)
+
+    def test_constants(self):
+        body = self.body("""
+            integer main()
+            start
+                integer size := 2 * 8;
+                string name := "robot";
+                integer changed := 1;
+                integer referenced := 1;
+                changed := size - 1;
+                pointer integer link := &referenced;
+                return size + changed + referenced;
+            finish;
+            """)
+        self.assertEqual(body[0].kwargs["value"].kwargs, {"value": 16})
+        self.assertIs(body[1].kwargs["value"].func, String)
+        self.assertEqual(body[4].args[2].kwargs, {"value": 15})
+        total = body[-1].args[0]
+        self.assertIs(total.args[0].args[0].func, Integer)
+        self.assertIs(total.args[0].args[1].func, methods._lookup)
+        self.assertIs(total.args[1].func, methods._lookup)
+
+    def test_constants_follow_declaration(self):
+        body = self.body("""
+            integer main()
+            start
+                integer before := size;
+                integer size := 3;
+                integer inner()
+                start
+                    return size;
+                finish;
+                return size;
+            finish;
+            """)
+        self.assertIs(body[0].kwargs["value"].func, methods._lookup)
+        self.assertIs(body[2].kwargs["value"][0].args[0].func, methods._lookup)
+        self.assertIs(body[3].args[0].func, Integer)
+
+    def test_break_in_folded_checkzero(self):
+        program = """
+                integer main()
+                start
+                    mutable integer result;
+                    result := 1;
+                    checkzero(2 - 2) start
+                        break;
+                        result := 2;
+                    finish;
+                    while (result < 5) start
+                        result := result + 1;
+                        checkzero(0) break;
+                    finish;
+                    return result;
+                finish;
+                """
+        with open("temp.help", "w") as f:
+            f.write(program)
+        for compiled in (False, True):
+            main_func = compile_script("temp.help", compiled=compiled, frontend="python", optimize=True)
+            self.assertEqual(int(methods._function_call(main_func, parameters=[])), 2)
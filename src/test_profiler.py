@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from .bison import compile_script
+from .classes import Integer
+from .methods import methods
+from .profiler import *
+
+PROGRAM = """integer fib(integer n)
+start
+    checkzero(n) return 0;
+    checkzero(n - 1) return 1;
+    return (call fib with n - 1) + (call fib with n - 2);
+finish;
+
+integer main(integer n)
+start
+    mutable integer i;
+    mutable integer total;
+    i := 0;
+    total := 0;
+    while (i < 3) start
+        total := total + call fib with n;
+        i := i + 1;
+    finish;
+    return total;
+finish;
+"""
+
+
+class TestProfiler(unittest.TestCase):
+    def compile(self, **options):
+        with open("temp.help", "w") as f:
+            f.write(PROGRAM)
+        return compile_script("temp.help", frontend="python", **options)
+
+    def test_counters(self):
+        for options in ({}, {"optimize": True}, {"memoize": True}):
+            with self.subTest(**options):
+                profiler = Profiler()
+                main_func = self.compile(profiler=profiler, **options)
+                self.assertEqual(int(methods._function_call(main_func, parameters=[Integer(value=10)])), 165)
+                self.assertEqual(profiler.functions["main"][0], 1)
+                # fib(10) makes 177 calls
+                calls = 3 * 177 if not options.get("memoize") else 11
+                self.assertEqual(profiler.functions["fib"][0], calls)
+                self.assertEqual(profiler.statements[("fib", 3, 5)][0], calls)
+                self.assertEqual(profiler.statements[("main", 15, 9)][0], 3)
+                self.assertEqual(profiler.statements[("main", 14, 5)][0], 1)
+                for count, total, own in list(profiler.statements.values()) + list(profiler.functions.values()):
+                    self.assertGreaterEqual(total, 0)
+                    self.assertLessEqual(own, total + 1e-9)
+                self.assertLessEqual(profiler.functions["fib"][1], profiler.functions["main"][1])
+
+    def test_reports(self):
+        ticks = iter(range(10 ** 6))
+        profiler = Profiler(clock=lambda: next(ticks) / 10 ** 6)
+        methods._function_call(self.compile(profiler=profiler), parameters=[Integer(value=2)])
+        report = profiler.format_profile(limit=2).splitlines()
+        self.assertEqual(report[1].split()[-1], "fib")
+        self.assertEqual(report[-3].split()[-1], "statement")
+        self.assertEqual(len(report), 7)
+        lines = profiler.collapsed()
+        self.assertIn("main;main:14;main:15;fib;fib:5", [line.rsplit(" ", 1)[0] for line in lines])
+        self.assertTrue(all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines))
+        fd, filename = tempfile.mkstemp(suffix=".folded")
+        os.close(fd)
+        try:
+            profiler.write_collapsed(filename)
+            with open(filename) as f:
+                self.assertEqual(f.read().splitlines(), lines)
+        finally:
+            os.remove(filename)
+
+    def test_uninstrumented(self):
+        main_func = self.compile()
+        self.assertIs(type(main_func.code), type(None))
+        with self.assertRaises(ValueError):
+            self.compile(profiler=Profiler(), compiled=True)
+
+    def test_sampler(self):
+        for options in ({}, {"compiled": True}):
+            with self.subTest(**options):
+                main_func = self.compile(**options)
+                with Sampler(interval=0.0005) as sampler:
+                    while sampler.samples < 5:
+                        methods._function_call(main_func, parameters=[Integer(value=12)])
+                self.assertTrue(all(path[0] == "main" for path in sampler.stacks))
+                self.assertEqual(sum(sampler.stacks.values()), sampler.samples)
+                if not options:
+                    self.assertTrue(any("fib:5" in path for path in sampler.stacks))
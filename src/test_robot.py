@@ -0,0 +1,188 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+from .limits import ExitReached
+from .robot import *
+from .robot import robot as robot_module
+from .robot.map_generator import generate_grid, generate_map, write_config
+from .runtime import Runtime
+
+
+class TestRenderers(unittest.TestCase):
+    maze = [
+        [1, 1, 1, 1],
+        [1, 0, 0, 1],
+        [1, 1, 0, 0],
+        [1, 1, 1, 1],
+    ]
+
+    def make_robot(self, renderer):
+        robot = Robot(renderer=renderer)
+        robot.imported_map = [row.copy() for row in self.maze]
+        robot.position = [1, 1]
+        return robot
+
+    def test_headless(self):
+        robot = self.make_robot(Renderer())
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(robot.move_right(), 1)
+            self.assertEqual(robot.move_top(), 0)
+            self.assertEqual(robot.move_down(), 1)
+            with self.assertRaises(ExitReached) as stop:
+                robot.move_right()
+            self.assertEqual(stop.exception.position, (2, 3))
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(robot.path_log, [(1, 2), (2, 2), (2, 3)])
+
+    def test_frame(self):
+        stream = io.StringIO()
+        robot = self.make_robot(FrameRenderer(stream=stream, delay=0, clear=False))
+        robot.move_right()
+        self.assertEqual(stream.getvalue(), "Robot has moved to position (1, 2).\n"
+                                            "# # # # \n"
+                                            "# _ R # \n"
+                                            "# # _ _ \n"
+                                            "# # # # \n")
+
+    def test_async_drops_frames(self):
+        stream = io.StringIO()
+        renderer = AsyncRenderer(stream=stream, fps=1, clear=False)
+        robot = self.make_robot(renderer)
+        for _ in range(50):
+            robot.move_right()
+            robot.move_left()
+        renderer.close()
+        self.assertGreater(renderer.dropped, 0)
+        self.assertTrue(stream.getvalue().endswith("# R _ # \n# # _ _ \n# # # # \n"
+                                                   f"Robot at (1, 1), 100 moves, {renderer.dropped} frames dropped.\n"))
+
+
+class TestMaze(unittest.TestCase):
+    maze = [
+        [1, 1, 1, 1, 1, 1],
+        [1, 0, 0, 0, 1, 1],
+        [1, 0, 1, 0, 0, 0],
+        [1, 0, 1, 1, 1, 1],
+        [1, 1, 1, 0, 0, 1],
+        [1, 1, 1, 1, 1, 1],
+    ]
+    program = """
+            integer main()
+            start
+                mutable integer moved;
+                while (distance > 0) start
+                    checkzero(distance top - distance + 1) moved := top;
+                    checkzero(distance bottom - distance + 1) moved := bottom;
+                    checkzero(distance left - distance + 1) moved := left;
+                    checkzero(distance right - distance + 1) moved := right;
+                finish;
+                return 0;
+            finish;
+            """
+
+    def test_index(self):
+        maze = Maze(self.maze)
+        self.assertTrue(maze.is_free(1, 1))
+        self.assertFalse(maze.is_free(0, 1))
+        self.assertFalse(maze.is_free(-1, 1))
+        self.assertTrue(maze.is_exit(2, 5))
+        self.assertEqual([maze.distance(3, 1), maze.distance(1, 1), maze.distance(2, 4), maze.distance(2, 5)],
+                         [7, 5, 1, 0])
+        self.assertEqual(maze.distance(4, 3), UNREACHABLE)
+        self.assertEqual(maze.distance(0, 0), UNREACHABLE)
+        self.assertEqual(maze.component_count, 2)
+        self.assertEqual(maze.component(3, 1), maze.component(2, 5))
+        self.assertNotEqual(maze.component(4, 3), maze.component(2, 5))
+        self.assertEqual(maze.component(0, 0), 0)
+        self.assertEqual(maze.shortest_path(1, 2), [(1, 2), (1, 3), (2, 3), (2, 4), (2, 5)])
+        self.assertEqual(maze.shortest_path(4, 4), [])
+
+    def test_queries(self):
+        robot = Robot()
+        robot.imported_map = self.maze
+        robot.position = [1, 1]
+        self.assertEqual(robot.exit_distance(), 5)
+        self.assertEqual(robot.exit_distance("right"), 4)
+        self.assertEqual(robot.exit_distance("bottom"), 6)
+        self.assertEqual(robot.exit_distance("top"), UNREACHABLE)
+        self.assertEqual(robot.region(), robot.region("right"))
+        self.assertEqual(robot.region("left"), 0)
+        # another map assigned to the robot is indexed again
+        robot.imported_map = [[1, 1, 1], [1, 0, 0], [1, 1, 1]]
+        self.assertEqual(robot.exit_distance(), 1)
+
+    def test_script(self):
+        directory = tempfile.mkdtemp(dir=".")
+        try:
+            script = os.path.relpath(os.path.join(directory, "route.help"))
+            config = os.path.join(directory, "maze.config")
+            with open(script, "w") as f:
+                f.write(self.program)
+            with open(config, "w") as f:
+                f.write("3 1\n" + "\n".join(" ".join(map(str, row)) for row in self.maze) + "\n")
+            runtime = Runtime(config=config)
+            with self.assertRaises(ExitReached):
+                runtime.execute(script, frontend="python")
+            self.assertEqual(runtime.robot.path_log, runtime.robot.maze.shortest_path(3, 1)[1:])
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestMapGenerator(unittest.TestCase):
+    def test_perfect_maze(self):
+        for width, height in [(5, 5), (21, 14), (40, 31)]:
+            grid = generate_grid(width, height, seed=width)
+            rows = [[cell - ord("0") for cell in grid[x * width:(x + 1) * width]] for x in range(height)]
+            maze = Maze(rows)
+            free = sum(maze.free)
+            self.assertEqual(maze.component_count, 1)
+            # a tree of cells: one more cell than the walls knocked down, plus the exit opening
+            passages = sum(maze.free[i] and maze.free[i + 1] for i in range(len(maze.free) - 1)
+                           if (i + 1) % width)
+            passages += sum(maze.free[i] and maze.free[i + width] for i in range(len(maze.free) - width))
+            self.assertEqual(passages, free - 1)
+            self.assertGreater(maze.distance(1, 1), 0)
+
+    def test_seed(self):
+        self.assertEqual(generate_map(31, seed=1), generate_map(31, seed=1))
+        self.assertNotEqual(generate_map(31, seed=1), generate_map(31, seed=2))
+        with self.assertRaises(ValueError):
+            generate_map(2)
+
+    def test_config(self):
+        directory = tempfile.mkdtemp(dir=".")
+        try:
+            config = os.path.join(directory, "maze.config")
+            write_config(config, 25, 15, seed=7)
+            robot = Robot()
+            robot.import_config(config)
+            self.assertEqual(robot.position, [1, 1])
+            self.assertEqual(len(robot.imported_map), 15)
+            self.assertEqual({len(row) for row in robot.imported_map}, {25})
+            grid = generate_grid(25, 15, seed=7)
+            self.assertEqual(robot.imported_map, [[cell - ord("0") for cell in grid[x * 25:(x + 1) * 25]]
+                                                  for x in range(15)])
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestDefaultRobot(unittest.TestCase):
+    def test_lazy(self):
+        directory = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        with mock.patch.object(robot_module, "_default_robot", None):
+            # the config of the default robot is found from any working directory
+            os.chdir(directory)
+            try:
+                robot = default_robot()
+            finally:
+                os.chdir(cwd)
+                shutil.rmtree(directory)
+            self.assertEqual(robot.position, [1, 1])
+            self.assertIs(default_robot(), robot)
+            self.assertIs(current_robot(), robot)
@@ -0,0 +1,133 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from .limits import CancellationToken, Limits, current_limits
+from .runtime import *
+from .classes import Integer, current_storage, global_storage
+from .robot import current_robot, default_robot
+
+
+class TestRuntime(unittest.TestCase):
+    program = """
+            integer sum(integer n)
+            start
+                integer counter := 0;
+                mutable integer total;
+                total := 0;
+                while (counter < n) start
+                    counter := counter + 1;
+                    total := total + call step with counter;
+                finish;
+                return total;
+            finish;
+
+            integer step(integer value)
+            start
+                return value * 2;
+            finish;
+
+            integer main(integer n)
+            start
+                integer moved := 0;
+                moved := right;
+                return call sum with n;
+            finish;
+            """
+    spinner = """
+            integer main()
+            start
+                mutable integer counter;
+                counter := 0;
+                while (counter < 1) start
+                    counter := counter;
+                finish;
+                return counter;
+            finish;
+            """
+    maze = "1 1\n1 1 1 1\n1 0 0 1\n1 1 1 1\n"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=".")
+        self.script = os.path.relpath(os.path.join(self.directory, "sum.help"))
+        self.config = os.path.join(self.directory, "maze.config")
+        with open(self.script, "w") as f:
+            f.write(self.program)
+        with open(self.config, "w") as f:
+            f.write(self.maze)
+        self.spinner_script = os.path.relpath(os.path.join(self.directory, "spinner.help"))
+        with open(self.spinner_script, "w") as f:
+            f.write(self.spinner)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_isolation(self):
+        runtime = Runtime(config=self.config)
+        result = runtime.execute(self.script, parameters=[Integer(value=10)])
+        self.assertEqual(int(result), 110)
+        self.assertEqual(runtime.robot.path_log, [(1, 2)])
+        self.assertIn("main", runtime.storage.name_storage[()])
+        self.assertIs(runtime.run(current_storage), runtime.storage)
+        self.assertIs(runtime.run(current_robot), runtime.robot)
+        self.assertIs(runtime.run(current_runtime), runtime)
+        self.assertIs(current_storage(), global_storage)
+        self.assertIs(current_robot(), default_robot())
+        self.assertIsNone(current_runtime())
+
+    def test_threads(self):
+        def execute(n):
+            runtime = Runtime(config=self.config)
+            return int(runtime.execute(self.script, parameters=[Integer(value=n)], compiled=n % 2 == 0))
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(execute, range(40, 56)))
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(results, [n * (n + 1) for n in range(40, 56)])
+
+    def test_steps(self):
+        for options in ({}, {"compiled": True}, {"stackless": True}):
+            with self.subTest(**options):
+                runtime = Runtime(config=self.config, limits=Limits(steps=100))
+                result = runtime.run_script(self.script, parameters=[Integer(value=10)], frontend="python", **options)
+                self.assertEqual((result.status, int(result.value), result.error), ("returned", 110, None))
+                # the calls of main, sum and of step ten times, and ten iterations
+                self.assertEqual(result.steps, 22)
+
+    def test_step_budget(self):
+        for options in ({}, {"compiled": True}, {"stackless": True}):
+            with self.subTest(**options):
+                runtime = Runtime(config=self.config, limits=Limits(steps=1000))
+                result = runtime.run_script(self.spinner_script, frontend="python", **options)
+                self.assertEqual(result.status, "budget")
+                self.assertEqual(result.steps, 1001)
+                self.assertIsNone(result.value)
+                result = Runtime(config=self.config).run_script(self.script, frontend="python", **options)
+                self.assertEqual(result.status, "error")
+                self.assertIsNone(result.steps)
+
+    def test_timeout(self):
+        runtime = Runtime(config=self.config, limits=Limits(timeout=0.05))
+        result = runtime.run_script(self.spinner_script, frontend="python")
+        self.assertEqual(result.status, "timeout")
+        self.assertGreater(result.steps, 0)
+        self.assertLess(result.wall_time, 5)
+
+    def test_cancellation(self):
+        token = CancellationToken()
+        runtime = Runtime(config=self.config, limits=Limits(token=token))
+        timer = threading.Timer(0.05, token.cancel)
+        timer.start()
+        try:
+            result = runtime.run_script(self.spinner_script, frontend="python", compiled=True)
+        finally:
+            timer.cancel()
+        self.assertEqual((result.status, result.error), ("cancelled", "Run cancelled."))
+        self.assertIsNone(current_limits())
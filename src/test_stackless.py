@@ -0,0 +1,93 @@
+import sys
+import unittest
+from .bison import compile_script
+from .classes import Integer
+from .methods import methods
+from .stackless import Interpreter
+
+
+class TestStackless(unittest.TestCase):
+    def compile(self, program: str):
+        with open("temp.help", "w") as f:
+            f.write(program)
+        return compile_script("temp.help", frontend="python", stackless=True)
+
+    def test_deep_recursion(self):
+        main_func = self.compile("""
+                integer sum(integer n)
+                start
+                    checkzero(n) return 0;
+                    return n + call sum with n - 1;
+                finish;
+
+                integer main(integer n)
+                start
+                    return call sum with n;
+                finish;
+                """)
+        depth = sys.getrecursionlimit() * 5
+        result = methods._function_call(main_func, parameters=[Integer(value=depth)])
+        self.assertEqual(int(result), depth * (depth + 1) // 2)
+
+    def test_tail_call(self):
+        main_func = self.compile("""
+                integer count(integer n, integer total)
+                start
+                    checkzero(n) return total;
+                    return call count with n - 1, total + 2;
+                finish;
+
+                integer main(integer n)
+                start
+                    return call count with n, 0;
+                finish;
+                """)
+        interpreter = Interpreter()
+        result = interpreter.run(main_func, [Integer(value=50000)])
+        self.assertEqual(int(result), 100000)
+        # every call replaced its caller, the stack never grew and two frames were enough for count
+        self.assertEqual(interpreter.max_depth, 0)
+        self.assertEqual(sum(len(frames) for frames in interpreter.pool.values()), 3)
+
+    def test_frame_reuse(self):
+        main_func = self.compile("""
+                integer step(integer n)
+                start
+                    integer doubled := n * 2;
+                    return doubled;
+                finish;
+
+                integer main(integer n)
+                start
+                    mutable integer total;
+                    total := 0;
+                    while (n > 0) start
+                        total := total + call step with n;
+                        n := n - 1;
+                    finish;
+                    return total;
+                finish;
+                """)
+        interpreter = Interpreter()
+        self.assertEqual(int(interpreter.run(main_func, [Integer(value=100)])), 10100)
+        self.assertEqual(interpreter.max_depth, 1)
+        self.assertEqual(sum(len(frames) for frames in interpreter.pool.values()), 2)
+
+    def test_captured_frame(self):
+        main_func = self.compile("""
+                integer apply(integer n)
+                start
+                    integer base := n * 10;
+                    integer add(integer value)
+                    start
+                        return base + value;
+                    finish;
+                    return call add with 1;
+                finish;
+
+                integer main()
+                start
+                    return (call apply with 1) + (call apply with 2);
+                finish;
+                """)
+        self.assertEqual(int(methods._function_call(main_func, parameters=[])), 32)